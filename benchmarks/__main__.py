@@ -0,0 +1,4 @@
+from .bench import main
+
+
+main()
@@ -0,0 +1,326 @@
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import click
+import numpy as np
+
+from edgecraft import (
+    CONFINEMENT_ENGINES,
+    PRESETS,
+    SimpleSample,
+    apply_confinement_potential,
+    apply_label_potential,
+    apply_QH_energy,
+    calc_edge_length,
+    find_edge,
+    sweep_gate,
+)
+
+
+DEFAULT_M = (80, 40, 20)
+"""Default resolutions. The grid has about 1.2e6 / M^2 pixels."""
+
+DEFAULT_ENGINES = ("fft", "tiled", "tree")
+"""Default confinement engines. The "loop" engine is too slow for M < 40."""
+
+
+@dataclass
+class Result:
+    """
+    Timing and memory of one benchmark case.
+
+    Attributes:
+        name (str): Name of the case.
+        M (int): Resolution of the grid.
+        shape (list[int]): Shape of the grid.
+        times (list[float]): Wall time of every repetition (s).
+        best (float): Shortest wall time (s).
+        median (float): Median wall time (s).
+        peak_bytes (int): Peak traced memory of one run (bytes).
+    """
+
+    name: str
+    M: int
+    shape: list[int]
+    times: list[float]
+    best: float
+    median: float
+    peak_bytes: int
+
+
+def measure(
+    name: str,
+    M: int,
+    shape: tuple[int, int],
+    func: Callable[[], Any],
+    repeat: int,
+) -> Result:
+    """
+    Time `repeat` calls of a function and trace the memory of one more.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Result(
+        name=name,
+        M=M,
+        shape=list(shape),
+        times=times,
+        best=min(times),
+        median=statistics.median(times),
+        peak_bytes=peak,
+    )
+
+
+def run_cases(
+    M: int,
+    engines: tuple[str, ...],
+    repeat: int,
+) -> list[Result]:
+    """
+    Benchmark the basic functions and the example pipelines at a resolution.
+    """
+    sample = SimpleSample(M=M, engine="fft")
+    layout = sample.layout
+    shape = layout.shape
+    bulk_indices = layout.indices(layout.bulk)
+    boundary_indices = layout.indices(layout.boundary)
+    energy = sample.energy
+    edge = find_edge(energy, sample.E_F, sample.U_fluc, layout.bulk)
+    table = layout.potential_table(bulk=sample.E_QH)
+    alpha = sample.physics["alpha"]
+
+    cases = {
+        "apply_QH_energy": lambda: apply_QH_energy(
+            np.zeros(shape),
+            sample.E_QH,
+            bulk_indices,
+        ),
+        "apply_label_potential": lambda: apply_label_potential(
+            np.zeros(shape),
+            layout.labels,
+            table,
+        ),
+        "find_edge": lambda: find_edge(
+            energy,
+            sample.E_F,
+            sample.U_fluc,
+            layout.bulk,
+        ),
+        "calc_edge_length": lambda: calc_edge_length(edge),
+        "sweep_gate": lambda: sweep_gate(
+            energy,
+            sample.gate,
+            sample.voltages,
+            sample.E_F,
+            sample.U_fluc,
+            layout.bulk,
+        ),
+        "sweep_gate[incremental]": lambda: sweep_gate(
+            energy,
+            sample.gate,
+            sample.voltages,
+            sample.E_F,
+            sample.U_fluc,
+            layout.bulk,
+            incremental=True,
+        ),
+    }
+    for engine in engines:
+        cases[f"apply_confinement_potential[{engine}]"] = (
+            lambda engine=engine: apply_confinement_potential(
+                np.zeros(shape),
+                bulk_indices,
+                boundary_indices,
+                alpha,
+                engine=engine,
+            )
+        )
+    for name in PRESETS:
+        cases[f"pipeline[{name}]"] = (
+            lambda name=name: _run_pipeline(name, M)
+        )
+
+    results = []
+    for name, func in cases.items():
+        click.echo(f"M={M} {name} ...", err=True, nl=False)
+        result = measure(name, M, shape, func, repeat)
+        click.echo(f" {result.best:.4g} s", err=True)
+        results.append(result)
+    return results
+
+
+def _run_pipeline(name: str, M: int) -> np.ndarray:
+    """
+    Build the preset of an example from scratch and run its gate sweep.
+    """
+    sample = PRESETS[name](M=M, engine="tiled")
+    return sweep_gate(
+        sample.energy,
+        sample.gate,
+        sample.voltages,
+        sample.E_F,
+        sample.U_fluc,
+        sample.layout.bulk,
+    )
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    time_tolerance: float,
+    memory_tolerance: float,
+) -> list[tuple[str, int, str, float, float]]:
+    """
+    Return the cases whose best time or peak memory grew beyond the
+    tolerances, as (name, M, quantity, baseline, current) tuples.
+    """
+    before = {
+        (result["name"], result["M"]): result
+        for result in baseline["results"]
+    }
+    regressions = []
+    for result in current["results"]:
+        old = before.get((result["name"], result["M"]))
+        if old is None:
+            continue
+        for quantity, tolerance in (
+            ("best", time_tolerance),
+            ("peak_bytes", memory_tolerance),
+        ):
+            if result[quantity] > old[quantity] * (1 + tolerance):
+                regressions.append((
+                    result["name"],
+                    result["M"],
+                    quantity,
+                    old[quantity],
+                    result[quantity],
+                ))
+    return regressions
+
+
+@click.group()
+def main() -> None:
+    """Benchmarks of edgecraft."""
+
+
+@main.command()
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False),
+    required=True,
+    help="JSON file of the results.",
+)
+@click.option(
+    "-M",
+    "Ms",
+    type=int,
+    multiple=True,
+    default=DEFAULT_M,
+    show_default=True,
+    help="Resolution, repeatable.",
+)
+@click.option(
+    "--engine",
+    "engines",
+    type=click.Choice(CONFINEMENT_ENGINES),
+    multiple=True,
+    default=DEFAULT_ENGINES,
+    show_default=True,
+    help="Confinement engine, repeatable.",
+)
+@click.option(
+    "--repeat",
+    type=int,
+    default=3,
+    show_default=True,
+    help="Timed repetitions per case.",
+)
+def run(
+    output: str,
+    Ms: tuple[int, ...],
+    engines: tuple[str, ...],
+    repeat: int,
+) -> None:
+    """Time every case and write the results to OUTPUT."""
+    results = []
+    for M in Ms:
+        results.extend(run_cases(M, engines, repeat))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": [asdict(result) for result in results],
+    }
+    Path(output).write_text(json.dumps(report, indent=2))
+    click.echo(f"Wrote {len(results)} results to {output}.")
+
+
+@main.command()
+@click.argument("baseline", type=click.Path(exists=True, dir_okay=False))
+@click.argument("current", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--time-tolerance",
+    type=float,
+    default=0.25,
+    show_default=True,
+    help="Allowed relative growth of the best time.",
+)
+@click.option(
+    "--memory-tolerance",
+    type=float,
+    default=0.1,
+    show_default=True,
+    help="Allowed relative growth of the peak memory.",
+)
+def compare(
+    baseline: str,
+    current: str,
+    time_tolerance: float,
+    memory_tolerance: float,
+) -> None:
+    """
+    Compare CURRENT results with BASELINE results and exit with status 1 if
+    any case regressed.
+    """
+    regressions = compare_results(
+        json.loads(Path(baseline).read_text()),
+        json.loads(Path(current).read_text()),
+        time_tolerance,
+        memory_tolerance,
+    )
+    for name, M, quantity, old, new in regressions:
+        click.echo(
+            f"REGRESSION {name} M={M} {quantity}: {old:.4g} -> {new:.4g} "
+            f"({new / old:.2f}x)"
+        )
+    if regressions:
+        sys.exit(1)
+    click.echo("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,88 @@ from .basic import (
     calc_confinement_potential_at,
     apply_confinement_potential,
     apply_local_constant_potential,
+    apply_label_potential,
     apply_QH_energy,
     find_edge,
     calc_edge_length,
+    calc_edge_lengths,
+)
+from .adaptive import (
+    AdaptiveEdge,
+    find_edge_adaptive,
+    make_energy_function,
+)
+from .cache import ConfinementCache
+from .config import (
+    Sample,
+    load_config,
+    make_region,
+    set_config_value,
+)
+from .confinement import (
+    CONFINEMENT_ENGINES,
+    DEFAULT_MAX_BYTES,
+    DEFAULT_TOLERANCE,
+    TREE_MIN_PAIRS,
+    calc_confinement_potentials,
+    calc_confinement_potentials_tree,
+    calc_confinement_sums,
+)
+from .contour import (
+    calc_contour_length,
+    calc_contour_lengths,
+    find_contour,
+)
+from .crossing import CrossingIndex
+from .geometry import (
+    Annulus,
+    Disk,
+    HalfPlane,
+    Rectangle,
+    Region,
+    SampleGeometry,
+    SampleLayout,
+    find_boundary,
+)
+from .indexset import IndexSet
+from .instrument import (
+    Progress,
+    Recorder,
+    StageStats,
+    get_recorder,
+    instrument,
+    stage,
+)
+from .precision import (
+    PRECISIONS,
+    PrecisionReport,
+    compare_precision,
+    resolve_dtype,
+)
+from .presets import (
+    PRESETS,
+    MultipleEtchedSample,
+    SimpleSample,
+)
+from .render import (
+    FrameRenderer,
+    GifWriter,
+    PngSequenceWriter,
+    StoreFrames,
+    SweepFrames,
+    apply_lut,
+    make_lut,
+    render_sweep,
+)
+from .scan import scan
+from .store import (
+    SweepReader,
+    SweepWriter,
+)
+from .sweep import (
+    IncrementalGateSweep,
+    calc_gate_shift,
+    sweep_gate,
 )
 from .const import (
     h,
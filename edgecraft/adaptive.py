@@ -0,0 +1,267 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+
+from .basic import calc_edge_length, find_edge
+from .confinement import DEFAULT_MAX_BYTES, calc_confinement_potentials
+from .indexset import IndexSet
+from .precision import _array_dtype
+
+
+EnergyFunction = Callable[[np.ndarray], np.ndarray]
+"""
+Function returning the energy at the points of an (N, 2) index array of the
+fine grid as a 1D array.
+"""
+
+
+def make_energy_function(
+    base_energy: np.ndarray,
+    bulk: np.ndarray | IndexSet,
+    boundary_indices: np.ndarray | IndexSet,
+    alpha: float,
+    dl: float | np.ndarray = 1,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> EnergyFunction:
+    """
+    Return the energy function of a base energy plus the confinement
+    potential.
+
+    The function gives the values of `apply_confinement_potential` applied to
+    a copy of `base_energy` with the "tiled" engine, but only evaluates the
+    boundary sum at the requested points. The base energy holds the cheap
+    potentials, such as the quantum Hall energy, on the fine grid.
+
+    Args:
+        base_energy (np.ndarray): 2D array of energy values without the
+            confinement potential.
+        bulk (np.ndarray | IndexSet): 2D array indicating bulk regions, or
+            index set of the bulk points.
+        boundary_indices (np.ndarray | IndexSet): 2D array of boundary point
+            coordinates.
+        alpha (float): Strength of the confinement potential.
+        dl (float | np.ndarray, optional): Differential length element, either
+            a scalar or one value per boundary point. Defaults to 1.
+        max_bytes (int, optional): Memory budget of the boundary sums
+            (bytes). Defaults to `DEFAULT_MAX_BYTES`.
+
+    Returns:
+        EnergyFunction: The energy function.
+    """
+    if isinstance(bulk, IndexSet):
+        bulk = bulk.to_mask()
+    bulk = np.asarray(bulk) == 1
+    boundary_indices = np.asarray(boundary_indices).reshape(-1, 2)
+    dtype = _array_dtype(base_energy)
+
+    def energy_function(indices: np.ndarray) -> np.ndarray:
+        indices = np.asarray(indices).reshape(-1, 2)
+        points = (indices[:, 0], indices[:, 1])
+        values = base_energy[points].astype(dtype)
+        inside = bulk[points]
+        sums = calc_confinement_potentials(
+            indices[inside],
+            boundary_indices,
+            dl=dl,
+            max_bytes=max_bytes,
+            dtype=dtype,
+        )
+        values[inside] += sums * alpha / 2
+        return values
+
+    return energy_function
+
+
+@dataclass
+class AdaptiveEdge:
+    """
+    Edge found on an adaptively refined grid.
+
+    Attributes:
+        energy (np.ndarray): 2D energy array, exact at the evaluated points
+            and bilinearly interpolated elsewhere.
+        edge (np.ndarray): Edge of `energy`, as `find_edge` returns it.
+        exact (np.ndarray): Boolean mask of the evaluated points. Tiles
+            refined down to single pixels are evaluated completely.
+        n_evaluations (int): Number of evaluated points.
+    """
+
+    energy: np.ndarray
+    edge: np.ndarray
+    exact: np.ndarray
+    n_evaluations: int
+
+    def calc_length(
+        self,
+        pixel_x: int = 1,
+        pixel_y: int = 1,
+    ) -> float:
+        """
+        Calculate the length of the edge, see `calc_edge_length`.
+
+        Args:
+            pixel_x (int, optional): Size of a pixel in the x-direction.
+                Defaults to 1.
+            pixel_y (int, optional): Size of a pixel in the y-direction.
+                Defaults to 1.
+
+        Returns:
+            float: The calculated edge length.
+        """
+        return calc_edge_length(self.edge, pixel_x, pixel_y)
+
+
+def _fill_bilinear(
+    energy: np.ndarray,
+    x0: np.ndarray,
+    x1: np.ndarray,
+    y0: np.ndarray,
+    y1: np.ndarray,
+    corners: np.ndarray,
+) -> None:
+    """
+    Interpolate the energy in tiles from their corner values, which are
+    ordered (x0, y0), (x0, y1), (x1, y0), (x1, y1).
+    """
+    sizes = np.stack([x1 - x0, y1 - y0], axis=1)
+    for w, h in np.unique(sizes, axis=0):
+        same = np.all(sizes == (w, h), axis=1)
+        u = (np.arange(w + 1) / max(w, 1))[None, :, None]
+        v = (np.arange(h + 1) / max(h, 1))[None, None, :]
+        c = corners[:, same, None, None]
+        energy[
+            x0[same, None, None] + np.arange(w + 1)[None, :, None],
+            y0[same, None, None] + np.arange(h + 1)[None, None, :],
+        ] = (
+            (c[0] * (1 - v) + c[1] * v) * (1 - u) +
+            (c[2] * (1 - v) + c[3] * v) * u
+        )
+
+
+def find_edge_adaptive(
+    energy_function: EnergyFunction,
+    shape: tuple[int, int],
+    E_F: float,
+    U_fluc: float,
+    bulk: np.ndarray | IndexSet,
+    tile: int = 16,
+    margin: float | None = None,
+) -> AdaptiveEdge:
+    """
+    Identify the edge while evaluating the energy only near it.
+
+    The energy is first evaluated at the corners of square tiles of `tile`
+    pixels, i.e. on a grid `tile` times coarser than the fine grid. A tile is
+    split into four (quadtree) if the range of its corner energies comes
+    within `margin` of the window [E_F - U_fluc, E_F + U_fluc] or if it
+    contains both bulk and non-bulk pixels, where the confinement potential
+    jumps. Tiles which are not split are bilinearly interpolated, and tiles
+    of single pixels are evaluated exactly. The edge is then found on the
+    composite energy with `find_edge`.
+
+    The result equals the edge of the fully evaluated energy as long as the
+    energy does not deviate from the bilinear interpolation of a tile by more
+    than `margin`, so choose the fine grid (M) for the edge and `tile` and
+    `margin` for the smoothness of the energy away from it.
+
+    Args:
+        energy_function (EnergyFunction): Energy at the points of the fine
+            grid, e.g. from `make_energy_function`.
+        shape (tuple[int, int]): Shape of the fine grid.
+        E_F (float): Fermi energy.
+        U_fluc (float): Energy fluctuation parameter.
+        bulk (np.ndarray | IndexSet): 2D array indicating bulk regions, or
+            index set of the bulk points.
+        tile (int, optional): Size of the coarse tiles (pixels), a power of
+            two. Defaults to 16.
+        margin (float | None, optional): Energy distance to the window
+            within which tiles are refined. None uses `U_fluc`. Defaults to
+            None.
+
+    Returns:
+        AdaptiveEdge: The edge, the composite energy and the evaluated
+            points.
+    """
+    if tile < 1 or tile & (tile - 1):
+        raise ValueError("Tile size must be a positive power of two.")
+    if isinstance(bulk, IndexSet):
+        bulk = bulk.to_mask()
+    bulk = np.asarray(bulk) == 1
+    margin = U_fluc if margin is None else margin
+    lo = E_F - U_fluc - margin
+    hi = E_F + U_fluc + margin
+    nx, ny = shape
+
+    # summed-area table counting the bulk pixels of every tile
+    bulk_counts = np.zeros((nx + 1, ny + 1), dtype=np.int64)
+    bulk_counts[1:, 1:] = bulk.cumsum(axis=0).cumsum(axis=1)
+
+    energy = None
+    exact = np.zeros(shape, dtype=bool)
+    x0, y0 = np.meshgrid(
+        np.arange(0, max(nx - 1, 1), tile),
+        np.arange(0, max(ny - 1, 1), tile),
+        indexing="ij",
+    )
+    x0 = x0.ravel()
+    y0 = y0.ravel()
+    x1 = np.minimum(x0 + tile, nx - 1)
+    y1 = np.minimum(y0 + tile, ny - 1)
+    while len(x0) > 0:
+        xs = np.stack([x0, x0, x1, x1])
+        ys = np.stack([y0, y1, y0, y1])
+        new = np.unique((xs * ny + ys)[~exact[xs, ys]])
+        if len(new) > 0:
+            points = np.stack(np.divmod(new, ny), axis=1)
+            values = energy_function(points)
+            if energy is None:
+                energy = np.empty(shape, dtype=np.result_type(values))
+            energy[points[:, 0], points[:, 1]] = values
+            exact[points[:, 0], points[:, 1]] = True
+        corners = energy[xs, ys]
+
+        n_bulk = (
+            bulk_counts[x1 + 1, y1 + 1] - bulk_counts[x0, y1 + 1] -
+            bulk_counts[x1 + 1, y0] + bulk_counts[x0, y0]
+        )
+        area = (x1 - x0 + 1) * (y1 - y0 + 1)
+        near = (corners.min(axis=0) <= hi) & (corners.max(axis=0) >= lo)
+        mixed = (n_bulk > 0) & (n_bulk < area)
+        single = (x1 - x0 <= 1) & (y1 - y0 <= 1)
+        refine = (near | mixed) & ~single
+
+        # the interpolation reproduces the corners, so the shared corners
+        # keep their exact values
+        smooth = ~refine & ~single
+        _fill_bilinear(
+            energy,
+            x0[smooth],
+            x1[smooth],
+            y0[smooth],
+            y1[smooth],
+            corners[:, smooth],
+        )
+
+        x0, x1, y0, y1 = (a[refine] for a in (x0, x1, y0, y1))
+        xm = (x0 + x1) // 2
+        ym = (y0 + y1) // 2
+        children = []
+        for cx0, cx1 in ((x0, xm), (xm, x1)):
+            for cy0, cy1 in ((y0, ym), (ym, y1)):
+                valid = (cx1 > cx0) | (x1 == x0)
+                valid &= (cy1 > cy0) | (y1 == y0)
+                children.append(
+                    (cx0[valid], cx1[valid], cy0[valid], cy1[valid])
+                )
+        x0, x1, y0, y1 = (
+            np.concatenate([child[i] for child in children])
+            for i in range(4)
+        )
+
+    return AdaptiveEdge(
+        energy=energy,
+        edge=find_edge(energy, E_F, U_fluc, bulk),
+        exact=exact,
+        n_evaluations=int(exact.sum()),
+    )
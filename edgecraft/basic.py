@@ -1,5 +1,18 @@
+import warnings
+
 import numpy as np
 
+from .cache import ConfinementCache
+from .confinement import (  # noqa: F401
+    calc_confinement_potential_at,
+    calc_confinement_sums,
+    DEFAULT_MAX_BYTES,
+    DEFAULT_TOLERANCE,
+)
+from .indexset import IndexSet
+from .instrument import stage
+from .precision import _array_dtype, resolve_dtype
+
 
 def true_circle_in(
     Y: np.ndarray,
@@ -25,85 +38,289 @@ def true_circle_in(
     return (X - x0)**2 + (Y - y0)**2 <= radius**2
 
 
-def calc_confinement_potential_at(
-    bulk_index: np.ndarray,
-    boundary_indices: np.ndarray,
-    dl: float = 1,
-) -> float:
+def _add_at_points(
+    energy: np.ndarray,
+    points: np.ndarray | IndexSet,
+    values: np.ndarray,
+) -> None:
     """
-    Calculate the confinement potential at a given bulk index due to all
-    boundary indices.
-
-    Args:
-        bulk_index (np.ndarray): 1D array with the coordinates of the bulk
-            point.
-        boundary_indices (np.ndarray): 2D array of boundary point coordinates.
-        dl (float, optional): Differential length element. Defaults to 1.
-
-    Returns:
-        float: The calculated confinement potential at the bulk index.
+    Add one value per point of an (N, 2) index array, or per point of an
+    index set in row-major order, to the energy array in place.
+    """
+    if isinstance(points, IndexSet):
+        # one slice per run, without expanding the points
+        offset = 0
+        for row, start, stop in zip(
+            points.rows.tolist(),
+            points.starts.tolist(),
+            points.stops.tolist(),
+        ):
+            energy[row, start:stop] += values[offset:offset + stop - start]
+            offset += stop - start
+        return
+    np.add.at(energy, (points[:, 0], points[:, 1]), values)
+
+
+def _check_finite_sums(sums: np.ndarray) -> None:
+    """
+    Warn if confinement sums overflowed, which happens in float32 where a
+    bulk point is also a boundary point.
     """
-    potential_density = (
-        (bulk_index[0] - boundary_indices[:, 0] + 1e-20)**2 +
-        (bulk_index[1] - boundary_indices[:, 1] + 1e-20)**2
-    )**(-3 / 2) * dl
-    return np.sum(potential_density)
+    overflow = np.count_nonzero(~np.isfinite(sums))
+    if overflow:
+        warnings.warn(
+            f"The confinement sums of {overflow} bulk point(s) overflow "
+            f"{sums.dtype.name}, e.g. where a bulk point is also a boundary "
+            "point. Use float64 precision or disjoint bulk and boundary "
+            "points.",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+
+
+def _load_or_calc_sums(
+    shape: tuple[int, int],
+    bulk_indices: np.ndarray | IndexSet,
+    boundary_indices: np.ndarray | IndexSet,
+    dl: float | np.ndarray,
+    engine: str,
+    max_bytes: int,
+    tolerance: float,
+    dtype: np.dtype,
+    cache: ConfinementCache | None,
+) -> np.ndarray:
+    """
+    Look the confinement sums up in the cache, or calculate them and store
+    them to the cache.
+    """
+    if cache is not None:
+        key = cache.make_key(
+            shape,
+            bulk_indices,
+            boundary_indices,
+            dl,
+            engine,
+            tolerance=tolerance if engine == "tree" else None,
+            dtype=None if dtype == np.float64 else dtype.name,
+        )
+        sums = cache.load(key)
+        if sums is not None:
+            return sums
+    sums = calc_confinement_sums(
+        shape,
+        bulk_indices,
+        boundary_indices,
+        dl=dl,
+        engine=engine,
+        max_bytes=max_bytes,
+        tolerance=tolerance,
+        dtype=dtype,
+    )
+    if cache is not None:
+        cache.save(key, sums)
+    return sums
 
 
 def apply_confinement_potential(
     energy: np.ndarray,
-    bulk_indices: np.ndarray,
-    boundary_indices: np.ndarray,
+    bulk_indices: np.ndarray | IndexSet,
+    boundary_indices: np.ndarray | IndexSet,
     alpha: float,
-    dl: float = 1,
+    dl: float | np.ndarray = 1,
+    engine: str = "loop",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    tolerance: float = DEFAULT_TOLERANCE,
+    cache: ConfinementCache | None = None,
+    sums: np.ndarray | None = None,
 ) -> np.ndarray:
     """
-    Add a constant potential value to specified indices in the energy array.
+    Add the confinement potential due to the sample boundary to the bulk
+    indices in the energy array.
+
+    The boundary sums are computed in the floating point type of `energy`, so
+    a float32 energy array runs the engines in single precision. A bulk
+    point which is also a boundary point overflows the "loop" and "tiled"
+    sums in single precision, which raises a RuntimeWarning.
 
     Args:
         energy (np.ndarray): 2D array of energy values to modify.
-        val (float): Value to add.
-        space_indices (np.ndarray): 2D array of indices where the value should
-            be added.
+        bulk_indices (np.ndarray | IndexSet): 2D array of bulk point
+            coordinates, or index set of the bulk points, which is not
+            expanded into an index array.
+        boundary_indices (np.ndarray | IndexSet): 2D array of boundary point
+            coordinates, or index set of the boundary points.
+        alpha (float): Strength of the confinement potential.
+        dl (float | np.ndarray, optional): Differential length element, either
+            a scalar or one value per boundary point. Defaults to 1.
+        engine (str, optional): Engine evaluating the boundary sum, one of
+            `edgecraft.confinement.CONFINEMENT_ENGINES`. See
+            `calc_confinement_sums` for their accuracy. Defaults to "loop".
+        max_bytes (int, optional): Memory budget of the "tiled" and "tree"
+            engines (bytes). Defaults to `DEFAULT_MAX_BYTES`.
+        tolerance (float, optional): Relative error tolerance of the "tree"
+            engine. Use `calc_confinement_potentials_tree` directly to obtain
+            the achieved error estimate. Defaults to `DEFAULT_TOLERANCE`.
+        cache (ConfinementCache | None, optional): On-disk cache to look the
+            boundary sums up in and to store them to. Defaults to None.
+        sums (np.ndarray | None, optional): Precomputed boundary sums at the
+            bulk points, e.g. `Sample.confinement_sums` shared by the points
+            of a scan, which skips the engine and the cache. Defaults to
+            None.
 
     Returns:
         np.ndarray: The modified energy array.
     """
-    for bulk_index in bulk_indices:
-        energy[bulk_index[0], bulk_index[1]] += calc_confinement_potential_at(
-            bulk_index,
-            boundary_indices,
-            dl=dl,
-        ) * alpha / 2
+    if not isinstance(bulk_indices, IndexSet):
+        bulk_indices = np.asarray(bulk_indices).reshape(-1, 2)
+    if not isinstance(boundary_indices, IndexSet):
+        boundary_indices = np.asarray(boundary_indices).reshape(-1, 2)
+    dtype = _array_dtype(energy)
+
+    if sums is None:
+        with stage("confinement", len(bulk_indices)):
+            sums = _load_or_calc_sums(
+                energy.shape,
+                bulk_indices,
+                boundary_indices,
+                dl,
+                engine,
+                max_bytes,
+                tolerance,
+                dtype,
+                cache,
+            )
+    elif len(sums) != len(bulk_indices):
+        raise ValueError(
+            f"Got {len(sums)} confinement sums for {len(bulk_indices)} bulk "
+            "points."
+        )
+    _check_finite_sums(sums)
+
+    with stage("potential", len(bulk_indices)):
+        _add_at_points(energy, bulk_indices, sums * alpha / 2)
     return energy
 
 
+def _add_constant(
+    energy: np.ndarray,
+    val: float | np.ndarray,
+    space: np.ndarray | IndexSet,
+) -> np.ndarray:
+    """
+    Add a value at the points of a mask, an (N, 2) index array or an index
+    set, in place for a scalar value and into a new stack of frames for a 1D
+    array of values.
+
+    An array of the shape of `energy` is a mask of its non-zero points, so
+    0/1 integer masks work like boolean ones. Other arrays must have a last
+    dimension of 2.
+    """
+    val = np.asarray(val)
+    if isinstance(space, IndexSet):
+        if space.shape != energy.shape:
+            raise ValueError(
+                f"Index set of shape {space.shape} does not match the energy "
+                f"array of shape {energy.shape}."
+            )
+        if val.ndim == 0:
+            frames = energy
+        else:
+            frames = np.repeat(energy[None], len(val), axis=0)
+            val = val[:, None]
+        # one slice per run, without expanding the points
+        for row, start, stop in zip(space.rows, space.starts, space.stops):
+            frames[..., row, start:stop] += val
+        return frames
+
+    space = np.asarray(space)
+    is_mask = space.shape == energy.shape
+    if is_mask and space.dtype != bool and space.shape[-1] == 2:
+        raise ValueError(
+            f"Array of shape {space.shape} is ambiguous for an energy array "
+            f"of shape {energy.shape}. Pass a boolean mask or an IndexSet."
+        )
+    if is_mask:
+        index = space != 0
+    elif space.dtype == bool:
+        raise ValueError(
+            f"Mask of shape {space.shape} does not match the energy "
+            f"array of shape {energy.shape}."
+        )
+    elif space.ndim in (1, 2) and space.shape[-1] == 2:
+        space = space.reshape(-1, 2)
+        index = (space[:, 0], space[:, 1])
+    else:
+        raise ValueError(
+            f"Array of shape {space.shape} is neither a mask of the shape "
+            f"{energy.shape} of the energy array nor an (N, 2) index array."
+        )
+
+    if val.ndim == 0:
+        if is_mask:
+            energy[index] += val
+        else:
+            np.add.at(energy, index, val)
+        return energy
+
+    frames = np.repeat(energy[None], len(val), axis=0)
+    if is_mask:
+        frames[:, index] += val[:, None]
+    else:
+        np.add.at(frames, (slice(None), *index), val[:, None])
+    return frames
+
+
 def apply_local_constant_potential(
     energy: np.ndarray,
-    val: float,
-    space_indices: np.ndarray,
+    val: float | np.ndarray,
+    space_indices: np.ndarray | IndexSet,
 ) -> np.ndarray:
     """
-    Add a quantum Hall energy value to specified bulk indices in the energy
-    array.
+    Add a constant potential value to specified points in the energy array.
+
+    Args:
+        energy (np.ndarray): 2D array of energy values to modify.
+        val (float | np.ndarray): Value to add, or 1D array of values to
+            build a stack of shifted frames from.
+        space_indices (np.ndarray | IndexSet): 2D array of indices where the
+            value should be added, 2D mask of the shape of `energy`, or
+            index set.
+
+    Returns:
+        np.ndarray: The modified energy array for a scalar value, or a new
+            3D array of shape (len(val), nx, ny) for an array of values.
+    """
+    with stage("potential", np.size(energy) * np.size(val)):
+        return _add_constant(energy, val, space_indices)
+
+
+def apply_label_potential(
+    energy: np.ndarray,
+    labels: np.ndarray,
+    table: np.ndarray,
+) -> np.ndarray:
+    """
+    Add a potential value per label to the energy array in a single gather.
 
     Args:
         energy (np.ndarray): 2D array of energy values to modify.
-        QH_energy (np.ndarray): Value to add at each bulk index.
-        bulk_indices (np.ndarray): 2D array of bulk point coordinates.
+        labels (np.ndarray): 2D integer label map of the shape of `energy`,
+            e.g. `SampleLayout.labels`.
+        table (np.ndarray): 1D array with the value to add for each label,
+            e.g. from `SampleLayout.potential_table`.
 
     Returns:
         np.ndarray: The modified energy array.
     """
-    for x_gate, y_gate in space_indices:
-        energy[x_gate, y_gate] += val
+    with stage("potential", energy.size):
+        energy += np.take(np.asarray(table, dtype=energy.dtype), labels)
     return energy
 
 
 def apply_QH_energy(
     energy: np.ndarray,
-    QH_energy: np.ndarray,
-    bulk_indices: np.ndarray,
+    QH_energy: float | np.ndarray,
+    bulk_indices: np.ndarray | IndexSet,
 ) -> np.ndarray:
     """
     Add a quantum Hall energy value to specified bulk indices in the energy
@@ -111,58 +328,145 @@ def apply_QH_energy(
 
     Args:
         energy (np.ndarray): 2D array of energy values to modify.
-        QH_energy (np.ndarray): Value to add at each bulk index.
-        bulk_indices (np.ndarray): 2D array of bulk point coordinates.
+        QH_energy (float | np.ndarray): Value to add at each bulk index, or
+            1D array of values to build a stack of shifted frames from.
+        bulk_indices (np.ndarray | IndexSet): 2D array of bulk point
+            coordinates, 2D mask of the shape of `energy`, or index set.
 
     Returns:
-        np.ndarray: The modified energy array.
+        np.ndarray: The modified energy array for a scalar value, or a new
+            3D array of shape (len(QH_energy), nx, ny) for an array of
+            values.
     """
-    for x_bulk, y_bulk in bulk_indices:
-        energy[x_bulk, y_bulk] += QH_energy
-    return energy
+    with stage("potential", np.size(energy) * np.size(QH_energy)):
+        return _add_constant(energy, QH_energy, bulk_indices)
 
 
 def find_edge(
     energy: np.ndarray,
     E_F: float,
     U_fluc: float,
-    bulk: np.ndarray,
+    bulk: np.ndarray | IndexSet,
 ) -> np.ndarray:
     """
     Identify the edge region in the energy array based on Fermi energy and
     fluctuations.
 
+    A row without any energy in the window [E_F - U_fluc, E_F + U_fluc] takes
+    its first bulk point whose energy is not above E_F + U_fluc as the edge.
+
     Args:
-        energy (np.ndarray): 2D array of energy values.
+        energy (np.ndarray): 2D array of energy values, or 3D stack of them
+            with the frame along the first axis.
         E_F (float): Fermi energy.
         U_fluc (float): Energy fluctuation parameter.
-        bulk (np.ndarray): 2D array indicating bulk regions.
+        bulk (np.ndarray | IndexSet): 2D array indicating bulk regions, or
+            index set of the bulk points.
 
     Returns:
-        np.ndarray: Boolean array where 1 indicates edge points.
+        np.ndarray: Array of the shape of `energy` where 1 indicates edge
+            points.
     """
-    edge = np.zeros_like(energy)
-    upper = E_F - U_fluc <= energy
-    lower = energy <= E_F + U_fluc
-    edge[np.where(upper & lower)] = 1
+    with stage("find_edge", np.size(energy)):
+        if isinstance(bulk, IndexSet):
+            bulk = bulk.to_mask()
+        edge = np.zeros_like(energy)
+        lower = energy <= E_F + U_fluc
+        window = (E_F - U_fluc <= energy) & lower
+        edge[window] = 1
+
+        candidates = lower & (bulk == 1)
+        empty = ~window.any(axis=-1) & candidates.any(axis=-1)
+        first = candidates.argmax(axis=-1)
+        edge[(*np.nonzero(empty), first[empty])] = 1
+    return edge
 
-    # TODO
-    for index_x in range(len(edge)):
-        if np.sum(edge[index_x, :]) != 0:
-            continue
 
-        for index_y, is_lower in enumerate(lower[index_x, :]):
-            if is_lower and (bulk[index_x, index_y] == 1):
-                edge[index_x, index_y] = 1
-                break
+def _check_edge_rows(
+    empty: np.ndarray,
+    first_frame: int = 0,
+) -> None:
+    """
+    Raise a ValueError which lists every row without edge points.
+
+    Args:
+        empty (np.ndarray): 1D array, or 2D array by frame, which is True for
+            the rows without edge points.
+        first_frame (int, optional): Index of the first frame in the message.
+            Defaults to 0.
+    """
+    if not np.any(empty):
+        return
+
+    if empty.ndim == 1:
+        rows = np.flatnonzero(empty).tolist()
+        if len(rows) == 1:
+            message = f"Row {rows[0]} has no edge points."
+        else:
+            message = f"Rows {rows} have no edge points."
+    else:
+        frames, rows = np.nonzero(empty)
+        message = "Rows without edge points: " + "; ".join(
+            f"frame {frame + first_frame}: rows "
+            f"{rows[frames == frame].tolist()}"
+            for frame in np.unique(frames)
+        ) + "."
+    raise ValueError(f"{message} Please check the edge array.")
+
+
+def _calc_row_centroids(
+    edges: np.ndarray,
+    first_frame: int = 0,
+    dtype: np.dtype = np.float64,
+) -> np.ndarray:
+    """
+    Return the mean column of the edge points of every row.
+    """
+    counts = edges.sum(axis=-1, dtype=dtype)
+    _check_edge_rows(counts == 0, first_frame)
+
+    # weights of the column positions, exact for integer edge arrays
+    return (edges @ np.arange(edges.shape[-1], dtype=dtype)) / counts
+
+
+def _calc_centroid_path_length(
+    centeredge: np.ndarray,
+    pixel_x: int,
+    pixel_y: int,
+) -> np.ndarray:
+    """
+    Return the length of the path connecting the row centroids.
+    """
+    dx = (centeredge[..., :-1] - centeredge[..., 1:]) * pixel_x
+    dy = pixel_y
+
+    # since there's 1 less tangent line than pixels
+    return np.sqrt(dx**2 + dy**2).sum(axis=-1) + pixel_y
 
-    return edge
+
+def _calc_edge_lengths(
+    edges: np.ndarray,
+    pixel_x: int,
+    pixel_y: int,
+    first_frame: int = 0,
+    dtype: np.dtype = np.float64,
+) -> np.ndarray:
+    """
+    Return the centroid path length of every edge, timed as a stage.
+    """
+    with stage("edge_length", edges.size):
+        return _calc_centroid_path_length(
+            _calc_row_centroids(edges, first_frame, dtype),
+            pixel_x,
+            pixel_y,
+        )
 
 
 def calc_edge_length(
     edge: np.ndarray,
     pixel_x: int = 1,
     pixel_y: int = 1,
+    dtype: np.dtype | str = np.float64,
 ) -> float:
     """
     Calculate the total length of the edge by connecting edge points row by
@@ -174,28 +478,63 @@ def calc_edge_length(
             Defaults to 1.
         pixel_y (int, optional): Size of a pixel in the y-direction.
             Defaults to 1.
+        dtype (np.dtype | str, optional): Floating point type of the
+            centroids and the path length. Defaults to np.float64.
 
     Returns:
         float: The calculated edge length.
+
+    Raises:
+        ValueError: If any row has no edge points. The message lists all of
+            them.
     """
-    # At each row, find all the pixels that are in the edge
-    centeredge = np.zeros(len(edge))
-    for y in range(len(edge)):
-        if np.sum(edge[y]) == 0:
-            raise ValueError(
-                f"Row {y} has no edge points. Please check the edge array."
-            )
+    return float(
+        _calc_edge_lengths(
+            np.asarray(edge),
+            pixel_x,
+            pixel_y,
+            dtype=resolve_dtype(dtype),
+        )
+    )
+
+
+def calc_edge_lengths(
+    edges: np.ndarray,
+    pixel_x: int = 1,
+    pixel_y: int = 1,
+    dtype: np.dtype | str = np.float64,
+) -> np.ndarray:
+    """
+    Calculate the edge length of every frame of a stack of edge arrays.
 
-        # Take the average of the edge points in this row
-        for x in range(len(edge[y])):
-            centeredge[y] += x * edge[y, x]
-        centeredge[y] /= np.sum(edge[y])
+    Args:
+        edges (np.ndarray): 3D array of shape (n_frames, nx, ny) where edge
+            points are marked as 1.
+        pixel_x (int, optional): Size of a pixel in the x-direction.
+            Defaults to 1.
+        pixel_y (int, optional): Size of a pixel in the y-direction.
+            Defaults to 1.
+        dtype (np.dtype | str, optional): Floating point type of the
+            centroids and the path lengths. Defaults to np.float64.
 
-    dx = (centeredge[:-1] - centeredge[1:]) * pixel_x
-    dy = pixel_y
+    Returns:
+        np.ndarray: 1D array with the edge length of each frame.
 
-    # since there's 1 less tangent line than pixels
-    return np.sqrt(dx**2 + dy**2).sum() + pixel_y
+    Raises:
+        ValueError: If any row of any frame has no edge points. The message
+            lists all of them by frame.
+    """
+    edges = np.asarray(edges)
+    if edges.ndim != 3:
+        raise ValueError(
+            "Edges must be a 3D array of shape (n_frames, nx, ny)."
+        )
+    return _calc_edge_lengths(
+        edges,
+        pixel_x,
+        pixel_y,
+        dtype=resolve_dtype(dtype),
+    )
 
 
 def calc_scale_factor(
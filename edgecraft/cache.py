@@ -0,0 +1,175 @@
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .indexset import IndexSet
+
+
+DEFAULT_CACHE_BYTES = 2**30
+"""Default size cap of a `ConfinementCache` directory (bytes)."""
+
+_HASH_CHUNK = 2**16
+"""Points of an index set hashed at a time."""
+
+
+class ConfinementCache:
+    """
+    Content-addressed on-disk cache of confinement sums.
+
+    Every entry holds the boundary sum of r^-3 at the bulk indices, which does
+    not depend on `alpha`, as a .npy file named after the hash of its inputs.
+    When the files exceed `max_bytes`, the least recently used ones are
+    removed.
+
+    Attributes:
+        directory (Path): Directory holding the cache files.
+        max_bytes (int): Size cap of the cache files (bytes).
+        hits (int): Number of lookups which found an entry.
+        misses (int): Number of lookups which found no entry.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+    ) -> None:
+        """
+        Args:
+            directory (str | os.PathLike): Directory holding the cache files.
+                It is created if it does not exist.
+            max_bytes (int, optional): Size cap of the cache files (bytes).
+                Defaults to `DEFAULT_CACHE_BYTES`.
+        """
+        if max_bytes < 0:
+            raise ValueError("Size cap must be non-negative.")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        shape: tuple[int, int],
+        bulk_indices: np.ndarray | IndexSet,
+        boundary_indices: np.ndarray | IndexSet,
+        dl: float | np.ndarray,
+        engine: str,
+        tolerance: float | None = None,
+        dtype: str | None = None,
+    ) -> str:
+        """
+        Return the key of the confinement sums of the given inputs.
+
+        Args:
+            shape (tuple[int, int]): Shape of the space grid.
+            bulk_indices (np.ndarray | IndexSet): 2D array of bulk point
+                coordinates, or index set of the bulk points.
+            boundary_indices (np.ndarray | IndexSet): 2D array of boundary
+                point coordinates, or index set of the boundary points.
+            dl (float | np.ndarray): Differential length element.
+            engine (str): Engine evaluating the sums.
+            tolerance (float | None, optional): Relative error tolerance of
+                approximate engines. Defaults to None.
+            dtype (str | None, optional): Name of the floating point type of
+                the sums if it is not float64. Defaults to None.
+
+        Returns:
+            str: Hexadecimal SHA-256 digest of the inputs.
+        """
+        digest = hashlib.sha256()
+        params = (tuple(shape), engine, tolerance)
+        if dtype is not None:
+            params += (dtype,)
+        digest.update(repr(params).encode())
+        for indices in (bulk_indices, boundary_indices):
+            # an index set hashes like the index array of its points
+            if isinstance(indices, IndexSet):
+                chunks = indices.chunks(_HASH_CHUNK)
+            else:
+                chunks = [indices]
+            for array in chunks:
+                array = np.ascontiguousarray(array, dtype=np.int64)
+                digest.update(array.reshape(-1, 2).tobytes())
+        digest.update(np.ascontiguousarray(dl, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.npy"
+
+    def load(self, key: str) -> np.ndarray | None:
+        """
+        Return the entry of the key, or None if it is not cached.
+
+        Args:
+            key (str): Key returned by `make_key`.
+
+        Returns:
+            np.ndarray | None: The cached confinement sums.
+        """
+        path = self._path(key)
+        try:
+            sums = np.load(path)
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+
+        # the modification time orders the entries for the eviction
+        os.utime(path)
+        self.hits += 1
+        return sums
+
+    def save(self, key: str, sums: np.ndarray) -> None:
+        """
+        Store an entry and evict the least recently used entries beyond the
+        size cap.
+
+        Args:
+            key (str): Key returned by `make_key`.
+            sums (np.ndarray): Confinement sums to store.
+        """
+        path = self._path(key)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, sums)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache fits in
+        `max_bytes`.
+        """
+        entries = []
+        for path in self.directory.glob("*.npy"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the counters and the current size of the cache.
+
+        Returns:
+            dict[str, int]: Numbers of hits, misses and entries, and the size
+                of the entries (bytes).
+        """
+        sizes = [path.stat().st_size for path in self.directory.glob("*.npy")]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(sizes),
+            "bytes": sum(sizes),
+        }
@@ -0,0 +1,470 @@
+import cProfile
+import itertools
+import pstats
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import click
+import numpy as np
+
+from .cache import ConfinementCache
+from .confinement import CONFINEMENT_ENGINES
+from .config import LAYOUT_KEYS, Sample, load_config, set_config_value
+from .geometry import SampleLayout
+from .instrument import Progress, instrument, stage
+from .precision import PRECISIONS
+from .scan import scan as run_scan
+from .store import SweepReader, SweepWriter
+from .sweep import sweep_gate
+
+
+def _make_sample(
+    config: dict[str, Any],
+    engine: str,
+    precision: str,
+    cache_dir: str | None,
+) -> Sample:
+    cache = None if cache_dir is None else ConfinementCache(cache_dir)
+    return Sample(config, engine=engine, precision=precision, cache=cache)
+
+
+def _echo_progress(unit: str, progress: Progress) -> None:
+    """
+    Print the progress of a sweep or a scan on one line of stderr.
+    """
+    click.echo(
+        f"\r{progress.done}/{progress.total} {unit} "
+        f"({progress.rate:.1f} {unit}/s, ETA {progress.eta:.0f} s)",
+        err=True,
+        nl=progress.done == progress.total,
+    )
+
+
+def _changes_layout(key: str) -> bool:
+    """
+    Return whether a config key changes the layout or the confinement sums.
+    """
+    return any(
+        key == layout_key or
+        key.startswith(f"{layout_key}.") or
+        layout_key.startswith(f"{key}.")
+        for layout_key in LAYOUT_KEYS
+    )
+
+
+def _share_layout(sample: Sample) -> dict[str, np.ndarray]:
+    """
+    Return the label map, the gate masks and the confinement sums of a
+    sample as arrays for the points of a scan.
+    """
+    shared = {
+        "labels": sample.layout.labels,
+        "confinement_sums": sample.confinement_sums,
+    }
+    for name, gate in sample.layout.gates.items():
+        shared[f"gate.{name}"] = gate
+    return shared
+
+
+def _scan_point(
+    config: dict[str, Any],
+    engine: str,
+    precision: str,
+    cache_dir: str | None,
+    params: dict[str, Any],
+    shared: dict[str, np.ndarray],
+) -> dict[str, Any]:
+    """
+    Run the sweep of a config with the parameters of one scan point, reusing
+    the layout and the confinement sums of the shared arrays if given.
+    """
+    for key, value in params.items():
+        config = set_config_value(config, key, value)
+    sample = _make_sample(config, engine, precision, cache_dir)
+    if shared:
+        sample.layout = SampleLayout(
+            shared["labels"],
+            tuple(name for name, _ in sample.geometry.regions),
+            {
+                name.removeprefix("gate."): gate
+                for name, gate in shared.items()
+                if name.startswith("gate.")
+            },
+        )
+        sample.confinement_sums = shared["confinement_sums"]
+    edge_lengths = sweep_gate(
+        sample.energy,
+        sample.gate,
+        sample.voltages,
+        sample.E_F,
+        sample.U_fluc,
+        sample.layout.bulk,
+        incremental=True,
+    )
+    return {
+        "E_F": sample.E_F,
+        "voltages": sample.voltages,
+        "edge_lengths": edge_lengths,
+    }
+
+
+@click.group()
+@click.option(
+    "--workers",
+    type=int,
+    default=None,
+    help=(
+        "Worker processes of scans and renders, 0 for none. Defaults to the "
+        "CPUs."
+    ),
+)
+@click.option(
+    "--engine",
+    type=click.Choice(CONFINEMENT_ENGINES),
+    default="tiled",
+    show_default=True,
+    help="Engine of the confinement potential.",
+)
+@click.option(
+    "--precision",
+    type=click.Choice(PRECISIONS),
+    default="float64",
+    show_default=True,
+    help="Floating point precision of the energy and the sweep.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory caching the confinement sums between runs.",
+)
+@click.option(
+    "--profile",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Profile the command and write the statistics to this file.",
+)
+@click.option(
+    "--report",
+    is_flag=True,
+    help="Print the time, calls and pixel rate of every stage to stderr.",
+)
+@click.option(
+    "--trace-memory",
+    is_flag=True,
+    help="Add the traced peak memory of every stage to the report.",
+)
+@click.option(
+    "--progress",
+    is_flag=True,
+    help="Show the frames or points per second and the ETA on stderr.",
+)
+@click.pass_context
+def main(
+    ctx: click.Context,
+    workers: int | None,
+    engine: str,
+    precision: str,
+    cache_dir: str | None,
+    profile: str | None,
+    report: bool,
+    trace_memory: bool,
+    progress: bool,
+) -> None:
+    """Run edgecraft sweeps, scans and renders from sample configs."""
+    ctx.obj = {
+        "workers": workers,
+        "engine": engine,
+        "precision": precision,
+        "cache_dir": cache_dir,
+        "progress": progress,
+    }
+    if report or trace_memory:
+        recorder = ctx.with_resource(instrument(trace_memory))
+
+        @ctx.call_on_close
+        def print_report() -> None:
+            click.echo(recorder.format(), err=True)
+
+    if profile is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        @ctx.call_on_close
+        def print_profile() -> None:
+            profiler.disable()
+            profiler.dump_stats(profile)
+            stats = pstats.Stats(profiler, stream=sys.stderr)
+            stats.sort_stats("cumulative").print_stats(20)
+
+
+@main.command()
+@click.argument("config", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(file_okay=False),
+    required=True,
+    help="Directory of the sweep store.",
+)
+@click.option(
+    "--energy/--no-energy",
+    default=False,
+    help="Store the energy of every frame as well.",
+)
+@click.option(
+    "--checkpoint-every",
+    type=int,
+    default=1000,
+    show_default=True,
+    help="Frames between two checkpoints.",
+)
+@click.option(
+    "--resume/--no-resume",
+    default=True,
+    help="Resume from the checkpoint of a previous run.",
+)
+@click.pass_obj
+def sweep(
+    options: dict[str, Any],
+    config: str,
+    output: str,
+    energy: bool,
+    checkpoint_every: int,
+    resume: bool,
+) -> None:
+    """Run the gate sweep of CONFIG into a sweep store."""
+    if options["workers"] is not None:
+        raise click.UsageError(
+            "The sweep runs in a single process, --workers only applies to "
+            "scan and render."
+        )
+    config = load_config(config)
+    sample = _make_sample(
+        config,
+        options["engine"],
+        options["precision"],
+        options["cache_dir"],
+    )
+    output = Path(output)
+    checkpoint = output / "checkpoint.npz"
+    if not resume:
+        checkpoint.unlink(missing_ok=True)
+    resuming = checkpoint.exists()
+    writer = SweepWriter(
+        output,
+        sample.layout.shape,
+        energy_dtype=sample.dtype if energy else None,
+        params={
+            "config": config,
+            "engine": options["engine"],
+            "precision": options["precision"],
+            "E_F": sample.E_F,
+            "U_fluc": sample.U_fluc,
+            "l_0": sample.l_0,
+        },
+        resume=resume,
+    )
+    with writer:
+        try:
+            edge_lengths = sweep_gate(
+                sample.energy,
+                sample.gate,
+                sample.voltages,
+                sample.E_F,
+                sample.U_fluc,
+                sample.layout.bulk,
+                writer=writer,
+                checkpoint=checkpoint,
+                checkpoint_every=checkpoint_every,
+                progress=(
+                    partial(_echo_progress, "frames")
+                    if options["progress"] else None
+                ),
+            )
+        except ValueError as error:
+            if not resuming:
+                raise
+            raise click.ClickException(
+                f"Cannot resume the sweep in {output}: {error} Pass "
+                "--no-resume to start a new sweep."
+            ) from error
+    click.echo(
+        f"Swept {len(edge_lengths)} frames into {output}: edge length "
+        f"{edge_lengths[0]:.6g} -> {edge_lengths[-1]:.6g}."
+    )
+
+
+@main.command()
+@click.argument("config", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False),
+    required=True,
+    help="File of the result table (.npy).",
+)
+@click.pass_obj
+def scan(
+    options: dict[str, Any],
+    config: str,
+    output: str,
+) -> None:
+    """
+    Run the gate sweep of CONFIG at every point of its "scan" section.
+
+    The "scan" section maps dotted config keys, e.g. "physics.alpha", to
+    lists of values. All combinations of the values are run. If no key
+    changes the geometry, the layout and the confinement sums are computed
+    once and shared with the workers.
+    """
+    config = load_config(config)
+    parameters = config.get("scan", {})
+    if not parameters:
+        raise click.UsageError("Config has no 'scan' section.")
+    keys = list(parameters)
+    points = [
+        dict(zip(keys, values))
+        for values in itertools.product(*parameters.values())
+    ]
+    shared = None
+    if not any(_changes_layout(key) for key in keys):
+        shared = _share_layout(
+            _make_sample(
+                config,
+                options["engine"],
+                options["precision"],
+                options["cache_dir"],
+            )
+        )
+    table = run_scan(
+        partial(
+            _scan_point,
+            config,
+            options["engine"],
+            options["precision"],
+            options["cache_dir"],
+        ),
+        points,
+        shared=shared,
+        workers=options["workers"],
+        progress=(
+            partial(_echo_progress, "points")
+            if options["progress"] else None
+        ),
+    )
+    np.save(output, table)
+    click.echo(f"Scanned {len(points)} points into {output}.")
+
+
+@main.command()
+@click.argument("source", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False),
+    required=True,
+    help="Image file, e.g. a .png.",
+)
+def render(source: str, output: str) -> None:
+    """Plot the edge length against the gate voltage of a sweep store."""
+    from matplotlib.figure import Figure
+
+    reader = SweepReader(source)
+    E_F = reader.params.get("E_F", 1.0)
+    with stage("plot"):
+        figure = Figure(figsize=(6, 4), layout="tight")
+        ax = figure.subplots()
+        ax.plot(reader.scalar("voltage") / E_F, reader.scalar("edge_length"))
+        ax.set_xlabel("Gate voltage / $E_F$")
+        ax.set_ylabel("Edge length (pixels)")
+        figure.savefig(output)
+    click.echo(f"Rendered {len(reader)} frames into {output}.")
+
+
+@main.command()
+@click.argument("source", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(),
+    required=True,
+    help="Animated .gif file, or directory of a PNG sequence.",
+)
+@click.option(
+    "--scale",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Image pixels per grid pixel.",
+)
+@click.option(
+    "--duration",
+    type=int,
+    default=100,
+    show_default=True,
+    help="Display time of a GIF frame (ms).",
+)
+@click.option(
+    "--cut-row",
+    type=int,
+    default=None,
+    help="Row of the energy cut. Defaults to the middle row.",
+)
+@click.pass_obj
+def animate(
+    options: dict[str, Any],
+    source: str,
+    output: str,
+    scale: int,
+    duration: int,
+    cut_row: int | None,
+) -> None:
+    """
+    Render the frames of a sweep store into an animated GIF or a PNG
+    sequence, in parallel and without matplotlib.
+
+    The energy map and cut are drawn if the store keeps energy snapshots,
+    e.g. from `edgecraft sweep --energy`, and the edge only otherwise.
+    """
+    from .render import (
+        FrameRenderer,
+        GifWriter,
+        PngSequenceWriter,
+        StoreFrames,
+        render_sweep,
+    )
+
+    frames = StoreFrames(source)
+    params = frames.reader.params
+    renderer = FrameRenderer(
+        E_F=params.get("E_F"),
+        U_fluc=params.get("U_fluc"),
+        cut_row=frames.reader.shape[0] // 2 if cut_row is None else cut_row,
+        scale_bar=(
+            round(10e-6 / params["l_0"]) if "l_0" in params else None
+        ),
+        scale=scale,
+    )
+    if Path(output).suffix.lower() == ".gif":
+        writer = GifWriter(output, duration=duration)
+    else:
+        writer = PngSequenceWriter(output)
+    with writer:
+        n_frames = render_sweep(
+            frames,
+            writer,
+            renderer,
+            workers=options["workers"],
+            progress=(
+                partial(_echo_progress, "frames")
+                if options["progress"] else None
+            ),
+        )
+    click.echo(f"Rendered {n_frames} frames into {output}.")
+
+
+if __name__ == "__main__":
+    main()
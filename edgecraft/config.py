@@ -0,0 +1,372 @@
+import copy
+import json
+import os
+from collections.abc import Mapping, Sequence
+from functools import cached_property, reduce
+from typing import Any
+
+import numpy as np
+
+from .basic import (
+    _load_or_calc_sums,
+    apply_confinement_potential,
+    apply_label_potential,
+)
+from .cache import ConfinementCache
+from .confinement import DEFAULT_MAX_BYTES, DEFAULT_TOLERANCE
+from .const import (
+    calc_Landau_level_gap,
+    calc_magneticfield_for_nu,
+    calc_thermal_energy,
+    calc_unit_length_energy,
+    e,
+)
+from .geometry import (
+    Annulus,
+    Disk,
+    HalfPlane,
+    Rectangle,
+    Region,
+    SampleGeometry,
+    SampleLayout,
+)
+from .indexset import IndexSet
+from .instrument import stage
+from .precision import resolve_dtype
+
+
+DEFAULT_PHYSICS = {
+    "density": 1e15,
+    "filling": 1,
+    "temperature": 40e-3,
+    "M": 20,
+    "disorder": 60e-6,
+    "alpha": 1e3,
+    "fermi_level": 0.5,
+    "qh_energy": 0.5,
+}
+"""
+Default physical parameters of a sample config: electron density (m^-2),
+filling factor, temperature (K), resolution M, disorder potential (eV),
+confinement strength, Fermi energy as a fraction of the Landau level gap and
+quantum Hall energy as a fraction of the Fermi energy.
+"""
+
+DEFAULT_SWEEP = {
+    "gate": "gate",
+    "start": 0.0,
+    "stop": 1.0,
+    "frames": 101,
+}
+"""
+Default gate sweep of a sample config: name of the gate, first and last
+voltage in units of the Fermi energy, and number of frames.
+"""
+
+LAYOUT_KEYS = (
+    "physics.density",
+    "physics.filling",
+    "physics.M",
+    "sample.size",
+    "sample.space",
+    "sample.regions",
+    "sample.gates",
+)
+"""
+Config keys which the layout and the confinement sums of a `Sample` depend
+on. Samples whose configs differ in other keys only, e.g. "physics.alpha" or
+"sample.potentials", can share them.
+"""
+
+_REGION_LENGTHS = {
+    "disk": (Disk, ("x0", "y0", "radius")),
+    "annulus": (Annulus, ("x0", "y0", "outer", "inner")),
+    "rectangle": (Rectangle, ("x_min", "x_max", "y_min", "y_max")),
+}
+
+_REGION_OPERATORS = {
+    "union": lambda first, second: first | second,
+    "intersection": lambda first, second: first & second,
+    "difference": lambda first, second: first - second,
+}
+
+
+def _to_pixels(length: float | Sequence[float], unit_length: float) -> int:
+    """
+    Convert a length, or a list of lengths to add, to whole pixels,
+    truncating every length towards zero.
+    """
+    if isinstance(length, Sequence):
+        return sum(int(value / unit_length) for value in length)
+    return int(length / unit_length)
+
+
+def make_region(spec: Mapping[str, Any], unit_length: float) -> Region:
+    """
+    Build a region from its config entry.
+
+    An entry has a "type" of "disk", "annulus", "rectangle", "half_plane",
+    "union", "intersection" or "difference". Shapes take the fields of the
+    region class in meters, e.g. {"type": "disk", "x0": 1e-4, "y0": 7.5e-5,
+    "radius": 5e-5}, and combinations take a list of "regions" which they
+    combine from left to right.
+
+    Every length is truncated to whole pixels, as the example scripts do. A
+    length may also be a list of lengths which are truncated one by one and
+    added, e.g. "inner": [5e-5, -2.5e-5] for a ring 25 um wide whose outer
+    radius is truncated on its own, so regions measured from each other
+    keep their pixel distances at every resolution.
+
+    Args:
+        spec (Mapping[str, Any]): Config entry of the region.
+        unit_length (float): Length of a pixel (m).
+
+    Returns:
+        Region: The region in pixel coordinates.
+    """
+    kind = spec.get("type")
+    if kind in _REGION_LENGTHS:
+        cls, fields = _REGION_LENGTHS[kind]
+        return cls(*(_to_pixels(spec[field], unit_length) for field in fields))
+    if kind == "half_plane":
+        return HalfPlane(
+            spec["axis"],
+            _to_pixels(spec["value"], unit_length),
+            spec.get("below", False),
+        )
+    if kind in _REGION_OPERATORS:
+        return reduce(
+            _REGION_OPERATORS[kind],
+            [make_region(region, unit_length) for region in spec["regions"]],
+        )
+    raise ValueError(f"Unknown region type {kind!r}.")
+
+
+def load_config(path: str | os.PathLike) -> dict[str, Any]:
+    """
+    Read a sample config from a JSON file.
+
+    Args:
+        path (str | os.PathLike): Path of the config file.
+
+    Returns:
+        dict[str, Any]: The config.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def set_config_value(
+    config: Mapping[str, Any],
+    key: str,
+    value: Any,
+) -> dict[str, Any]:
+    """
+    Return a copy of a config with one value replaced.
+
+    Args:
+        config (Mapping[str, Any]): The config.
+        key (str): Dotted path of the value, e.g. "physics.alpha" or
+            "sample.potentials.etched1".
+        value (Any): The new value.
+
+    Returns:
+        dict[str, Any]: The modified copy.
+    """
+    config = copy.deepcopy(dict(config))
+    *parents, name = key.split(".")
+    node = config
+    for parent in parents:
+        node = node.setdefault(parent, {})
+    node[name] = value
+    return config
+
+
+class Sample:
+    """
+    Sample built lazily from a config.
+
+    The config is a mapping with the sections "physics" (see
+    `DEFAULT_PHYSICS`), "sample" and "sweep" (see `DEFAULT_SWEEP`). The
+    "sample" section gives the "size" of the space in meters, the "space"
+    region, the named "regions" of the bulk and "gates" (see `make_region`),
+    and the "potentials" of the regions in units of the unit energy. The
+    layout and the energy are computed on first access.
+
+    The cached properties can be assigned, e.g. to reuse the `layout` and
+    the `confinement_sums` of a sample whose config differs only in keys
+    outside of `LAYOUT_KEYS`.
+
+    Attributes:
+        config (dict[str, Any]): The config.
+        engine (str): Engine of the confinement potential.
+        dtype (np.dtype): Floating point type of the energy.
+        cache (ConfinementCache | None): Cache of the confinement sums.
+        max_bytes (int): Memory budget of the confinement engines (bytes).
+    """
+
+    def __init__(
+        self,
+        config: Mapping[str, Any],
+        engine: str = "loop",
+        precision: str | np.dtype | None = None,
+        cache: ConfinementCache | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        """
+        Args:
+            config (Mapping[str, Any]): The config.
+            engine (str, optional): Engine of the confinement potential, see
+                `calc_confinement_sums`. Defaults to "loop".
+            precision (str | np.dtype | None, optional): Precision of the
+                energy, see `resolve_dtype`. Defaults to None.
+            cache (ConfinementCache | None, optional): Cache of the
+                confinement sums. Defaults to None.
+            max_bytes (int, optional): Memory budget of the confinement
+                engines (bytes). Defaults to `DEFAULT_MAX_BYTES`.
+        """
+        if "sample" not in config:
+            raise ValueError("Config has no 'sample' section.")
+        self.config = copy.deepcopy(dict(config))
+        self.engine = engine
+        self.dtype = resolve_dtype(precision)
+        self.cache = cache
+        self.max_bytes = max_bytes
+
+    @cached_property
+    def physics(self) -> dict[str, Any]:
+        """Physical parameters with the defaults filled in."""
+        return {**DEFAULT_PHYSICS, **self.config.get("physics", {})}
+
+    @cached_property
+    def sweep(self) -> dict[str, Any]:
+        """Sweep parameters with the defaults filled in."""
+        return {**DEFAULT_SWEEP, **self.config.get("sweep", {})}
+
+    @cached_property
+    def units(self) -> tuple[float, float]:
+        """Unit length (m) and unit energy (J)."""
+        B_0 = calc_magneticfield_for_nu(
+            self.physics["density"],
+            self.physics["filling"],
+        )
+        return calc_unit_length_energy(B_0, self.physics["M"])
+
+    @property
+    def l_0(self) -> float:
+        """Unit length (m)."""
+        return self.units[0]
+
+    @property
+    def E_0(self) -> float:
+        """Unit energy (J)."""
+        return self.units[1]
+
+    @property
+    def E_F(self) -> float:
+        """Fermi energy in units of the unit energy."""
+        B_0 = calc_magneticfield_for_nu(
+            self.physics["density"],
+            self.physics["filling"],
+        )
+        gap = calc_Landau_level_gap(B_0, self.E_0)
+        return gap * self.physics["fermi_level"]
+
+    @property
+    def E_QH(self) -> float:
+        """Quantum Hall energy in units of the unit energy."""
+        return self.E_F * self.physics["qh_energy"]
+
+    @property
+    def U_fluc(self) -> float:
+        """Energy fluctuation in units of the unit energy."""
+        return (
+            self.physics["disorder"] * e / self.E_0 +
+            calc_thermal_energy(self.physics["temperature"], self.E_0)
+        )
+
+    @cached_property
+    def geometry(self) -> SampleGeometry:
+        """Geometry of the sample in pixel coordinates."""
+        sample = self.config["sample"]
+        width, height = sample["size"]
+        return SampleGeometry(
+            shape=(int(width / self.l_0), int(height / self.l_0)),
+            space=make_region(sample["space"], self.l_0),
+            regions=[
+                (name, make_region(spec, self.l_0))
+                for name, spec in sample.get("regions", {}).items()
+            ],
+            gates=[
+                (name, make_region(spec, self.l_0))
+                for name, spec in sample.get("gates", {}).items()
+            ],
+        )
+
+    @cached_property
+    def layout(self) -> SampleLayout:
+        """Compiled label map of the sample."""
+        return self.geometry.compile()
+
+    @cached_property
+    def bulk_indices(self) -> IndexSet:
+        """Bulk points of the sample."""
+        return IndexSet.from_mask(self.layout.bulk)
+
+    @cached_property
+    def boundary_indices(self) -> IndexSet:
+        """Boundary points of the sample."""
+        return IndexSet.from_mask(self.layout.boundary)
+
+    @cached_property
+    def confinement_sums(self) -> np.ndarray:
+        """
+        Boundary sums of r^-3 at the bulk points, which do not depend on
+        alpha.
+        """
+        with stage("confinement", len(self.bulk_indices)):
+            return _load_or_calc_sums(
+                self.layout.shape,
+                self.bulk_indices,
+                self.boundary_indices,
+                1,
+                self.engine,
+                self.max_bytes,
+                DEFAULT_TOLERANCE,
+                self.dtype,
+                self.cache,
+            )
+
+    @cached_property
+    def energy(self) -> np.ndarray:
+        """Energy of the sample without gate voltage."""
+        table = self.layout.potential_table(
+            bulk=self.E_QH,
+            regions=self.config["sample"].get("potentials", {}),
+        )
+        energy = np.zeros(self.layout.shape, dtype=self.dtype)
+        energy = apply_label_potential(energy, self.layout.labels, table)
+        return apply_confinement_potential(
+            energy,
+            self.bulk_indices,
+            self.boundary_indices,
+            self.physics["alpha"],
+            sums=self.confinement_sums,
+        )
+
+    @property
+    def gate(self) -> np.ndarray:
+        """Mask of the swept gate."""
+        name = self.sweep["gate"]
+        if name not in self.layout.gates:
+            raise ValueError(f"Sample has no gate {name!r}.")
+        return self.layout.gates[name]
+
+    @property
+    def voltages(self) -> np.ndarray:
+        """Gate voltages of the sweep in units of the unit energy."""
+        return np.linspace(
+            self.sweep["start"] * self.E_F,
+            self.sweep["stop"] * self.E_F,
+            self.sweep["frames"],
+        )
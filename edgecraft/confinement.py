@@ -0,0 +1,606 @@
+from collections.abc import Iterator
+
+import numpy as np
+
+from .indexset import IndexSet
+
+
+CONFINEMENT_ENGINES = ("loop", "fft", "tiled", "tree")
+"""Names of the engines accepted by `calc_confinement_sums`."""
+
+FFT_RTOL = 1e-9
+"""
+Relative tolerance, with respect to the largest value on the grid, to which
+the FFT engine reproduces the loop engine.
+"""
+
+DEFAULT_MAX_BYTES = 2**26
+"""Default memory budget of the temporaries of the "tiled" engine (bytes)."""
+
+DEFAULT_TOLERANCE = 1e-4
+"""Default relative error tolerance of the "tree" engine."""
+
+TREE_MIN_PAIRS = 2**28
+"""
+Number of bulk-boundary pairs below which the "tree" engine falls back to the
+exact "tiled" engine, which is faster up to about that size at the default
+tolerance.
+"""
+
+_LOOP_CHUNK = 4096
+"""Bulk points expanded at a time from an index set by the "loop" engine."""
+
+
+def _as_points(indices: np.ndarray | IndexSet) -> np.ndarray | IndexSet:
+    """
+    Return an index set as is and anything else as an (N, 2) array.
+    """
+    if isinstance(indices, IndexSet):
+        return indices
+    return np.asarray(indices).reshape(-1, 2)
+
+
+def _iter_blocks(
+    indices: np.ndarray | IndexSet,
+    size: int,
+) -> Iterator[np.ndarray]:
+    """
+    Iterate over the points of an (N, 2) array or an index set in blocks of
+    at most `size` points, without expanding the whole index set.
+    """
+    if isinstance(indices, IndexSet):
+        yield from indices.chunks(size)
+        return
+    for start in range(0, len(indices), size):
+        yield indices[start:start + size]
+
+
+def calc_confinement_potential_at(
+    bulk_index: np.ndarray,
+    boundary_indices: np.ndarray | IndexSet,
+    dl: float = 1,
+) -> float:
+    """
+    Calculate the confinement potential at a given bulk index due to all
+    boundary indices.
+
+    Args:
+        bulk_index (np.ndarray): 1D array with the coordinates of the bulk
+            point.
+        boundary_indices (np.ndarray | IndexSet): 2D array of boundary point
+            coordinates, or index set of the boundary points. An index set
+            is expanded, as the sum needs one distance per boundary point.
+        dl (float, optional): Differential length element. Defaults to 1.
+
+    Returns:
+        float: The calculated confinement potential at the bulk index.
+    """
+    if isinstance(boundary_indices, IndexSet):
+        boundary_indices = boundary_indices.to_indices()
+    potential_density = (
+        (bulk_index[0] - boundary_indices[:, 0] + 1e-20)**2 +
+        (bulk_index[1] - boundary_indices[:, 1] + 1e-20)**2
+    )**(-3 / 2) * dl
+    return np.sum(potential_density)
+
+
+def calc_confinement_potentials(
+    bulk_indices: np.ndarray | IndexSet,
+    boundary_indices: np.ndarray | IndexSet,
+    dl: float | np.ndarray = 1,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    dtype: np.dtype = np.float64,
+) -> np.ndarray:
+    """
+    Calculate the confinement potential at many bulk indices at once.
+
+    The bulk indices are processed in blocks against all boundary indices, so
+    the result equals `calc_confinement_potential_at` applied to each bulk
+    index while the temporary distance matrices stay within `max_bytes`.
+    Bulk points given as an index set are expanded block by block.
+
+    Args:
+        bulk_indices (np.ndarray | IndexSet): 2D array of bulk point
+            coordinates, or index set of the bulk points.
+        boundary_indices (np.ndarray | IndexSet): 2D array of boundary point
+            coordinates, or index set of the boundary points.
+        dl (float | np.ndarray, optional): Differential length element, either
+            a scalar or one value per boundary point. Defaults to 1.
+        max_bytes (int, optional): Memory budget of the temporaries (bytes).
+            Defaults to `DEFAULT_MAX_BYTES`.
+        dtype (np.dtype, optional): Floating point type of the computation.
+            Defaults to np.float64.
+
+    Returns:
+        np.ndarray: 1D array with the confinement potential at each bulk
+            index, in the row-major order of an index set.
+    """
+    bulk_indices = _as_points(bulk_indices)
+    boundary_indices = np.asarray(boundary_indices).reshape(-1, 2)
+    dtype = np.dtype(dtype)
+
+    # two matrices of shape (block, n_boundary) are alive at a time
+    block = max(
+        1,
+        max_bytes // (2 * dtype.itemsize * max(len(boundary_indices), 1)),
+    )
+    sums = np.empty(len(bulk_indices), dtype=dtype)
+    start = 0
+    for points in _iter_blocks(bulk_indices, block):
+        stop = start + len(points)
+        d2 = np.subtract(
+            points[:, 0, None],
+            boundary_indices[:, 0],
+            dtype=dtype,
+        )
+        d2 += 1e-20
+        d2 *= d2
+        dy = np.subtract(
+            points[:, 1, None],
+            boundary_indices[:, 1],
+            dtype=dtype,
+        )
+        dy += 1e-20
+        dy *= dy
+        d2 += dy
+        del dy
+        d2 **= -3 / 2
+        d2 *= dl
+        sums[start:stop] = np.sum(d2, axis=1)
+        start = stop
+    return sums
+
+
+def _calc_cell_moments(
+    sources: np.ndarray,
+    weights: np.ndarray,
+    level: int,
+    grid: tuple[int, int],
+) -> tuple[np.ndarray, ...]:
+    """
+    Return the total weight, the centroid, the second moments and the third
+    absolute moment about the centroid of the sources in every cell of the
+    given tree level.
+    """
+    cells = (sources[:, 0] >> level) * grid[1] + (sources[:, 1] >> level)
+    size = grid[0] * grid[1]
+    w = np.bincount(cells, weights=weights, minlength=size)
+    occupied = w != 0
+    cx = np.divide(
+        np.bincount(cells, weights=weights * sources[:, 0], minlength=size),
+        w,
+        out=np.zeros(size),
+        where=occupied,
+    )
+    cy = np.divide(
+        np.bincount(cells, weights=weights * sources[:, 1], minlength=size),
+        w,
+        out=np.zeros(size),
+        where=occupied,
+    )
+    dx = sources[:, 0] - cx[cells]
+    dy = sources[:, 1] - cy[cells]
+    mxx = np.bincount(cells, weights=weights * dx**2, minlength=size)
+    mxy = np.bincount(cells, weights=weights * dx * dy, minlength=size)
+    myy = np.bincount(cells, weights=weights * dy**2, minlength=size)
+    m3 = np.bincount(
+        cells,
+        weights=np.abs(weights) * (dx**2 + dy**2)**(3 / 2),
+        minlength=size,
+    )
+    return w, cx, cy, mxx, mxy, myy, m3
+
+
+def _calc_direct_sums(
+    targets: np.ndarray,
+    sources: np.ndarray,
+    weights: np.ndarray,
+    block: int,
+) -> np.ndarray:
+    """
+    Sum r^-3 over every source exactly, except for a source in the pixel of
+    the target itself, in blocks of targets.
+    """
+    step = max(1, block // len(sources))
+    sums = np.empty(len(targets))
+    for start in range(0, len(targets), step):
+        rx = targets[start:start + step, 0, None] - sources[:, 0]
+        ry = targets[start:start + step, 1, None] - sources[:, 1]
+        r2 = (rx**2 + ry**2).astype(np.float64)
+        r2[r2 == 0] = np.inf
+        sums[start:start + step] = r2**(-3 / 2) @ weights
+    return sums
+
+
+def _calc_tree_pass(
+    targets: np.ndarray,
+    sources: np.ndarray,
+    weights: np.ndarray,
+    radius: int,
+    block: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluate the r^-3 sum at the targets with a fixed near-field radius.
+
+    Cells of level `level` are squares of 2^level pixels. At every level, the
+    children of the cells near the parent of a target cell which are not
+    themselves near the target cell (Chebyshev distance above `radius`) are
+    evaluated by their multipole expansion about their centroids. The sources
+    near the target at level 0 are summed exactly, except for a source in the
+    pixel of the target itself. Level 0 is always evaluated, so a radius
+    covering the whole grid sums every source exactly.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The sums and an upper bound of their
+            absolute errors.
+    """
+    extent = np.maximum(targets.max(axis=0), sources.max(axis=0)) + 1
+    top = 0
+    while np.any(-(-extent // (1 << top)) > radius + 1):
+        top += 1
+
+    sums = np.zeros(len(targets))
+    errors = np.zeros(len(targets))
+    offsets = np.arange(-2 * radius, 2 * radius + 2)
+    for level in range(max(top, 1) - 1, -1, -1):
+        size = 1 << level
+        grid = (int(-(-extent[0] // size)), int(-(-extent[1] // size)))
+        w, cx, cy, mxx, mxy, myy, m3 = _calc_cell_moments(
+            sources,
+            weights,
+            level,
+            grid,
+        )
+
+        # group the targets by their cell at this level
+        target_cells = (
+            (targets[:, 0] >> level) * grid[1] + (targets[:, 1] >> level)
+        )
+        order = np.argsort(target_cells, kind="stable")
+        counts = np.bincount(target_cells, minlength=grid[0] * grid[1])
+        starts = np.cumsum(counts) - counts
+
+        # pairs of occupied source cells and occupied target cells which
+        # interact at this level
+        occupied = np.flatnonzero(w)
+        qx, qy = np.divmod(occupied, grid[1])
+        pair_sources = []
+        pair_targets = []
+        for ox in offsets:
+            tx = 2 * (qx >> 1) + ox
+            valid_x = (tx >= 0) & (tx < grid[0])
+            far_x = np.abs(tx - qx) > radius
+            for oy in offsets:
+                ty = 2 * (qy >> 1) + oy
+                valid = valid_x & (ty >= 0) & (ty < grid[1])
+                if level == 0:
+                    # every near pixel but the source pixel itself
+                    valid &= (tx != qx) | (ty != qy)
+                else:
+                    valid &= far_x | (np.abs(ty - qy) > radius)
+                cells = np.where(valid, tx * grid[1] + ty, 0)
+                valid &= counts[cells] > 0
+                pair_sources.append(occupied[valid])
+                pair_targets.append(cells[valid])
+        pair_sources = np.concatenate(pair_sources)
+        pair_targets = np.concatenate(pair_targets)
+
+        # expand the pairs to (target, source cell) evaluations in chunks
+        n = counts[pair_targets]
+        bounds = np.searchsorted(
+            np.cumsum(n),
+            np.arange(block, n.sum() + block, block),
+            side="right",
+        )
+        lo = 0
+        for hi in np.unique(np.append(bounds, len(n))):
+            if hi <= lo:
+                continue
+            chunk_n = n[lo:hi]
+            first = np.repeat(starts[pair_targets[lo:hi]], chunk_n)
+            within = np.arange(len(first)) - np.repeat(
+                np.cumsum(chunk_n) - chunk_n,
+                chunk_n,
+            )
+            t = order[first + within]
+            q = np.repeat(pair_sources[lo:hi], chunk_n)
+            rx = targets[t, 0] - cx[q]
+            ry = targets[t, 1] - cy[q]
+            r2 = rx**2 + ry**2
+            values = w[q] * r2**(-3 / 2)
+            if level > 0:
+                # quadrupole term of the expansion of r^-3 about the centroid
+                values += (
+                    7.5 * (
+                        mxx[q] * rx**2 + 2 * mxy[q] * rx * ry + myy[q] * ry**2
+                    ) / r2 - 1.5 * (mxx[q] + myy[q])
+                ) * r2**(-5 / 2)
+
+                # Taylor remainder, with 60 / r^6 bounding the third
+                # directional derivative of r^-3
+                d_min = np.maximum(
+                    radius * size + 1,
+                    np.sqrt(r2) - np.sqrt(2) * (size - 1),
+                )
+                errors += np.bincount(
+                    t,
+                    weights=10 * m3[q] / d_min**6,
+                    minlength=len(targets),
+                )
+            sums += np.bincount(t, weights=values, minlength=len(targets))
+            lo = hi
+    return sums, errors
+
+
+def calc_confinement_potentials_tree(
+    bulk_indices: np.ndarray,
+    boundary_indices: np.ndarray,
+    dl: float | np.ndarray = 1,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> tuple[np.ndarray, float]:
+    """
+    Approximate the confinement potential at many bulk indices with a tree
+    code.
+
+    The boundary points are grouped into a quadtree of cells. Cells far from
+    a bulk point, relative to their size, are replaced by their multipole
+    expansion up to the quadrupole about their centroid, and the remaining
+    boundary points are summed exactly.
+    The near-field radius is increased until the estimated relative error of
+    every bulk point is within `tolerance`, which takes O(N log N) time for
+    N bulk points. Once the near field covers the whole grid, the points are
+    summed exactly. A bulk point which is also a boundary point gets no
+    contribution from itself.
+
+    Args:
+        bulk_indices (np.ndarray | IndexSet): 2D array of bulk point
+            coordinates, or index set of the bulk points, which the tree
+            expands.
+        boundary_indices (np.ndarray | IndexSet): 2D array of boundary point
+            coordinates, or index set of the boundary points.
+        dl (float | np.ndarray, optional): Differential length element, either
+            a scalar or one value per boundary point. Defaults to 1.
+        tolerance (float, optional): Maximum estimated relative error. Must
+            be positive; use the "tiled" engine for exact sums. Defaults to
+            `DEFAULT_TOLERANCE`.
+        max_bytes (int, optional): Memory budget of the temporaries (bytes).
+            Defaults to `DEFAULT_MAX_BYTES`.
+
+    Returns:
+        tuple[np.ndarray, float]: 1D array with the confinement potential at
+            each bulk index, and the achieved estimate of the maximum
+            relative error.
+    """
+    if not tolerance > 0:
+        raise ValueError("Tolerance must be positive.")
+    targets = np.asarray(bulk_indices, dtype=np.int64).reshape(-1, 2)
+    sources = np.asarray(boundary_indices, dtype=np.int64).reshape(-1, 2)
+    weights = np.broadcast_to(
+        np.asarray(dl, dtype=np.float64),
+        len(sources),
+    ).copy()
+    if len(targets) == 0 or len(sources) == 0:
+        return np.zeros(len(targets)), 0.0
+
+    # about ten float64 temporaries per evaluation are alive at a time
+    block = max(1, max_bytes // 80)
+    extent = np.maximum(targets.max(axis=0), sources.max(axis=0)) + 1
+    radius = 2
+    while True:
+        if radius + 1 >= extent.max():
+            # the near field is the whole grid
+            return _calc_direct_sums(targets, sources, weights, block), 0.0
+        sums, errors = _calc_tree_pass(
+            targets,
+            sources,
+            weights,
+            radius,
+            block,
+        )
+        error = np.max(
+            np.divide(
+                errors,
+                np.abs(sums),
+                out=np.zeros_like(errors),
+                where=sums != 0,
+            )
+        )
+        if error <= tolerance or not np.any(errors):
+            return sums, float(error)
+
+        # the remainder falls off with the cube of the near-field radius
+        radius = max(
+            2 * radius,
+            int(np.ceil(radius * (error / tolerance)**(1 / 3))),
+        )
+
+
+def _next_fast_len(n: int) -> int:
+    """
+    Return the smallest 5-smooth integer which is not less than `n`.
+    """
+    best = 2 * n
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            p235 = p35
+            while p235 < n:
+                p235 *= 2
+            best = min(best, p235)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def _calc_confinement_sums_loop(
+    shape: tuple[int, int],
+    bulk_indices: np.ndarray | IndexSet,
+    boundary_indices: np.ndarray | IndexSet,
+    dl: float | np.ndarray,
+    dtype: np.dtype,
+) -> np.ndarray:
+    boundary_indices = np.asarray(boundary_indices).reshape(-1, 2)
+    if dtype != np.float64:
+        boundary_indices = boundary_indices.astype(dtype)
+        dl = np.asarray(dl, dtype=dtype)
+    sums = np.empty(len(bulk_indices), dtype=dtype)
+    i = 0
+    for points in _iter_blocks(bulk_indices, _LOOP_CHUNK):
+        if dtype != np.float64:
+            points = points.astype(dtype)
+        for bulk_index in points:
+            sums[i] = calc_confinement_potential_at(
+                bulk_index,
+                boundary_indices,
+                dl=dl,
+            )
+            i += 1
+    return sums
+
+
+def _calc_confinement_sums_fft(
+    shape: tuple[int, int],
+    bulk_indices: np.ndarray | IndexSet,
+    boundary_indices: np.ndarray | IndexSet,
+    dl: float | np.ndarray,
+    dtype: np.dtype,
+) -> np.ndarray:
+    nx, ny = shape
+    weights = np.zeros(shape, dtype=dtype)
+    if isinstance(boundary_indices, IndexSet):
+        # the points of a set are unique and in the row-major order of a mask
+        weights[boundary_indices.to_mask()] = np.broadcast_to(
+            dl,
+            len(boundary_indices),
+        )
+    else:
+        np.add.at(
+            weights,
+            (boundary_indices[:, 0], boundary_indices[:, 1]),
+            np.broadcast_to(dl, len(boundary_indices)),
+        )
+
+    # The kernel covers every offset between two pixels of the grid, so a
+    # padded length of at least 2n - 1 keeps the circular convolution free of
+    # wraparound.
+    px = _next_fast_len(2 * nx - 1)
+    py = _next_fast_len(2 * ny - 1)
+    dx = np.fft.fftfreq(px, 1 / px).astype(dtype)
+    dy = np.fft.fftfreq(py, 1 / py).astype(dtype)
+    r2 = dx[:, None]**2 + dy[None, :]**2
+    r2[0, 0] = np.inf
+    kernel = r2**(-3 / 2)
+
+    sums = np.fft.irfft2(
+        np.fft.rfft2(weights, s=(px, py)) * np.fft.rfft2(kernel),
+        s=(px, py),
+    )
+    if isinstance(bulk_indices, IndexSet):
+        return sums[:nx, :ny][bulk_indices.to_mask()]
+    return sums[bulk_indices[:, 0], bulk_indices[:, 1]]
+
+
+def calc_confinement_sums(
+    shape: tuple[int, int],
+    bulk_indices: np.ndarray,
+    boundary_indices: np.ndarray,
+    dl: float | np.ndarray = 1,
+    engine: str = "loop",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    tolerance: float = DEFAULT_TOLERANCE,
+    dtype: np.dtype = np.float64,
+) -> np.ndarray:
+    """
+    Calculate the boundary sum of r^-3 at every bulk index.
+
+    The "loop" engine evaluates `calc_confinement_potential_at` pixel by
+    pixel. The "fft" engine convolves the boundary mask with a zero-padded
+    r^-3 kernel and agrees with the loop engine to `FFT_RTOL` relative to the
+    largest sum on the grid. A bulk pixel which is also a boundary pixel gets
+    no contribution from itself with the "fft" engine. The "tiled" engine is
+    exact and evaluates blocks of bulk pixels at once within a memory budget
+    of `max_bytes`. The "tree" engine approximates the sum to the relative
+    error `tolerance` in O(N log N) time, see
+    `calc_confinement_potentials_tree`. Its setup only pays off on large
+    grids: at the default tolerance it breaks even with the "tiled" engine
+    at about 2-3e8 bulk-boundary pairs (about 300,000 bulk and 2,000
+    boundary points), so below `TREE_MIN_PAIRS` pairs it runs the "tiled"
+    engine instead.
+
+    Index sets are expanded only block by block by the "loop" and "tiled"
+    engines and not at all by the "fft" engine, and the sums are in the
+    row-major order of their points.
+
+    With `dtype` np.float32, the "loop", "fft" and "tiled" engines compute in
+    single precision, which halves the memory traffic. The "tree" engine
+    keeps its error bound in double precision and rounds its result.
+
+    Args:
+        shape (tuple[int, int]): Shape of the space grid.
+        bulk_indices (np.ndarray | IndexSet): 2D array of bulk point
+            coordinates, or index set of the bulk points.
+        boundary_indices (np.ndarray | IndexSet): 2D array of boundary point
+            coordinates, or index set of the boundary points.
+        dl (float | np.ndarray, optional): Differential length element, either
+            a scalar or one value per boundary point. Defaults to 1.
+        engine (str, optional): One of `CONFINEMENT_ENGINES`. Defaults to
+            "loop".
+        max_bytes (int, optional): Memory budget of the "tiled" and "tree"
+            engines (bytes). Defaults to `DEFAULT_MAX_BYTES`.
+        tolerance (float, optional): Relative error tolerance of the "tree"
+            engine. Defaults to `DEFAULT_TOLERANCE`.
+        dtype (np.dtype, optional): Floating point type of the sums, either
+            np.float64 or np.float32. Defaults to np.float64.
+
+    Returns:
+        np.ndarray: 1D array with the sum at each bulk index.
+    """
+    bulk_indices = _as_points(bulk_indices)
+    boundary_indices = _as_points(boundary_indices)
+    dtype = np.dtype(dtype)
+    if engine == "loop":
+        return _calc_confinement_sums_loop(
+            shape,
+            bulk_indices,
+            boundary_indices,
+            dl,
+            dtype,
+        )
+    if engine == "fft":
+        return _calc_confinement_sums_fft(
+            shape,
+            bulk_indices,
+            boundary_indices,
+            dl,
+            dtype,
+        )
+    if engine == "tiled":
+        return calc_confinement_potentials(
+            bulk_indices,
+            boundary_indices,
+            dl=dl,
+            max_bytes=max_bytes,
+            dtype=dtype,
+        )
+    if engine == "tree":
+        if len(bulk_indices) * len(boundary_indices) < TREE_MIN_PAIRS:
+            return calc_confinement_potentials(
+                bulk_indices,
+                boundary_indices,
+                dl=dl,
+                max_bytes=max_bytes,
+            ).astype(dtype, copy=False)
+        sums, _ = calc_confinement_potentials_tree(
+            bulk_indices,
+            boundary_indices,
+            dl=dl,
+            tolerance=tolerance,
+            max_bytes=max_bytes,
+        )
+        return sums.astype(dtype, copy=False)
+    raise ValueError(
+        f"Unknown confinement engine {engine!r}. "
+        f"Choose one of {CONFINEMENT_ENGINES}."
+    )
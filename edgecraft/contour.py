@@ -0,0 +1,223 @@
+import numpy as np
+
+from .indexset import IndexSet
+
+
+# Cell edges are numbered 0 (top, first row), 1 (right, second column),
+# 2 (bottom, second row) and 3 (left, first column). The case of a cell has
+# bit 0 for its top-left corner above the level, bit 1 for top-right, bit 2
+# for bottom-right and bit 3 for bottom-left. Cases 16 and 17 are the saddles
+# 5 and 10 with the cell center above the level.
+_SEGMENTS = np.array([
+    [[-1, -1], [-1, -1]],
+    [[3, 0], [-1, -1]],
+    [[0, 1], [-1, -1]],
+    [[3, 1], [-1, -1]],
+    [[1, 2], [-1, -1]],
+    [[3, 0], [1, 2]],
+    [[0, 2], [-1, -1]],
+    [[2, 3], [-1, -1]],
+    [[2, 3], [-1, -1]],
+    [[0, 2], [-1, -1]],
+    [[0, 1], [2, 3]],
+    [[1, 2], [-1, -1]],
+    [[3, 1], [-1, -1]],
+    [[0, 1], [-1, -1]],
+    [[3, 0], [-1, -1]],
+    [[-1, -1], [-1, -1]],
+    [[0, 1], [2, 3]],
+    [[3, 0], [1, 2]],
+])
+
+
+def _find_cell_segments(
+    energy: np.ndarray,
+    level: float,
+    mask: np.ndarray | IndexSet | None,
+) -> tuple[tuple[np.ndarray, ...], np.ndarray, np.ndarray]:
+    """
+    Return the index of every cell the isoline passes through, and the start
+    and end points of its segments relative to the cell as arrays of shape
+    (n_cells, 2 segments, 2 coordinates), NaN for missing segments.
+    """
+    above = energy > level
+    case = (
+        above[..., :-1, :-1] * 1 + above[..., :-1, 1:] * 2 +
+        above[..., 1:, 1:] * 4 + above[..., 1:, :-1] * 8
+    ).astype(np.uint8)
+    active = (case != 0) & (case != 15)
+    if mask is not None:
+        if isinstance(mask, IndexSet):
+            mask = mask.to_mask()
+        mask = np.asarray(mask, dtype=bool)
+        active &= (
+            mask[:-1, :-1] & mask[:-1, 1:] & mask[1:, 1:] & mask[1:, :-1]
+        )
+    cells = np.nonzero(active)
+    rows = cells[-2]
+    cols = cells[-1]
+    lead = cells[:-2]
+
+    a = energy[(*lead, rows, cols)]
+    b = energy[(*lead, rows, cols + 1)]
+    c = energy[(*lead, rows + 1, cols + 1)]
+    d = energy[(*lead, rows + 1, cols)]
+    case = case[cells].astype(np.intp)
+    center = (a + b + c + d) / 4 > level
+    case[(case == 5) & center] = 16
+    case[(case == 10) & center] = 17
+
+    def crossing(low, high):
+        # only evaluated where the level lies between the two values
+        span = high - low
+        return np.divide(
+            level - low,
+            span,
+            out=np.full_like(span, np.nan),
+            where=span != 0,
+        )
+
+    # row and column of the crossing on each cell edge
+    points = np.empty((len(case), 4, 2), dtype=np.result_type(energy, float))
+    points[:, 0] = np.stack([np.zeros_like(a), crossing(a, b)], axis=1)
+    points[:, 1] = np.stack([crossing(b, c), np.ones_like(a)], axis=1)
+    points[:, 2] = np.stack([np.ones_like(a), crossing(d, c)], axis=1)
+    points[:, 3] = np.stack([crossing(a, d), np.zeros_like(a)], axis=1)
+
+    edges = _SEGMENTS[case]
+    valid = edges >= 0
+    n = np.arange(len(case))[:, None]
+    starts = np.where(
+        valid[..., 0, None],
+        points[n, np.maximum(edges[..., 0], 0)],
+        np.nan,
+    )
+    ends = np.where(
+        valid[..., 1, None],
+        points[n, np.maximum(edges[..., 1], 0)],
+        np.nan,
+    )
+    return cells, starts, ends
+
+
+def find_contour(
+    energy: np.ndarray,
+    level: float,
+    mask: np.ndarray | IndexSet | None = None,
+) -> np.ndarray:
+    """
+    Extract the isoline E = level with marching squares.
+
+    The grid points are the corners of the cells, and the isoline crosses a
+    cell edge where its end values lie on different sides of the level, at
+    the linearly interpolated position. Saddle cells are resolved by the
+    mean of their corners.
+
+    Args:
+        energy (np.ndarray): 2D array of energy values.
+        level (float): Energy of the isoline, e.g. the Fermi energy.
+        mask (np.ndarray | IndexSet | None, optional): 2D array of the points
+            the isoline may pass through, e.g. the bulk. Only cells with all
+            four corners in the mask are used, which avoids the spurious
+            isoline along the jump of the energy at the sample boundary.
+            Defaults to None.
+
+    Returns:
+        np.ndarray: 3D array of shape (n_segments, 2, 2) with the start and
+            end point of each segment as (row, column) coordinates.
+    """
+    energy = np.asarray(energy)
+    if energy.ndim != 2:
+        raise ValueError("Energy must be a 2D array.")
+    (rows, cols), starts, ends = _find_cell_segments(energy, level, mask)
+    offsets = np.stack([rows, cols], axis=1)[:, None, :]
+    segments = np.stack([starts + offsets, ends + offsets], axis=2)
+    segments = segments.reshape(-1, 2, 2)
+    return segments[~np.isnan(segments[:, 0, 0])]
+
+
+def _calc_contour_lengths(
+    energy: np.ndarray,
+    level: float,
+    mask: np.ndarray | IndexSet | None,
+    pixel_x: float,
+    pixel_y: float,
+) -> np.ndarray:
+    cells, starts, ends = _find_cell_segments(energy, level, mask)
+    steps = ends - starts
+    lengths = np.sqrt(
+        (steps[..., 0] * pixel_y)**2 + (steps[..., 1] * pixel_x)**2
+    )
+    lengths = np.nansum(lengths, axis=1)
+    if energy.ndim == 2:
+        return lengths.sum()
+    return np.bincount(cells[0], weights=lengths, minlength=len(energy))
+
+
+def calc_contour_length(
+    energy: np.ndarray,
+    E_F: float,
+    mask: np.ndarray | IndexSet | None = None,
+    pixel_x: float = 1,
+    pixel_y: float = 1,
+) -> float:
+    """
+    Calculate the length of the E = E_F isoline with sub-pixel resolution.
+
+    Unlike `calc_edge_length`, the isoline is interpolated between the grid
+    points and may pass through a row any number of times, so the length
+    converges at a coarser grid. As in `calc_edge_length`, `pixel_x` scales
+    the column direction and `pixel_y` the row direction.
+
+    Args:
+        energy (np.ndarray): 2D array of energy values.
+        E_F (float): Fermi energy.
+        mask (np.ndarray | IndexSet | None, optional): 2D array of the points
+            the isoline may pass through, see `find_contour`. Defaults to
+            None.
+        pixel_x (float, optional): Size of a pixel in the x-direction.
+            Defaults to 1.
+        pixel_y (float, optional): Size of a pixel in the y-direction.
+            Defaults to 1.
+
+    Returns:
+        float: The length of the isoline.
+    """
+    energy = np.asarray(energy)
+    if energy.ndim != 2:
+        raise ValueError("Energy must be a 2D array.")
+    return float(_calc_contour_lengths(energy, E_F, mask, pixel_x, pixel_y))
+
+
+def calc_contour_lengths(
+    energy: np.ndarray,
+    E_F: float,
+    mask: np.ndarray | IndexSet | None = None,
+    pixel_x: float = 1,
+    pixel_y: float = 1,
+) -> np.ndarray:
+    """
+    Calculate the length of the E = E_F isoline of every frame of a stack of
+    energy arrays, see `calc_contour_length`.
+
+    Args:
+        energy (np.ndarray): 3D array of shape (n_frames, nx, ny) of energy
+            values.
+        E_F (float): Fermi energy.
+        mask (np.ndarray | IndexSet | None, optional): 2D array of the points
+            the isoline may pass through, see `find_contour`. Defaults to
+            None.
+        pixel_x (float, optional): Size of a pixel in the x-direction.
+            Defaults to 1.
+        pixel_y (float, optional): Size of a pixel in the y-direction.
+            Defaults to 1.
+
+    Returns:
+        np.ndarray: 1D array with the isoline length of each frame.
+    """
+    energy = np.asarray(energy)
+    if energy.ndim != 3:
+        raise ValueError(
+            "Energy must be a 3D array of shape (n_frames, nx, ny)."
+        )
+    return _calc_contour_lengths(energy, E_F, mask, pixel_x, pixel_y)
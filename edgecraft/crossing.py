@@ -0,0 +1,188 @@
+import numpy as np
+
+from .sweep import IncrementalGateSweep
+
+
+class _RowThresholds:
+    """
+    Per-row sorted thresholds answering "how many values of each row are
+    below a query" for many rows and queries at once.
+    """
+
+    def __init__(
+        self,
+        rows: np.ndarray,
+        values: np.ndarray,
+        n_rows: int,
+    ) -> None:
+        self.order = np.lexsort((values, rows))
+        self._values = np.sort(values)
+
+        # The global rank keeps the keys of a row sorted by value, so a
+        # single search over the keys finds the split of every row.
+        ranks = np.searchsorted(self._values, values[self.order])
+        self._stride = len(values) + 1
+        self._keys = rows[self.order] * self._stride + ranks
+        self.starts = np.searchsorted(
+            self._keys,
+            np.arange(n_rows) * self._stride,
+        )
+        self._rows = np.arange(n_rows)
+
+    def split(
+        self,
+        queries: np.ndarray,
+        strict: bool = False,
+    ) -> np.ndarray:
+        """
+        Return the positions, into the sorted order, which split every row
+        into the values not above (below if `strict`) each query.
+        """
+        side = "left" if strict else "right"
+        ranks = np.searchsorted(self._values, queries, side=side)
+        return np.searchsorted(
+            self._keys,
+            self._rows * self._stride + ranks[:, None],
+        )
+
+
+class CrossingIndex(IncrementalGateSweep):
+    """
+    Index of the voltages at which the gate pixels cross the edge window.
+
+    The energy of a pixel is linear in the gate voltage, E(V) = E + V * g, so
+    it lies in [E_F - U_fluc, E_F + U_fluc] for V between its entry and exit
+    voltages and below E_F + U_fluc on one side of a threshold voltage. The
+    thresholds are sorted row by row once, after which the edge length at any
+    voltage takes O(n_rows log n_pixels) time without building the energy
+    array. Results equal those of `find_edge` and `calc_edge_length` except
+    for voltages within rounding of a crossing voltage.
+
+    Attributes:
+        rows (np.ndarray): Rows containing at least one gate pixel.
+        pixels (tuple[np.ndarray, np.ndarray]): Coordinates of the gate
+            pixels.
+        entry (np.ndarray): Voltage at which each gate pixel enters the edge
+            window.
+        exit (np.ndarray): Voltage at which each gate pixel leaves the edge
+            window.
+    """
+
+    def __init__(
+        self,
+        energy: np.ndarray,
+        gate: np.ndarray,
+        E_F: float,
+        U_fluc: float,
+        bulk: np.ndarray,
+    ) -> None:
+        """
+        Args:
+            energy (np.ndarray): 2D array of base energy values.
+            gate (np.ndarray): 2D gate mask, or 2D array of gate weights.
+            E_F (float): Fermi energy.
+            U_fluc (float): Energy fluctuation parameter.
+            bulk (np.ndarray): 2D array indicating bulk regions.
+        """
+        if np.ndim(gate) != 2:
+            raise ValueError("Crossing index supports a single 2D gate.")
+        super().__init__(energy, gate, E_F, U_fluc, bulk)
+        self.pixels = self._pixels
+
+        g = self._gate
+        lower = (E_F + U_fluc - self._energy) / g
+        upper = (E_F - U_fluc - self._energy) / g
+        self.entry = np.where(g > 0, upper, lower)
+        self.exit = np.where(g > 0, lower, upper)
+
+        n_rows = len(self.rows)
+        rows = np.repeat(
+            np.arange(n_rows),
+            np.diff(np.append(self._row_starts, len(g))),
+        )
+        cols = self._cols
+        self._entries = _RowThresholds(rows, self.entry, n_rows)
+        self._exits = _RowThresholds(rows, self.exit, n_rows)
+        self._entry_sums = np.append(0, np.cumsum(cols[self._entries.order]))
+        self._exit_sums = np.append(0, np.cumsum(cols[self._exits.order]))
+
+        # The bulk gate pixels below E_F + U_fluc are those whose threshold
+        # lies above the voltage for g > 0 and below it for g < 0. Offsetting
+        # the columns by decreasing row makes the running minimum restart at
+        # every row.
+        ny = self._shape[1]
+        self._lowers = []
+        for sign in (1, -1):
+            selected = self._bulk & (np.sign(g) == sign)
+            index = _RowThresholds(
+                rows[selected],
+                -sign * lower[selected],
+                n_rows,
+            )
+            offsets = (n_rows - rows[selected][index.order]) * ny
+            running = np.minimum.accumulate(
+                cols[selected][index.order] + offsets
+            ) - offsets
+            self._lowers.append((sign, index, np.append(running, ny)))
+
+    def _evaluate_rows(
+        self,
+        voltages: np.ndarray,
+    ) -> tuple[np.ndarray, ...]:
+        voltages = np.asarray(voltages, dtype=float).reshape(-1)
+        starts = self._entries.starts
+        entered = self._entries.split(voltages)
+        exited = self._exits.split(voltages, strict=True)
+        counts = self._static_counts + (
+            (entered - starts) - (exited - self._exits.starts)
+        )
+        sums = self._static_sums + (
+            (self._entry_sums[entered] - self._entry_sums[starts]) -
+            (self._exit_sums[exited] - self._exit_sums[self._exits.starts])
+        )
+
+        first = np.broadcast_to(
+            self._static_first,
+            (len(voltages), len(self.rows)),
+        )
+        for sign, index, running in self._lowers:
+            split = index.split(-sign * voltages)
+            last = np.where(split > index.starts, split - 1, -1)
+            first = np.minimum(first, running[last])
+        return counts, sums, first
+
+    def calc_edge_length(
+        self,
+        voltage: float,
+        pixel_x: int = 1,
+        pixel_y: int = 1,
+    ) -> float:
+        """
+        Calculate the edge length at a gate voltage.
+
+        Args:
+            voltage (float): Gate voltage.
+            pixel_x (int, optional): Size of a pixel in the x-direction.
+                Defaults to 1.
+            pixel_y (int, optional): Size of a pixel in the y-direction.
+                Defaults to 1.
+
+        Returns:
+            float: The calculated edge length.
+        """
+        return float(self.calc_edge_lengths([voltage], pixel_x, pixel_y)[0])
+
+    def find_edge(
+        self,
+        voltage: float,
+    ) -> np.ndarray:
+        """
+        Identify the edge at a gate voltage.
+
+        Args:
+            voltage (float): Gate voltage.
+
+        Returns:
+            np.ndarray: 2D uint8 array where 1 indicates edge points.
+        """
+        return self.find_edges([voltage])[0]
@@ -0,0 +1,359 @@
+from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from .basic import true_circle_in
+from .instrument import stage
+
+
+VACUUM = 0
+"""Label of vacuum pixels away from the sample boundary."""
+
+VACUUM_BOUNDARY = 1
+"""Label of boundary pixels outside of the sample space."""
+
+BOUNDARY = 2
+"""Label of boundary pixels inside of the sample space."""
+
+BULK = 3
+"""Label of bulk pixels outside of every named region."""
+
+
+class Region(ABC):
+    """
+    Base class of the shapes a sample is described with.
+
+    Regions combine with `|` (union), `&` (intersection) and `-`
+    (difference). Coordinates are pixel indices, X along the first axis and
+    Y along the second axis of the space grid.
+    """
+
+    @abstractmethod
+    def mask(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        """
+        Return a boolean mask of the points inside the region.
+
+        Args:
+            X (np.ndarray): Array of x-coordinates.
+            Y (np.ndarray): Array of y-coordinates, broadcastable with `X`.
+
+        Returns:
+            np.ndarray: Boolean array of the broadcast shape of `X` and `Y`.
+        """
+
+    def __or__(self, other: "Region") -> "Region":
+        return Union(self, other)
+
+    def __and__(self, other: "Region") -> "Region":
+        return Intersection(self, other)
+
+    def __sub__(self, other: "Region") -> "Region":
+        return Difference(self, other)
+
+
+@dataclass(frozen=True)
+class Disk(Region):
+    """
+    Disk of the points within `radius` of (x0, y0), boundary included.
+    """
+
+    x0: float
+    y0: float
+    radius: float
+
+    def mask(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        return true_circle_in(Y, X, self.y0, self.x0, self.radius)
+
+
+@dataclass(frozen=True)
+class Annulus(Region):
+    """
+    Ring of the points within `outer` of (x0, y0) but not within `inner`.
+    """
+
+    x0: float
+    y0: float
+    outer: float
+    inner: float
+
+    def mask(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        r2 = (X - self.x0)**2 + (Y - self.y0)**2
+        return (r2 <= self.outer**2) & ~(r2 <= self.inner**2)
+
+
+@dataclass(frozen=True)
+class HalfPlane(Region):
+    """
+    Half-plane of the points whose coordinate along `axis` ("x" or "y") is
+    at least `value`, or below `value` if `below` is True.
+    """
+
+    axis: str
+    value: float
+    below: bool = False
+
+    def mask(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        if self.axis not in ("x", "y"):
+            raise ValueError(f"Axis must be 'x' or 'y', not {self.axis!r}.")
+        coordinate = X if self.axis == "x" else Y
+        if self.below:
+            return coordinate < self.value
+        return coordinate >= self.value
+
+
+@dataclass(frozen=True)
+class Rectangle(Region):
+    """
+    Rectangle of the points with x_min <= X < x_max and y_min <= Y < y_max.
+    """
+
+    x_min: float
+    x_max: float
+    y_min: float
+    y_max: float
+
+    def mask(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        return (
+            (self.x_min <= X) & (X < self.x_max) &
+            (self.y_min <= Y) & (Y < self.y_max)
+        )
+
+
+@dataclass(frozen=True)
+class Union(Region):
+    """Points inside of any of the two regions."""
+
+    first: Region
+    second: Region
+
+    def mask(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        return self.first.mask(X, Y) | self.second.mask(X, Y)
+
+
+@dataclass(frozen=True)
+class Intersection(Region):
+    """Points inside of both regions."""
+
+    first: Region
+    second: Region
+
+    def mask(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        return self.first.mask(X, Y) & self.second.mask(X, Y)
+
+
+@dataclass(frozen=True)
+class Difference(Region):
+    """Points inside of the first region but not of the second."""
+
+    first: Region
+    second: Region
+
+    def mask(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        return self.first.mask(X, Y) & ~self.second.mask(X, Y)
+
+
+def find_boundary(space: np.ndarray) -> np.ndarray:
+    """
+    Return the pixels where the sample space has a non-zero gradient.
+
+    This equals `np.gradient(space) != 0` along either axis for a 0/1 space
+    matrix without the float temporaries.
+
+    Args:
+        space (np.ndarray): 2D array indicating the sample space.
+
+    Returns:
+        np.ndarray: Boolean array where True indicates boundary points.
+    """
+    space = np.asarray(space, dtype=bool)
+    boundary = np.zeros(space.shape, dtype=bool)
+    for axis in range(2):
+        s = np.moveaxis(space, axis, 0)
+        b = np.moveaxis(boundary, axis, 0)
+        if len(s) < 2:
+            continue
+        b[1:-1] |= s[2:] != s[:-2]
+        b[0] |= s[1] != s[0]
+        b[-1] |= s[-1] != s[-2]
+    return boundary
+
+
+@dataclass
+class SampleLayout:
+    """
+    Compiled sample geometry as a single label map.
+
+    Pixels are labelled `VACUUM`, `VACUUM_BOUNDARY`, `BOUNDARY`, `BULK`, or
+    `BULK` + 1 + i for the i-th named region. Gates may overlap the regions
+    and are kept as separate boolean masks restricted to the bulk.
+
+    Attributes:
+        labels (np.ndarray): 2D uint8 (or int16 for many regions) label map.
+        names (tuple[str, ...]): Names of the regions in label order.
+        gates (dict[str, np.ndarray]): Boolean mask of each gate.
+    """
+
+    labels: np.ndarray
+    names: tuple[str, ...]
+    gates: dict[str, np.ndarray]
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Shape of the space grid."""
+        return self.labels.shape
+
+    @property
+    def space(self) -> np.ndarray:
+        """Boolean mask of the sample space."""
+        return self.labels >= BOUNDARY
+
+    @property
+    def boundary(self) -> np.ndarray:
+        """Boolean mask of the sample boundary."""
+        return (self.labels == BOUNDARY) | (self.labels == VACUUM_BOUNDARY)
+
+    @property
+    def bulk(self) -> np.ndarray:
+        """Boolean mask of the sample space without its boundary."""
+        return self.labels >= BULK
+
+    @property
+    def vacuum(self) -> np.ndarray:
+        """Boolean mask of the points outside of the sample space."""
+        return self.labels <= VACUUM_BOUNDARY
+
+    def label(self, name: str) -> int:
+        """
+        Return the label of a named region.
+
+        Args:
+            name (str): Name of the region.
+
+        Returns:
+            int: The label of the region.
+        """
+        try:
+            return BULK + 1 + self.names.index(name)
+        except ValueError:
+            raise KeyError(f"Unknown region {name!r}.") from None
+
+    def region(self, name: str) -> np.ndarray:
+        """
+        Return the boolean mask of a named region.
+
+        Args:
+            name (str): Name of the region.
+
+        Returns:
+            np.ndarray: Boolean array where True indicates the region.
+        """
+        return self.labels == self.label(name)
+
+    def potential_table(
+        self,
+        bulk: float = 0,
+        regions: Mapping[str, float] | None = None,
+        boundary: float = 0,
+        vacuum: float = 0,
+    ) -> np.ndarray:
+        """
+        Return the value of each label for `apply_label_potential`.
+
+        The named regions are part of the bulk, so their entries are the bulk
+        value plus their own value, e.g. the quantum Hall energy plus an
+        etching potential. Gates overlap the regions and are not part of the
+        table.
+
+        Args:
+            bulk (float, optional): Value of every bulk point. Defaults to 0.
+            regions (Mapping[str, float] | None, optional): Additional value
+                of each named region. Defaults to None.
+            boundary (float, optional): Value of the boundary points.
+                Defaults to 0.
+            vacuum (float, optional): Value of the vacuum points away from
+                the boundary. Defaults to 0.
+
+        Returns:
+            np.ndarray: 1D array indexed by label.
+        """
+        table = np.zeros(BULK + 1 + len(self.names))
+        table[VACUUM] = vacuum
+        table[[VACUUM_BOUNDARY, BOUNDARY]] = boundary
+        table[BULK:] = bulk
+        for name, value in (regions or {}).items():
+            table[self.label(name)] += value
+        return table
+
+    def indices(self, mask: np.ndarray) -> np.ndarray:
+        """
+        Return the coordinates of the points of a mask as an (N, 2) array,
+        the index layout the functions of `edgecraft.basic` take.
+
+        Args:
+            mask (np.ndarray): 2D boolean mask, e.g. `layout.bulk`.
+
+        Returns:
+            np.ndarray: 2D array of point coordinates.
+        """
+        return np.array(np.nonzero(mask)).T
+
+
+@dataclass
+class SampleGeometry:
+    """
+    Declarative description of a sample.
+
+    Attributes:
+        shape (tuple[int, int]): Shape of the space grid.
+        space (Region): Region of the sample space.
+        regions (Sequence[tuple[str, Region]]): Named regions of the bulk in
+            order of precedence: a point belongs to the first region
+            containing it.
+        gates (Sequence[tuple[str, Region]]): Named gates, which may overlap
+            the regions.
+    """
+
+    shape: tuple[int, int]
+    space: Region
+    regions: Sequence[tuple[str, Region]] = ()
+    gates: Sequence[tuple[str, Region]] = ()
+
+    def compile(self) -> SampleLayout:
+        """
+        Compile the geometry into a label map.
+
+        Every region is rasterized once on an open coordinate grid, so no
+        full-size coordinate or integer mask arrays are created.
+
+        Returns:
+            SampleLayout: The compiled layout.
+        """
+        names = tuple(name for name, _ in self.regions)
+        if len(set(names)) != len(names):
+            raise ValueError("Region names must be unique.")
+        n_labels = BULK + 1 + len(names)
+        dtype = np.uint8 if n_labels <= 256 else np.int16
+
+        with stage("geometry", self.shape[0] * self.shape[1]):
+            X = np.arange(self.shape[0])[:, None]
+            Y = np.arange(self.shape[1])[None, :]
+            space = np.broadcast_to(self.space.mask(X, Y), self.shape)
+
+            labels = np.full(self.shape, VACUUM, dtype=dtype)
+            labels[space] = BULK
+            boundary = find_boundary(space)
+            labels[boundary & space] = BOUNDARY
+            labels[boundary & ~space] = VACUUM_BOUNDARY
+            del space, boundary
+
+            for label, (_, region) in enumerate(self.regions, BULK + 1):
+                labels[(labels == BULK) & region.mask(X, Y)] = label
+
+            bulk = labels >= BULK
+            gates = {
+                name: bulk & region.mask(X, Y)
+                for name, region in self.gates
+            }
+            return SampleLayout(labels, names, gates)
@@ -0,0 +1,218 @@
+from collections.abc import Iterator
+
+import numpy as np
+
+
+class IndexSet:
+    """
+    Set of grid points stored as runs of consecutive columns per row.
+
+    A run is a row with a half-open column range [start, stop). The runs are
+    int32 arrays sorted by row and column, and touching runs are merged, so a
+    convex region costs 12 bytes per row instead of 16 bytes per point of an
+    (N, 2) int64 index array. `np.asarray(index_set)` gives that index array
+    for code which needs explicit coordinates.
+
+    Attributes:
+        shape (tuple[int, int]): Shape of the grid.
+        rows (np.ndarray): Row of each run.
+        starts (np.ndarray): First column of each run.
+        stops (np.ndarray): Column after the last one of each run.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, int],
+        rows: np.ndarray,
+        starts: np.ndarray,
+        stops: np.ndarray,
+    ) -> None:
+        """
+        Args:
+            shape (tuple[int, int]): Shape of the grid.
+            rows (np.ndarray): Row of each run.
+            starts (np.ndarray): First column of each run.
+            stops (np.ndarray): Column after the last one of each run. The
+                runs must be sorted, non-empty and must not touch.
+        """
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.rows = np.asarray(rows, dtype=np.int32)
+        self.starts = np.asarray(starts, dtype=np.int32)
+        self.stops = np.asarray(stops, dtype=np.int32)
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "IndexSet":
+        """
+        Build the set of the non-zero points of a mask.
+
+        Args:
+            mask (np.ndarray): 2D array where non-zero values indicate
+                points of the set.
+
+        Returns:
+            IndexSet: The set of points.
+        """
+        mask = np.asarray(mask) != 0
+        padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+        padded[:, 1:-1] = mask
+        steps = np.diff(padded, axis=1)
+        rows, starts = np.nonzero(steps == 1)
+        _, stops = np.nonzero(steps == -1)
+        return cls(mask.shape, rows, starts, stops)
+
+    @classmethod
+    def from_indices(
+        cls,
+        indices: np.ndarray,
+        shape: tuple[int, int],
+    ) -> "IndexSet":
+        """
+        Build the set of the points of an (N, 2) index array.
+
+        Args:
+            indices (np.ndarray): 2D array of point coordinates.
+            shape (tuple[int, int]): Shape of the grid.
+
+        Returns:
+            IndexSet: The set of points.
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1, 2)
+        linear = np.unique(indices[:, 0] * shape[1] + indices[:, 1])
+        rows, cols = np.divmod(linear, shape[1])
+        breaks = np.flatnonzero(
+            (np.diff(rows) != 0) | (np.diff(cols) != 1)
+        ) + 1
+        first = np.concatenate([[0], breaks])
+        last = np.concatenate([breaks, [len(linear)]]) - 1
+        if len(linear) == 0:
+            first = last = np.zeros(0, dtype=np.int64)
+        return cls(shape, rows[first], cols[first], cols[last] + 1)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the run arrays (bytes)."""
+        return self.rows.nbytes + self.starts.nbytes + self.stops.nbytes
+
+    def __len__(self) -> int:
+        return int(np.sum(self.stops - self.starts, dtype=np.int64))
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        for row, start, stop in zip(
+            self.rows.tolist(),
+            self.starts.tolist(),
+            self.stops.tolist(),
+        ):
+            for col in range(start, stop):
+                yield row, col
+
+    def __repr__(self) -> str:
+        return (
+            f"IndexSet(shape={self.shape}, points={len(self)}, "
+            f"runs={len(self.rows)})"
+        )
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        indices = self.to_indices()
+        if dtype is not None:
+            indices = indices.astype(dtype)
+        return indices
+
+    def to_indices(self) -> np.ndarray:
+        """
+        Return the points as an (N, 2) int64 index array in row-major order.
+
+        Returns:
+            np.ndarray: 2D array of point coordinates.
+        """
+        lengths = (self.stops - self.starts).astype(np.int64)
+        offsets = np.cumsum(lengths) - lengths
+        within = np.arange(lengths.sum()) - np.repeat(offsets, lengths)
+        return np.stack(
+            [
+                np.repeat(self.rows.astype(np.int64), lengths),
+                np.repeat(self.starts.astype(np.int64), lengths) + within,
+            ],
+            axis=1,
+        )
+
+    def chunks(self, size: int) -> Iterator[np.ndarray]:
+        """
+        Iterate over the points as (n, 2) int64 index arrays of at most
+        `size` points in row-major order, expanding only a few runs at a
+        time.
+
+        Args:
+            size (int): Maximum number of points per chunk.
+
+        Yields:
+            np.ndarray: 2D array of point coordinates.
+        """
+        if size < 1:
+            raise ValueError("Chunk size must be positive.")
+        lengths = (self.stops - self.starts).astype(np.int64)
+        ends = np.cumsum(lengths)
+        for begin in range(0, int(ends[-1]) if len(ends) else 0, size):
+            # the runs holding the points [begin, begin + size)
+            first = int(np.searchsorted(ends, begin, side="right"))
+            last = int(np.searchsorted(ends, begin + size, side="left")) + 1
+            points = IndexSet(
+                self.shape,
+                self.rows[first:last],
+                self.starts[first:last],
+                self.stops[first:last],
+            ).to_indices()
+            offset = begin - int(ends[first] - lengths[first])
+            yield points[offset:offset + size]
+
+    def to_mask(self) -> np.ndarray:
+        """
+        Return the points as a boolean mask.
+
+        Returns:
+            np.ndarray: 2D boolean array where True indicates the points.
+        """
+        mask = np.zeros(self.shape, dtype=bool)
+        for row, start, stop in zip(self.rows, self.starts, self.stops):
+            mask[row, start:stop] = True
+        return mask
+
+    def _combine(self, other: "IndexSet", coverage: int) -> "IndexSet":
+        """
+        Return the points covered by at least `coverage` of the two sets.
+        """
+        if self.shape != other.shape:
+            raise ValueError(
+                f"Index sets of shapes {self.shape} and {other.shape} "
+                "cannot be combined."
+            )
+        stride = self.shape[1] + 1
+        rows = np.concatenate([self.rows, other.rows]).astype(np.int64)
+        keys = np.concatenate([
+            rows * stride + np.concatenate([self.starts, other.starts]),
+            rows * stride + np.concatenate([self.stops, other.stops]),
+        ])
+        steps = np.repeat([1, -1], len(rows))
+
+        # starts come before stops at the same key, so touching runs merge
+        order = np.lexsort((-steps, keys))
+        keys = keys[order]
+        covered = np.cumsum(steps[order])
+        previous = np.concatenate([[0], covered[:-1]])
+        begins = keys[(previous < coverage) & (covered >= coverage)]
+        ends = keys[(previous >= coverage) & (covered < coverage)]
+
+        kept = ends > begins
+        begins = begins[kept]
+        ends = ends[kept]
+        return IndexSet(
+            self.shape,
+            begins // stride,
+            begins % stride,
+            ends % stride + (ends // stride - begins // stride) * stride,
+        )
+
+    def __or__(self, other: "IndexSet") -> "IndexSet":
+        return self._combine(other, 1)
+
+    def __and__(self, other: "IndexSet") -> "IndexSet":
+        return self._combine(other, 2)
@@ -0,0 +1,303 @@
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+
+@dataclass
+class StageStats:
+    """
+    Accumulated measurements of one stage.
+
+    Attributes:
+        name (str): Name of the stage.
+        calls (int): Number of times the stage ran.
+        seconds (float): Total wall time of the stage (s), including any
+            stages it contains.
+        pixels (int): Total number of pixels the stage processed.
+        peak_bytes (int): Largest traced memory allocated by one run of the
+            stage above what was allocated when it started (bytes). Zero
+            unless memory tracing is enabled.
+    """
+
+    name: str
+    calls: int = 0
+    seconds: float = 0.0
+    pixels: int = 0
+    peak_bytes: int = 0
+
+    @property
+    def pixels_per_second(self) -> float:
+        """Processing rate of the stage (pixels/s)."""
+        if self.seconds == 0:
+            return 0.0
+        return self.pixels / self.seconds
+
+    def merge(self, other: "StageStats") -> None:
+        """
+        Add the measurements of another run of the same stage, e.g. from a
+        worker process.
+
+        Args:
+            other (StageStats): Measurements to add.
+        """
+        self.calls += other.calls
+        self.seconds += other.seconds
+        self.pixels += other.pixels
+        self.peak_bytes = max(self.peak_bytes, other.peak_bytes)
+
+
+class _OpenStage:
+    __slots__ = ("start_bytes", "peak")
+
+    def __init__(self, current: int) -> None:
+        self.start_bytes = current
+        self.peak = current
+
+
+class Recorder:
+    """
+    Collector of per-stage measurements, see `instrument`.
+
+    Attributes:
+        trace_memory (bool): Whether the peak memory of the stages is traced.
+        stages (dict[str, StageStats]): Measurements by stage name, in the
+            order the stages first ran.
+    """
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        """
+        Args:
+            trace_memory (bool, optional): Whether to trace the peak memory
+                of the stages with tracemalloc, which slows down allocations.
+                Defaults to False.
+        """
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self._open = []
+
+    def _fold_peak(self) -> None:
+        """
+        Fold the traced peak since the last fold into every open stage and
+        restart the peak, so nested stages each see their own peak.
+        """
+        if not tracemalloc.is_tracing():
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        for stage in self._open:
+            stage.peak = max(stage.peak, peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def _measure(self, name: str, pixels: int) -> Iterator[None]:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            self._fold_peak()
+            self._open.append(_OpenStage(tracemalloc.get_traced_memory()[0]))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.seconds += time.perf_counter() - start
+            stats.calls += 1
+            stats.pixels += int(pixels)
+            if tracing:
+                self._fold_peak()
+                stage = self._open.pop()
+                stats.peak_bytes = max(
+                    stats.peak_bytes,
+                    stage.peak - stage.start_bytes,
+                )
+
+    def merge(self, stages: Mapping[str, StageStats]) -> None:
+        """
+        Add the measurements of another recorder, e.g. from a worker
+        process.
+
+        Args:
+            stages (Mapping[str, StageStats]): Measurements by stage name.
+        """
+        for name, other in stages.items():
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats(name)
+            stats.merge(other)
+
+    def report(self) -> list[dict[str, float]]:
+        """
+        Return the measurements as records, e.g. for JSON output.
+
+        Returns:
+            list[dict[str, float]]: One record per stage with the keys
+                "name", "calls", "seconds", "pixels", "pixels_per_second"
+                and "peak_bytes".
+        """
+        return [
+            {
+                "name": stats.name,
+                "calls": stats.calls,
+                "seconds": stats.seconds,
+                "pixels": stats.pixels,
+                "pixels_per_second": stats.pixels_per_second,
+                "peak_bytes": stats.peak_bytes,
+            }
+            for stats in self.stages.values()
+        ]
+
+    def format(self) -> str:
+        """
+        Return the measurements as a text table, slowest stage first.
+
+        Returns:
+            str: The table.
+        """
+        lines = [
+            f"{'stage':<16}{'calls':>8}{'seconds':>12}{'Mpixel/s':>12}"
+            f"{'peak MB':>10}"
+        ]
+        for stats in sorted(
+            self.stages.values(),
+            key=lambda stats: stats.seconds,
+            reverse=True,
+        ):
+            lines.append(
+                f"{stats.name:<16}{stats.calls:>8}{stats.seconds:>12.4f}"
+                f"{stats.pixels_per_second / 1e6:>12.2f}"
+                f"{stats.peak_bytes / 2**20:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+_recorder: ContextVar[Recorder | None] = ContextVar(
+    "edgecraft_recorder",
+    default=None,
+)
+
+
+def get_recorder() -> Recorder | None:
+    """
+    Return the recorder of the current context.
+
+    Returns:
+        Recorder | None: The active recorder, or None if instrumentation is
+            off.
+    """
+    return _recorder.get()
+
+
+@contextmanager
+def instrument(trace_memory: bool = False) -> Iterator[Recorder]:
+    """
+    Record the stages run by edgecraft within the block.
+
+    Instrumentation is off by default and costs one context variable lookup
+    per stage then. Within the block, every stage, i.e. geometry
+    compilation, the confinement potential, potential application, edge
+    finding, edge length computation, sweep output and plotting, adds its
+    wall time, call count and processed pixels to the returned recorder:
+
+        with instrument() as recorder:
+            sweep_gate(energy, gate, voltages, E_F, U_fluc, bulk)
+        print(recorder.format())
+
+    Args:
+        trace_memory (bool, optional): Whether to trace the peak memory of
+            the stages with tracemalloc, which slows down allocations.
+            Defaults to False.
+
+    Yields:
+        Recorder: The recorder of the block.
+    """
+    recorder = Recorder(trace_memory)
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+        if started:
+            tracemalloc.stop()
+
+
+@contextmanager
+def stage(name: str, pixels: int = 0) -> Iterator[None]:
+    """
+    Measure a block as a stage of the active recorder, if any.
+
+    Args:
+        name (str): Name of the stage.
+        pixels (int, optional): Number of pixels the block processes.
+            Defaults to 0.
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        yield
+        return
+    with recorder._measure(name, pixels):
+        yield
+
+
+@dataclass(frozen=True)
+class Progress:
+    """
+    Progress of a sweep or a scan.
+
+    Attributes:
+        done (int): Number of completed frames or points.
+        total (int): Total number of frames or points.
+        elapsed (float): Wall time since the start (s).
+        rate (float): Completed frames or points per second in this run.
+        eta (float): Estimated remaining wall time (s), inf while unknown.
+    """
+
+    done: int
+    total: int
+    elapsed: float
+    rate: float
+    eta: float
+
+    @property
+    def fraction(self) -> float:
+        """Completed fraction."""
+        return self.done / self.total if self.total else 1.0
+
+
+ProgressCallback = Callable[[Progress], None]
+"""Function receiving the progress of a sweep or a scan."""
+
+
+class _ProgressMeter:
+    """
+    Report the progress of a run to a callback, counting the rate from the
+    frames completed in this run only, so a resumed run reports an honest
+    rate.
+    """
+
+    def __init__(
+        self,
+        callback: ProgressCallback | None,
+        total: int,
+        done: int = 0,
+    ) -> None:
+        self._callback = callback
+        self._total = total
+        self._first = done
+        self._start = time.perf_counter()
+
+    def update(self, done: int) -> None:
+        if self._callback is None:
+            return
+        elapsed = time.perf_counter() - self._start
+        rate = (done - self._first) / elapsed if elapsed > 0 else 0.0
+        if done >= self._total:
+            eta = 0.0
+        else:
+            eta = (self._total - done) / rate if rate > 0 else float("inf")
+        self._callback(Progress(done, self._total, elapsed, rate, eta))
@@ -0,0 +1,316 @@
+from collections.abc import Sequence
+
+import numpy as np
+from matplotlib.animation import FuncAnimation
+from matplotlib.artist import Artist
+from matplotlib.figure import Figure
+
+from .instrument import stage
+from .store import SweepReader
+from .sweep import calc_gate_shift
+
+
+def calc_energy_cuts(
+    energy: np.ndarray,
+    gate: np.ndarray,
+    voltages: np.ndarray,
+    row: int,
+) -> np.ndarray:
+    """
+    Calculate the energy along one row at each voltage of a gate sweep,
+    without building the energy of the full frames.
+
+    Args:
+        energy (np.ndarray): 2D array of base energy values.
+        gate (np.ndarray): 2D gate mask, or 3D stack of gate masks with the
+            gate along the first axis.
+        voltages (np.ndarray): 1D array of gate voltages for a single gate
+            mask, or 2D array of shape (n_frames, n_gates) for a stack of
+            gate masks.
+        row (int): Index of the row.
+
+    Returns:
+        np.ndarray: 2D array of shape (n_frames, ny) with the energy of the
+            row in each frame.
+    """
+    gate = np.asarray(gate)
+    energy = np.asarray(energy)
+    shift = calc_gate_shift(gate[..., row:row + 1, :], voltages)
+    return shift[:, 0] + energy[row]
+
+
+class SweepAnimator:
+    """
+    Animation of a precomputed gate sweep.
+
+    The figure shows the edge of a frame, the energy along one row with the
+    Fermi window, and optionally the edge length against the gate voltage.
+    All artists are created once, and every frame only replaces their data
+    with `set_data` and `set_ydata`, so drawing a frame costs a fraction of
+    clearing and rebuilding the axes. With blitting, only the changed
+    artists are redrawn.
+
+    Attributes:
+        figure (Figure): The figure.
+        axes (list[Axes]): Axes of the edge, the energy cut and, if the edge
+            lengths are given, the edge length.
+        image (AxesImage): Image of the edge.
+        energy_line (Line2D | None): Line of the energy cut.
+        marker (Line2D | None): Marker of the current frame on the edge
+            length curve.
+        label (Text): Frame label in the edge axes.
+    """
+
+    def __init__(
+        self,
+        edges: np.ndarray | Sequence[np.ndarray],
+        energy_cuts: np.ndarray | None = None,
+        E_F: float | None = None,
+        U_fluc: float | None = None,
+        edge_lengths: np.ndarray | None = None,
+        voltages: np.ndarray | None = None,
+        x: np.ndarray | None = None,
+        y: np.ndarray | None = None,
+        figure: Figure | None = None,
+    ) -> None:
+        """
+        Args:
+            edges (np.ndarray | Sequence[np.ndarray]): 3D array of shape
+                (n_frames, nx, ny) with the edge of each frame, or any
+                sequence of 2D edges such as a `SweepReader`, which is read
+                frame by frame.
+            energy_cuts (np.ndarray | None, optional): 2D array of shape
+                (n_frames, ny) with the energy along a row in each frame,
+                e.g. from `calc_energy_cuts`. Defaults to None.
+            E_F (float | None, optional): Fermi energy, drawn with the
+                energy cut. Defaults to None.
+            U_fluc (float | None, optional): Energy fluctuation parameter,
+                drawn as the window around `E_F`. Defaults to None.
+            edge_lengths (np.ndarray | None, optional): 1D array with the
+                edge length of each frame. Defaults to None.
+            voltages (np.ndarray | None, optional): 1D array with the gate
+                voltage of each frame, the x-axis of the edge lengths.
+                Defaults to the frame index.
+            x (np.ndarray | None, optional): Coordinates of the rows.
+                Defaults to their index.
+            y (np.ndarray | None, optional): Coordinates of the columns.
+                Defaults to their index.
+            figure (Figure | None, optional): Figure to draw into, e.g.
+                `plt.figure()` to show the animation in a window. Defaults
+                to a new figure without a window.
+        """
+        self._edges = edges
+        self._n_frames = len(edges)
+        if self._n_frames == 0:
+            raise ValueError("Sweep has no frames.")
+        nx, ny = np.shape(edges[0])
+        x = np.arange(nx) if x is None else np.asarray(x)
+        y = np.arange(ny) if y is None else np.asarray(y)
+        if energy_cuts is not None:
+            energy_cuts = np.asarray(energy_cuts)
+            if energy_cuts.shape != (self._n_frames, ny):
+                raise ValueError(
+                    f"Energy cuts of shape {energy_cuts.shape} do not match "
+                    f"{self._n_frames} frames of {ny} columns."
+                )
+        self._energy_cuts = energy_cuts
+
+        n_axes = 1 + (energy_cuts is not None) + (edge_lengths is not None)
+        if figure is None:
+            figure = Figure(figsize=(4.5 * n_axes, 4), layout="constrained")
+        self.figure = figure
+        self.axes = list(np.atleast_1d(figure.subplots(1, n_axes)))
+
+        # edge
+        ax = self.axes[0]
+        dy = (y[-1] - y[0]) / max(ny - 1, 1) / 2
+        dx = (x[-1] - x[0]) / max(nx - 1, 1) / 2
+        self.image = ax.imshow(
+            np.asarray(edges[0]),
+            origin="lower",
+            extent=(y[0] - dy, y[-1] + dy, x[0] - dx, x[-1] + dx),
+            interpolation="nearest",
+            vmin=0,
+            vmax=1,
+        )
+        figure.colorbar(self.image, ax=ax, orientation="vertical")
+        self.label = ax.text(
+            0.02,
+            0.98,
+            "",
+            transform=ax.transAxes,
+            va="top",
+            color="white",
+        )
+
+        # energy cut
+        self.energy_line = None
+        if energy_cuts is not None:
+            ax = self.axes[1]
+            (self.energy_line,) = ax.plot(
+                y,
+                energy_cuts[0],
+                label="single electron energy",
+            )
+            if E_F is not None:
+                ax.axhline(
+                    E_F,
+                    color="black",
+                    linestyle="dashed",
+                    label="$E_\\mathrm{F}$",
+                )
+                if U_fluc is not None:
+                    ax.axhspan(
+                        E_F - U_fluc,
+                        E_F + U_fluc,
+                        color="red",
+                        alpha=0.3,
+                    )
+            low = np.nanmin(energy_cuts)
+            high = np.nanmax(energy_cuts)
+            margin = 0.05 * (high - low) or 1
+            ax.set_ylim(low - margin, high + margin)
+
+        # edge length
+        self.marker = None
+        if edge_lengths is not None:
+            ax = self.axes[-1]
+            edge_lengths = np.asarray(edge_lengths)
+            voltages = (
+                np.arange(self._n_frames) if voltages is None
+                else np.asarray(voltages)
+            )
+            self._lengths = (voltages, edge_lengths)
+            ax.plot(voltages, edge_lengths, color="gray")
+            (self.marker,) = ax.plot(
+                voltages[:1],
+                edge_lengths[:1],
+                "o",
+                color="red",
+            )
+
+    def __len__(self) -> int:
+        return self._n_frames
+
+    @property
+    def artists(self) -> list[Artist]:
+        """Artists updated by every frame."""
+        return [
+            artist
+            for artist in (
+                self.image,
+                self.label,
+                self.energy_line,
+                self.marker,
+            )
+            if artist is not None
+        ]
+
+    def update(self, index: int) -> list[Artist]:
+        """
+        Show a frame.
+
+        Args:
+            index (int): Index of the frame.
+
+        Returns:
+            list[Artist]: The updated artists.
+        """
+        edge = np.asarray(self._edges[index])
+        with stage("plot", edge.size):
+            self.image.set_data(edge)
+            self.label.set_text(f"step: {index}")
+            if self.energy_line is not None:
+                self.energy_line.set_ydata(self._energy_cuts[index])
+            if self.marker is not None:
+                voltages, edge_lengths = self._lengths
+                self.marker.set_data(
+                    voltages[index:index + 1],
+                    edge_lengths[index:index + 1],
+                )
+        return self.artists
+
+    def animate(
+        self,
+        interval: float = 100,
+        blit: bool = True,
+        frames: Sequence[int] | None = None,
+    ) -> FuncAnimation:
+        """
+        Return the animation of the sweep.
+
+        Args:
+            interval (float, optional): Delay between frames (ms). Defaults
+                to 100.
+            blit (bool, optional): Whether to redraw only the updated artists
+                on interactive backends. Defaults to True.
+            frames (Sequence[int] | None, optional): Indices of the frames to
+                show. Defaults to all frames.
+
+        Returns:
+            FuncAnimation: The animation, e.g. to `save` as a GIF.
+        """
+        return FuncAnimation(
+            self.figure,
+            self.update,
+            frames=range(self._n_frames) if frames is None else frames,
+            init_func=lambda: self.update(0),
+            interval=interval,
+            blit=blit,
+        )
+
+    @classmethod
+    def from_store(
+        cls,
+        reader: SweepReader,
+        row: int | None = None,
+        energy: np.ndarray | None = None,
+        gate: np.ndarray | None = None,
+        figure: Figure | None = None,
+    ) -> "SweepAnimator":
+        """
+        Animate a sweep store written by `sweep_gate`.
+
+        The edges are read lazily frame by frame. The energy cut comes from
+        the energy snapshots of the store, or from a base energy and a gate
+        mask together with the "voltage" scalar of the store. E_F and U_fluc
+        are taken from the parameters of the store, if recorded.
+
+        Args:
+            reader (SweepReader): The store.
+            row (int | None, optional): Row of the energy cut. Defaults to
+                the middle row.
+            energy (np.ndarray | None, optional): 2D base energy of the
+                sweep. Defaults to None.
+            gate (np.ndarray | None, optional): 2D gate mask of the sweep.
+                Defaults to None.
+            figure (Figure | None, optional): Figure to draw into. Defaults
+                to a new figure.
+
+        Returns:
+            SweepAnimator: The animator.
+        """
+        row = reader.shape[0] // 2 if row is None else row
+        voltages = (
+            reader.scalar("voltage") if "voltage" in reader.scalar_names
+            else None
+        )
+        energy_cuts = None
+        if reader.has_energy:
+            energy_cuts = np.stack([
+                reader.energy(i)[row] for i in range(len(reader))
+            ])
+        elif energy is not None and gate is not None and voltages is not None:
+            energy_cuts = calc_energy_cuts(energy, gate, voltages, row)
+        return cls(
+            reader,
+            energy_cuts=energy_cuts,
+            E_F=reader.params.get("E_F"),
+            U_fluc=reader.params.get("U_fluc"),
+            edge_lengths=(
+                reader.scalar("edge_length")
+                if "edge_length" in reader.scalar_names else None
+            ),
+            voltages=voltages,
+            figure=figure,
+        )
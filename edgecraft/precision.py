@@ -0,0 +1,123 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+
+
+PRECISIONS = ("float64", "float32")
+"""Names of the floating point types the functions of edgecraft run in."""
+
+
+def resolve_dtype(precision: str | np.dtype | type | None) -> np.dtype:
+    """
+    Return the floating point type of a precision option.
+
+    Args:
+        precision (str | np.dtype | type | None): One of `PRECISIONS`, a
+            matching NumPy type, or None for float64.
+
+    Returns:
+        np.dtype: np.float64 or np.float32.
+    """
+    if precision is None:
+        return np.dtype(np.float64)
+    try:
+        dtype = np.dtype(precision)
+    except TypeError:
+        dtype = None
+    if dtype is None or dtype.name not in PRECISIONS:
+        raise ValueError(
+            f"Unknown precision {precision!r}. Choose one of {PRECISIONS}."
+        )
+    return dtype
+
+
+def _array_dtype(array: np.ndarray) -> np.dtype:
+    """
+    Return the floating point type an array is processed in: float32 for
+    float32 arrays and float64 for all others.
+    """
+    if np.asarray(array).dtype == np.float32:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+@dataclass(frozen=True)
+class PrecisionReport:
+    """
+    Edge lengths of the same run in double and in single precision.
+
+    Attributes:
+        lengths (np.ndarray): Edge lengths of the float64 run.
+        single_lengths (np.ndarray): Edge lengths of the float32 run.
+        max_deviation (float): Largest absolute difference of the lengths.
+        max_relative_deviation (float): Largest absolute difference relative
+            to the float64 length.
+    """
+
+    lengths: np.ndarray
+    single_lengths: np.ndarray
+    max_deviation: float
+    max_relative_deviation: float
+
+    def is_within(self, rtol: float) -> bool:
+        """
+        Return whether every float32 length is within `rtol` of the float64
+        length.
+
+        Args:
+            rtol (float): Relative tolerance.
+
+        Returns:
+            bool: Whether the float32 run is accurate enough.
+        """
+        return self.max_relative_deviation <= rtol
+
+
+def compare_precision(
+    run: Callable[[np.dtype], np.ndarray],
+) -> PrecisionReport:
+    """
+    Run a study in float64 and in float32 and report the deviation of the
+    edge lengths.
+
+    The study should build its energy array in the given type, e.g.
+    `np.zeros(shape, dtype=dtype)`, so that the potentials, the confinement
+    sums and the sweep all run in that type:
+
+        def run(dtype):
+            energy = np.zeros(shape, dtype=dtype)
+            apply_QH_energy(energy, E_QH, bulk_indices)
+            apply_confinement_potential(energy, bulk_indices,
+                                        boundary_indices, alpha)
+            return sweep_gate(energy, gate, voltages, E_F, U_fluc, bulk)
+
+        report = compare_precision(run)
+
+    Args:
+        run (Callable[[np.dtype], np.ndarray]): Function returning the edge
+            length, or an array of edge lengths, computed in the given type.
+
+    Returns:
+        PrecisionReport: The lengths of both runs and their deviation.
+    """
+    lengths = np.asarray(run(np.dtype(np.float64)), dtype=np.float64)
+    single_lengths = np.asarray(run(np.dtype(np.float32)))
+    if single_lengths.shape != lengths.shape:
+        raise ValueError(
+            f"The float32 run returned shape {single_lengths.shape}, but the "
+            f"float64 run returned shape {lengths.shape}."
+        )
+    deviation = np.abs(single_lengths.astype(np.float64) - lengths)
+    relative = np.divide(
+        deviation,
+        np.abs(lengths),
+        out=np.where(deviation == 0, 0.0, np.inf),
+        where=lengths != 0,
+    )
+    return PrecisionReport(
+        lengths=lengths,
+        single_lengths=single_lengths,
+        max_deviation=float(deviation.max(initial=0)),
+        max_relative_deviation=float(relative.max(initial=0)),
+    )
@@ -0,0 +1,230 @@
+from functools import cached_property
+from typing import Any
+
+import numpy as np
+
+from .cache import ConfinementCache
+from .config import Sample
+from .confinement import DEFAULT_MAX_BYTES
+from .geometry import Annulus, Disk, HalfPlane, Region, SampleGeometry
+
+
+ETCHING_STEPS = (
+    0, 5e-6, 9e-6, 11e-6, 13e-6, 15e-6, 17e-6, 19e-6, 21e-6, 23e-6,
+)
+"""
+Distances of the borders of the etched rings of `MultipleEtchedSample` from
+the rim of the disk (m), from the outermost ring inwards.
+"""
+
+
+class _ExampleSample(Sample):
+    """
+    Sample of the examples: a 200 um x 150 um space of the upper half-plane
+    with a disk of 50 um radius bulging into the lower half, and an
+    expansion gate on the outer 25 um of the disk. Pixel sizes are truncated
+    to integers as in the example scripts, so the presets reproduce their
+    masks exactly and their energies to floating-point rounding, as the
+    potentials are added in a different order.
+    """
+
+    def __init__(
+        self,
+        M: int = 20,
+        alpha: float = 1e3,
+        engine: str = "loop",
+        precision: str | np.dtype | None = None,
+        cache: ConfinementCache | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        **sections: dict[str, Any],
+    ) -> None:
+        """
+        Args:
+            M (int, optional): Resolution. Defaults to 20.
+            alpha (float, optional): Confinement strength. Defaults to 1e3.
+            engine (str, optional): Engine of the confinement potential.
+                Defaults to "loop".
+            precision (str | np.dtype | None, optional): Precision of the
+                energy. Defaults to None.
+            cache (ConfinementCache | None, optional): Cache of the
+                confinement sums. Defaults to None.
+            max_bytes (int, optional): Memory budget of the confinement
+                engines (bytes). Defaults to `DEFAULT_MAX_BYTES`.
+            **sections (dict[str, Any]): Config sections to update, e.g.
+                `physics={"temperature": 0.1}` or `sweep={"frames": 11}`.
+        """
+        config = {
+            "physics": {"M": M, "alpha": alpha},
+            "sample": {},
+        }
+        for name, section in sections.items():
+            config[name] = {**config.get(name, {}), **section}
+        super().__init__(
+            config,
+            engine=engine,
+            precision=precision,
+            cache=cache,
+            max_bytes=max_bytes,
+        )
+
+    @cached_property
+    def x(self) -> np.ndarray:
+        """Pixel coordinates along the first axis."""
+        return np.arange(0, int(200e-6 / self.l_0), 1)
+
+    @cached_property
+    def y(self) -> np.ndarray:
+        """Pixel coordinates along the second axis."""
+        return np.arange(0, int(150e-6 / self.l_0), 1)
+
+    @property
+    def radius_gate(self) -> int:
+        """Radius of the disk (pixels)."""
+        return int(50e-6 / self.l_0)
+
+    @property
+    def center(self) -> tuple[int, int]:
+        """Center of the disk (pixels)."""
+        return self.x[len(self.x) // 2], self.y[len(self.y) // 2]
+
+    def _make_gate(self) -> Region:
+        x_center, y_center = self.center
+        return Annulus(
+            x_center,
+            y_center,
+            self.radius_gate,
+            self.radius_gate - int(25e-6 / self.l_0),
+        ) & HalfPlane("y", y_center, below=True)
+
+    def _make_space(self) -> Region:
+        x_center, y_center = self.center
+        return (
+            Disk(x_center, y_center, self.radius_gate) |
+            HalfPlane("y", y_center)
+        )
+
+
+class SimpleSample(_ExampleSample):
+    """
+    Preset of `examples/simple_sample`: the example sample without etching.
+
+    Nothing is computed on construction. The geometry, the masks, the
+    potentials and the energy are cached properties computed on first
+    access, see `Sample`:
+
+        sample = SimpleSample(M=20, engine="fft")
+        sweep_gate(sample.energy, sample.gate, sample.voltages, sample.E_F,
+                   sample.U_fluc, sample.layout.bulk)
+    """
+
+    @cached_property
+    def geometry(self) -> SampleGeometry:
+        """Geometry of the sample in pixel coordinates."""
+        return SampleGeometry(
+            shape=(len(self.x), len(self.y)),
+            space=self._make_space(),
+            gates=[("gate", self._make_gate())],
+        )
+
+
+class MultipleEtchedSample(_ExampleSample):
+    """
+    Preset of `examples/multiple_etched_sample`: the example sample with
+    nine shallowly etched rings in the lower half of the disk, whose
+    potential falls from 2.7 at the rim to 0.3 inwards in units of the unit
+    energy.
+
+    Nothing is computed on construction, see `SimpleSample`. The etching
+    potentials are in the "sample.potentials" section of the config, so
+    they can be changed with `potentials={"etched9": 0.5}` or scanned with
+    `edgecraft scan`.
+    """
+
+    def __init__(
+        self,
+        M: int = 20,
+        alpha: float = 1e3,
+        engine: str = "loop",
+        precision: str | np.dtype | None = None,
+        cache: ConfinementCache | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        potentials: dict[str, float] | None = None,
+        **sections: dict[str, Any],
+    ) -> None:
+        """
+        Args:
+            M (int, optional): Resolution. Defaults to 20.
+            alpha (float, optional): Confinement strength. Defaults to 1e3.
+            engine (str, optional): Engine of the confinement potential.
+                Defaults to "loop".
+            precision (str | np.dtype | None, optional): Precision of the
+                energy. Defaults to None.
+            cache (ConfinementCache | None, optional): Cache of the
+                confinement sums. Defaults to None.
+            max_bytes (int, optional): Memory budget of the confinement
+                engines (bytes). Defaults to `DEFAULT_MAX_BYTES`.
+            potentials (dict[str, float] | None, optional): Potentials of
+                the etched rings "etched1" to "etched9" to override.
+                Defaults to None.
+            **sections (dict[str, Any]): Config sections to update, e.g.
+                `physics={"temperature": 0.1}`.
+        """
+        # accumulated from the innermost ring as in the example script
+        U_etching = 0.3
+        defaults = {"etched9": U_etching}
+        for i in range(8, 0, -1):
+            U_etching = U_etching + 0.3
+            defaults[f"etched{i}"] = U_etching
+        sample = sections.pop("sample", {})
+        sample = {
+            **sample,
+            "potentials": {
+                **defaults,
+                **sample.get("potentials", {}),
+                **(potentials or {}),
+            },
+        }
+        super().__init__(
+            M=M,
+            alpha=alpha,
+            engine=engine,
+            precision=precision,
+            cache=cache,
+            max_bytes=max_bytes,
+            sample=sample,
+            **sections,
+        )
+
+    @cached_property
+    def geometry(self) -> SampleGeometry:
+        """Geometry of the sample in pixel coordinates."""
+        x_center, y_center = self.center
+        lower_half = HalfPlane("y", y_center, below=True)
+        return SampleGeometry(
+            shape=(len(self.x), len(self.y)),
+            space=self._make_space(),
+            # shallow etching regions 1-9, from the rim inwards
+            regions=[
+                (
+                    f"etched{i}",
+                    Annulus(
+                        x_center,
+                        y_center,
+                        self.radius_gate - int(outer / self.l_0),
+                        self.radius_gate - int(inner / self.l_0),
+                    ) & lower_half,
+                )
+                for i, (outer, inner) in enumerate(
+                    zip(ETCHING_STEPS[:-1], ETCHING_STEPS[1:]),
+                    1,
+                )
+            ],
+            gates=[("gate", self._make_gate())],
+        )
+
+
+PRESETS = {
+    "simple_sample": SimpleSample,
+    "multiple_etched_sample": MultipleEtchedSample,
+}
+"""Sample presets by the name of their example."""
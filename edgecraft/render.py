@@ -0,0 +1,714 @@
+import io
+import os
+import struct
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from .basic import find_edge
+from .indexset import IndexSet
+from .instrument import (
+    ProgressCallback,
+    StageStats,
+    _ProgressMeter,
+    get_recorder,
+    instrument,
+    stage,
+)
+from .store import SweepReader
+from .sweep import calc_gate_shift
+
+
+def make_lut(cmap: str = "viridis", n_colors: int = 256) -> np.ndarray:
+    """
+    Sample a matplotlib colormap into a lookup table.
+
+    Args:
+        cmap (str, optional): Name of the colormap. Defaults to "viridis".
+        n_colors (int, optional): Number of entries. Defaults to 256.
+
+    Returns:
+        np.ndarray: uint8 array of shape (n_colors, 3) with the RGB color of
+            each entry.
+    """
+    from matplotlib import colormaps
+
+    colors = colormaps[cmap](np.linspace(0, 1, n_colors))[:, :3]
+    return np.round(colors * 255).astype(np.uint8)
+
+
+def apply_lut(
+    values: np.ndarray,
+    lut: np.ndarray,
+    vmin: float,
+    vmax: float,
+) -> np.ndarray:
+    """
+    Map values to RGB colors with a lookup table.
+
+    Args:
+        values (np.ndarray): Array of values. NaN maps to the first entry.
+        lut (np.ndarray): uint8 array of shape (n_colors, 3), see `make_lut`.
+        vmin (float): Value of the first entry.
+        vmax (float): Value of the last entry.
+
+    Returns:
+        np.ndarray: uint8 array of the shape of `values` plus a last axis of
+            the 3 color channels.
+    """
+    n_colors = len(lut)
+    scaled = (np.asarray(values, dtype=np.float64) - vmin) / (vmax - vmin)
+    index = np.nan_to_num(scaled * (n_colors - 1), nan=0.0)
+    index = np.clip(index, 0, n_colors - 1).astype(np.intp)
+    return lut[index]
+
+
+def _blend(
+    image: np.ndarray,
+    mask: np.ndarray,
+    color: tuple[int, int, int],
+    alpha: float = 1.0,
+) -> None:
+    """
+    Paint a color over the pixels of a mask in place.
+    """
+    color = np.asarray(color, dtype=np.float64)
+    image[mask] = np.round(
+        (1 - alpha) * image[mask] + alpha * color
+    ).astype(np.uint8)
+
+
+@dataclass(frozen=True)
+class FrameRenderer:
+    """
+    Headless renderer of sweep frames into RGB images with NumPy.
+
+    A frame has a map panel, showing the energy through the colormap (or the
+    edge if no energy is given) with the edge points and a scale bar on top,
+    and, if `cut_row` is set and the frame has an energy, a cut panel with
+    the energy along that row, the E_F +- U_fluc band and a dashed E_F line.
+    Rows are drawn from the bottom up, as `SweepAnimator` does.
+
+    Attributes:
+        energy_range (tuple[float, float] | None): Energies of the ends of
+            the colormap and of the cut panel axis. See `render_sweep` for
+            the default.
+        E_F (float | None): Fermi energy of the band and the line.
+        U_fluc (float | None): Half width of the band.
+        cut_row (int | None): Row of the energy cut.
+        lut (np.ndarray | None): Colormap lookup table, see `make_lut`.
+            Defaults to viridis.
+        edge_color (tuple[int, int, int]): Color of the edge points.
+        band_color (tuple[int, int, int]): Color of the band.
+        band_alpha (float): Opacity of the band.
+        line_color (tuple[int, int, int]): Color of the energy cut.
+        scale_bar (int | None): Length of the scale bar (pixels of the
+            grid), e.g. 10 um / l_0.
+        scale (int): Number of image pixels per grid pixel.
+        gap (int): Width of the white gap between the panels (image pixels).
+    """
+
+    energy_range: tuple[float, float] | None = None
+    E_F: float | None = None
+    U_fluc: float | None = None
+    cut_row: int | None = None
+    lut: np.ndarray | None = None
+    edge_color: tuple[int, int, int] = (255, 255, 255)
+    band_color: tuple[int, int, int] = (255, 0, 0)
+    band_alpha: float = 0.3
+    line_color: tuple[int, int, int] = (31, 119, 180)
+    scale_bar: int | None = None
+    scale: int = 1
+    gap: int = 8
+
+    def _render_map(
+        self,
+        edge: np.ndarray,
+        energy: np.ndarray | None,
+        lut: np.ndarray,
+    ) -> np.ndarray:
+        if energy is None:
+            image = apply_lut(edge, lut, 0, 1)
+        else:
+            image = apply_lut(energy, lut, *self.energy_range)
+            _blend(image, edge != 0, self.edge_color)
+        image = image[::-1]
+        if self.scale_bar:
+            nx, ny = edge.shape
+            thickness = max(1, nx // 100)
+            margin = max(1, nx // 40)
+            bar = np.zeros(edge.shape, dtype=bool)
+            bar[
+                nx - margin - thickness:nx - margin,
+                margin:margin + int(self.scale_bar),
+            ] = True
+            _blend(image, bar, self.edge_color)
+        return image
+
+    def _render_cut(self, cut: np.ndarray, height: int) -> np.ndarray:
+        vmin, vmax = self.energy_range
+        image = np.full((height, len(cut), 3), 255, dtype=np.uint8)
+        columns = np.arange(len(cut))
+
+        def to_row(energy):
+            fraction = (np.asarray(energy, dtype=np.float64) - vmin) / (
+                vmax - vmin
+            )
+            row = np.round((1 - fraction) * (height - 1))
+            return np.clip(np.nan_to_num(row, nan=height - 1), 0, height - 1)
+
+        rows = np.arange(height)[:, None]
+        if self.E_F is not None:
+            if self.U_fluc is not None:
+                top = to_row(self.E_F + self.U_fluc)
+                bottom = to_row(self.E_F - self.U_fluc)
+                band = np.broadcast_to(
+                    (top <= rows) & (rows <= bottom),
+                    image.shape[:2],
+                )
+                _blend(image, band, self.band_color, self.band_alpha)
+            dashes = (columns // 6) % 2 == 0
+            _blend(image, (rows == to_row(self.E_F)) & dashes, (0, 0, 0))
+
+        # connect the points of neighboring columns with vertical spans
+        points = to_row(cut)
+        following = np.append(points[1:], points[-1])
+        low = np.minimum(points, following)
+        high = np.maximum(points, following)
+        _blend(image, (low <= rows) & (rows <= high), self.line_color)
+        return image
+
+    def render(
+        self,
+        edge: np.ndarray,
+        energy: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        Render one frame.
+
+        Args:
+            edge (np.ndarray): 2D edge mask of the frame.
+            energy (np.ndarray | None, optional): 2D energy of the frame.
+                Defaults to None.
+
+        Returns:
+            np.ndarray: uint8 RGB image of shape (height, width, 3).
+        """
+        edge = np.asarray(edge)
+        if energy is not None and self.energy_range is None:
+            raise ValueError("Rendering the energy needs an energy range.")
+        lut = make_lut() if self.lut is None else self.lut
+        with stage("render", edge.size):
+            panels = [self._render_map(edge, energy, lut)]
+            if energy is not None and self.cut_row is not None:
+                panels.append(self._render_cut(
+                    np.asarray(energy)[self.cut_row],
+                    edge.shape[0],
+                ))
+            if self.scale > 1:
+                panels = [
+                    panel.repeat(self.scale, axis=0).repeat(
+                        self.scale,
+                        axis=1,
+                    )
+                    for panel in panels
+                ]
+            gap = np.full((panels[0].shape[0], self.gap, 3), 255, np.uint8)
+            for i in range(len(panels) - 1, 0, -1):
+                panels.insert(i, gap)
+            return np.concatenate(panels, axis=1)
+
+
+class FrameSource(Protocol):
+    """
+    Picklable sequence of sweep frames. Every worker process of
+    `render_sweep` receives a copy and reads its frames from it.
+    """
+
+    def __len__(self) -> int:
+        ...
+
+    def frame(self, index: int) -> tuple[np.ndarray, np.ndarray | None]:
+        """Return the edge and the energy, or None, of a frame."""
+        ...
+
+
+class StoreFrames:
+    """
+    Frames of a sweep store, read lazily from the store files in every
+    process.
+    """
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        """
+        Args:
+            directory (str | os.PathLike): Directory of the store.
+        """
+        self.directory = Path(directory)
+        self._reader = SweepReader(self.directory)
+
+    def __getstate__(self) -> dict:
+        return {"directory": self.directory}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["directory"])
+
+    def __len__(self) -> int:
+        return len(self._reader)
+
+    @property
+    def reader(self) -> SweepReader:
+        """Reader of the store."""
+        return self._reader
+
+    def frame(self, index: int) -> tuple[np.ndarray, np.ndarray | None]:
+        energy = (
+            self._reader.energy(index) if self._reader.has_energy else None
+        )
+        return self._reader.edge(index), energy
+
+
+class SweepFrames:
+    """
+    Frames of a gate sweep computed on demand from the base energy, without
+    a store. The energy of a frame is E = energy + V * gate, and its edge is
+    found as in `sweep_gate`.
+    """
+
+    def __init__(
+        self,
+        energy: np.ndarray,
+        gate: np.ndarray,
+        voltages: np.ndarray,
+        E_F: float,
+        U_fluc: float,
+        bulk: np.ndarray | IndexSet,
+    ) -> None:
+        """
+        Args:
+            energy (np.ndarray): 2D array of base energy values.
+            gate (np.ndarray): 2D gate mask, or 3D stack of gate masks with
+                the gate along the first axis.
+            voltages (np.ndarray): 1D array of gate voltages for a single
+                gate mask, or 2D array of shape (n_frames, n_gates) for a
+                stack of gate masks.
+            E_F (float): Fermi energy.
+            U_fluc (float): Energy fluctuation parameter.
+            bulk (np.ndarray | IndexSet): 2D array indicating bulk regions,
+                or index set of the bulk points.
+        """
+        self.energy = np.asarray(energy)
+        self.gate = np.asarray(gate)
+        self.voltages = np.asarray(voltages)
+        self.E_F = E_F
+        self.U_fluc = U_fluc
+        self.bulk = bulk.to_mask() if isinstance(bulk, IndexSet) else bulk
+
+    def __len__(self) -> int:
+        return len(self.voltages)
+
+    def frame(self, index: int) -> tuple[np.ndarray, np.ndarray]:
+        energy = calc_gate_shift(
+            self.gate,
+            self.voltages[index:index + 1],
+            dtype=self.energy.dtype,
+        )[0]
+        energy += self.energy
+        return find_edge(energy, self.E_F, self.U_fluc, self.bulk), energy
+
+
+def _encode_png(image: np.ndarray) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _skip_sub_blocks(data: bytes, pos: int) -> int:
+    while data[pos]:
+        pos += data[pos] + 1
+    return pos + 1
+
+
+def _encode_gif_frame(image: np.ndarray) -> bytes:
+    """
+    Encode an image as a GIF with Pillow and return its image descriptor,
+    with the global color table moved into a local one, and its image data.
+    """
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(image).quantize(256).save(buffer, format="GIF")
+    data = buffer.getvalue()
+    packed = data[10]
+    pos = 13
+    table = b""
+    if packed & 0x80:
+        size = 3 << ((packed & 0x07) + 1)
+        table = data[pos:pos + size]
+        pos += size
+    while data[pos] == 0x21:
+        # extensions of the single frame are replaced by our own
+        pos = _skip_sub_blocks(data, pos + 2)
+    if data[pos] != 0x2C:
+        raise ValueError("Pillow wrote a GIF without an image.")
+    left, top, width, height, local = struct.unpack(
+        "<HHHHB",
+        data[pos + 1:pos + 10],
+    )
+    pos += 10
+    if local & 0x80:
+        table = data[pos:pos + (3 << ((local & 0x07) + 1))]
+        pos += len(table)
+        flags = local
+    else:
+        flags = 0x80 | (local & 0x40) | (packed & 0x07)
+    start = pos
+    pos = _skip_sub_blocks(data, pos + 1)
+    descriptor = b"\x2c" + struct.pack(
+        "<HHHHB",
+        left,
+        top,
+        width,
+        height,
+        flags,
+    )
+    return descriptor + table + data[start:pos]
+
+
+class GifWriter:
+    """
+    Streaming writer of an animated GIF.
+
+    Every frame is quantized to its own 256 color palette and compressed by
+    Pillow as a single-frame GIF, which `encode` may run in a worker
+    process. Its image block is spliced into the output file as soon as it
+    is written, so no frames are held in memory. A writer used as a context
+    manager deletes the unterminated file if its block raises.
+
+    Attributes:
+        path (Path): Path of the GIF file.
+        duration (int): Display time of a frame (ms).
+        n_frames (int): Number of frames written.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        duration: int = 100,
+        loop: int = 0,
+    ) -> None:
+        """
+        Args:
+            path (str | os.PathLike): Path of the GIF file.
+            duration (int, optional): Display time of a frame (ms). Defaults
+                to 100.
+            loop (int, optional): Number of repetitions, 0 for endless.
+                Defaults to 0.
+        """
+        self.path = Path(path)
+        self.duration = duration
+        self.loop = loop
+        self.n_frames = 0
+        self._file = open(self.path, "wb")
+        self._size = None
+
+    encode = staticmethod(_encode_gif_frame)
+
+    def write_encoded(self, block: bytes) -> None:
+        """
+        Append a frame encoded by `encode`.
+
+        Args:
+            block (bytes): The encoded frame.
+        """
+        width, height = struct.unpack("<HH", block[5:9])
+        if self._size is None:
+            self._size = (width, height)
+            self._file.write(
+                b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0)
+            )
+            self._file.write(
+                b"\x21\xff\x0bNETSCAPE2.0\x03\x01" +
+                struct.pack("<H", self.loop) + b"\x00"
+            )
+        elif (width, height) != self._size:
+            raise ValueError(
+                f"Frame of size {(width, height)} does not match the GIF "
+                f"size {self._size}."
+            )
+        delay = max(1, round(self.duration / 10))
+        self._file.write(
+            b"\x21\xf9\x04\x04" + struct.pack("<H", delay) + b"\x00\x00"
+        )
+        self._file.write(block)
+        self.n_frames += 1
+
+    def write(self, image: np.ndarray) -> None:
+        """
+        Append a frame.
+
+        Args:
+            image (np.ndarray): uint8 RGB image of the frame.
+        """
+        self.write_encoded(self.encode(image))
+
+    def close(self) -> None:
+        """
+        Terminate the GIF and close the file.
+        """
+        if self._file.closed:
+            return
+        if self._size is None:
+            self._discard()
+            raise ValueError("GIF has no frames.")
+        self._file.write(b"\x3b")
+        self._file.close()
+
+    def _discard(self) -> None:
+        """
+        Close and delete the partial file.
+        """
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "GifWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.close()
+        elif not self._file.closed:
+            # an unterminated GIF must not hide the error
+            self._discard()
+
+
+class PngSequenceWriter:
+    """
+    Writer of the frames as numbered PNG files.
+
+    Attributes:
+        directory (Path): Directory of the files.
+        pattern (str): Format of the file names with the frame index.
+        n_frames (int): Number of frames written.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        pattern: str = "frame_{:05d}.png",
+    ) -> None:
+        """
+        Args:
+            directory (str | os.PathLike): Directory of the files, created
+                if it does not exist.
+            pattern (str, optional): Format of the file names with the frame
+                index. Defaults to "frame_{:05d}.png".
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pattern = pattern
+        self.n_frames = 0
+
+    encode = staticmethod(_encode_png)
+
+    def write_encoded(self, data: bytes) -> None:
+        """
+        Write a frame encoded by `encode`.
+
+        Args:
+            data (bytes): The encoded frame.
+        """
+        path = self.directory / self.pattern.format(self.n_frames)
+        path.write_bytes(data)
+        self.n_frames += 1
+
+    def write(self, image: np.ndarray) -> None:
+        """
+        Write a frame.
+
+        Args:
+            image (np.ndarray): uint8 RGB image of the frame.
+        """
+        self.write_encoded(self.encode(image))
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "PngSequenceWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+FrameWriter = GifWriter | PngSequenceWriter
+"""Writer taking encoded frames in order."""
+
+
+_worker_state = {}
+
+
+def _init_worker(
+    source: FrameSource,
+    renderer: FrameRenderer,
+    encode,
+    trace_memory: bool | None = None,
+) -> None:
+    _worker_state.update(
+        source=source,
+        renderer=renderer,
+        encode=encode,
+        trace_memory=trace_memory,
+    )
+
+
+def _render_encoded(index: int) -> bytes:
+    edge, energy = _worker_state["source"].frame(index)
+    image = _worker_state["renderer"].render(edge, energy)
+    with stage("encode", image.shape[0] * image.shape[1]):
+        return _worker_state["encode"](image)
+
+
+def _render_encoded_in_worker(
+    index: int,
+) -> tuple[bytes, dict[str, StageStats] | None]:
+    """
+    Render and encode a frame in a worker process, recording its stages if
+    the calling process is instrumented.
+    """
+    trace_memory = _worker_state["trace_memory"]
+    if trace_memory is None:
+        return _render_encoded(index), None
+    with instrument(trace_memory) as recorder:
+        data = _render_encoded(index)
+    return data, recorder.stages
+
+
+def _iter_encoded(
+    source: FrameSource,
+    renderer: FrameRenderer,
+    encode,
+    workers: int | None,
+    ahead: int | None,
+) -> Iterator[bytes]:
+    """
+    Yield the encoded frames in order, keeping at most `ahead` frames in
+    flight.
+    """
+    if workers == 0:
+        _init_worker(source, renderer, encode)
+        try:
+            for index in range(len(source)):
+                yield _render_encoded(index)
+        finally:
+            _worker_state.clear()
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    if ahead is None:
+        ahead = 4 * (workers or os.cpu_count() or 1)
+    recorder = get_recorder()
+
+    def collect(future):
+        data, stages = future.result()
+        if stages is not None:
+            recorder.merge(stages)
+        return data
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            source,
+            renderer,
+            encode,
+            None if recorder is None else recorder.trace_memory,
+        ),
+    ) as executor:
+        pending = deque()
+        for index in range(len(source)):
+            pending.append(executor.submit(_render_encoded_in_worker, index))
+            if len(pending) >= ahead:
+                yield collect(pending.popleft())
+        while pending:
+            yield collect(pending.popleft())
+
+
+def _default_energy_range(
+    energy: np.ndarray,
+    E_F: float | None,
+) -> tuple[float, float]:
+    if E_F is not None:
+        return (0.0, 2.5 * E_F)
+    low, high = np.nanpercentile(energy, [1, 99])
+    return (float(low), float(high if high > low else low + 1))
+
+
+def render_sweep(
+    source: FrameSource,
+    writer: FrameWriter,
+    renderer: FrameRenderer | None = None,
+    workers: int | None = None,
+    ahead: int | None = None,
+    progress: ProgressCallback | None = None,
+) -> int:
+    """
+    Render the frames of a sweep in a process pool and stream them into a
+    writer.
+
+    The workers read, render and encode the frames, and the calling process
+    only writes them in order. Within `edgecraft.instrument.instrument`,
+    the stages of the workers are merged into the recorder of the calling
+    process. At most `ahead` frames are in flight, so the
+    memory does not grow with the length of the sweep.
+
+    Args:
+        source (FrameSource): The frames, e.g. `StoreFrames` or
+            `SweepFrames`.
+        writer (FrameWriter): Writer of the encoded frames, e.g. a
+            `GifWriter`.
+        renderer (FrameRenderer | None, optional): Renderer of the frames.
+            If it has no energy range, the range is 0 to 2.5 E_F, or the
+            1st to 99th percentile of the first frame's energy without E_F.
+            Defaults to `FrameRenderer()`.
+        workers (int | None, optional): Number of worker processes. None
+            uses the number of CPUs, and 0 renders in the calling process.
+            Defaults to None.
+        ahead (int | None, optional): Maximum number of frames in flight.
+            Defaults to four per worker.
+        progress (ProgressCallback | None, optional): Function receiving
+            the progress after every written frame. Defaults to None.
+
+    Returns:
+        int: The number of frames written.
+    """
+    renderer = FrameRenderer() if renderer is None else renderer
+    n_frames = len(source)
+    if n_frames == 0:
+        return 0
+    if renderer.energy_range is None:
+        _, energy = source.frame(0)
+        if energy is not None:
+            renderer = replace(
+                renderer,
+                energy_range=_default_energy_range(energy, renderer.E_F),
+            )
+    if renderer.lut is None:
+        renderer = replace(renderer, lut=make_lut())
+
+    meter = _ProgressMeter(progress, n_frames)
+    for done, data in enumerate(
+        _iter_encoded(source, renderer, writer.encode, workers, ahead),
+        1,
+    ):
+        with stage("write"):
+            writer.write_encoded(data)
+        meter.update(done)
+    return n_frames
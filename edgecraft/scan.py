@@ -0,0 +1,200 @@
+from collections.abc import Callable, Mapping, Sequence
+from typing import Any
+
+import numpy as np
+
+from .instrument import (
+    ProgressCallback,
+    StageStats,
+    _ProgressMeter,
+    get_recorder,
+    instrument,
+    stage,
+)
+
+
+ScanFunction = Callable[
+    [dict[str, Any], dict[str, np.ndarray]],
+    Mapping[str, Any],
+]
+"""
+Function evaluating one parameter point from its parameters and the shared
+arrays, and returning its scalar (or fixed-shape) observables by name.
+"""
+
+_shared_arrays: dict[str, np.ndarray] = {}
+_shared_blocks: list = []
+
+
+def _attach_shared(specs: list[tuple[str, str, tuple, str]]) -> None:
+    """
+    Attach a worker process to the shared arrays as read-only views.
+    """
+    from multiprocessing import shared_memory
+
+    for name, block_name, shape, dtype in specs:
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        array.flags.writeable = False
+        _shared_blocks.append(block)
+        _shared_arrays[name] = array
+
+
+def _run_point(
+    func: ScanFunction,
+    index: int,
+    params: dict[str, Any],
+    trace_memory: bool | None,
+) -> tuple[int, dict[str, Any], dict[str, StageStats] | None]:
+    """
+    Evaluate a point in a worker process, recording its stages if the
+    calling process is instrumented, i.e. `trace_memory` is not None.
+    """
+    if trace_memory is None:
+        return index, dict(func(params, _shared_arrays)), None
+    with instrument(trace_memory) as recorder:
+        with stage("scan_point"):
+            result = dict(func(params, _shared_arrays))
+    return index, result, recorder.stages
+
+
+def _make_table(
+    points: Sequence[Mapping[str, Any]],
+    results: list[tuple[int, dict[str, Any]]],
+) -> np.ndarray:
+    """
+    Collect the parameters and the observables into a structured array.
+    """
+    columns = {"index": np.array([index for index, _ in results])}
+    param_names = list(points[0]) if points else []
+    result_names = list(results[0][1]) if results else []
+    for name in param_names:
+        if name in columns:
+            raise ValueError(f"Parameter name {name!r} is reserved.")
+        columns[name] = np.array([points[i][name] for i, _ in results])
+    for name in result_names:
+        if name in columns:
+            raise ValueError(
+                f"Observable {name!r} collides with a parameter name."
+            )
+        columns[name] = np.array([result[name] for _, result in results])
+
+    table = np.empty(
+        len(results),
+        dtype=[
+            (name, column.dtype, column.shape[1:])
+            for name, column in columns.items()
+        ],
+    )
+    for name, column in columns.items():
+        table[name] = column
+    return table
+
+
+def scan(
+    func: ScanFunction,
+    points: Sequence[Mapping[str, Any]],
+    shared: Mapping[str, np.ndarray] | None = None,
+    workers: int | None = None,
+    ordered: bool = True,
+    progress: ProgressCallback | None = None,
+) -> np.ndarray:
+    """
+    Evaluate a function at many parameter points in a process pool.
+
+    The shared arrays, such as a base energy, a confinement potential or
+    masks, are copied once into shared memory and handed to every call as
+    read-only views, so they are not pickled per point. The function must be
+    picklable, i.e. defined at module level.
+
+    Within `edgecraft.instrument.instrument`, every point is recorded as a
+    "scan_point" stage and the stages of the workers are merged into the
+    recorder of the calling process.
+
+    Args:
+        func (ScanFunction): Function called as `func(params, shared)` which
+            returns a mapping of observables by name.
+        points (Sequence[Mapping[str, Any]]): Parameters of each point. All
+            points must have the same names.
+        shared (Mapping[str, np.ndarray] | None, optional): Arrays shared by
+            all points. Defaults to None.
+        workers (int | None, optional): Number of worker processes. None uses
+            the number of CPUs, and 0 evaluates the points in the calling
+            process. Defaults to None.
+        ordered (bool, optional): Whether to return the rows in the order of
+            `points` instead of the order of completion. Defaults to True.
+        progress (ProgressCallback | None, optional): Function receiving
+            the progress after every completed point. Defaults to None.
+
+    Returns:
+        np.ndarray: Structured array with an "index" field giving the
+            position of the point in `points`, a field per parameter and a
+            field per observable.
+    """
+    points = [dict(point) for point in points]
+    if any(point.keys() != points[0].keys() for point in points):
+        raise ValueError("All points must have the same parameter names.")
+    shared = dict(shared or {})
+    recorder = get_recorder()
+    meter = _ProgressMeter(progress, len(points))
+
+    if workers == 0:
+        arrays = {
+            name: np.asarray(array)
+            for name, array in shared.items()
+        }
+        results = []
+        for index, params in enumerate(points):
+            with stage("scan_point"):
+                results.append((index, dict(func(params, arrays))))
+            meter.update(len(results))
+        return _make_table(points, results)
+
+    # imported here, as the process pool costs more to import than edgecraft
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from multiprocessing import shared_memory
+
+    blocks = []
+    try:
+        specs = []
+        for name, array in shared.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(
+                create=True,
+                size=max(array.nbytes, 1),
+            )
+            blocks.append(block)
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            view[...] = array
+            specs.append((name, block.name, array.shape, array.dtype.str))
+
+        results = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach_shared,
+            initargs=(specs,),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _run_point,
+                    func,
+                    index,
+                    params,
+                    None if recorder is None else recorder.trace_memory,
+                )
+                for index, params in enumerate(points)
+            ]
+            for future in as_completed(futures):
+                index, result, stages = future.result()
+                if stages is not None:
+                    recorder.merge(stages)
+                results.append((index, result))
+                meter.update(len(results))
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    if ordered:
+        results.sort(key=lambda result: result[0])
+    return _make_table(points, results)
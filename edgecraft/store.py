@@ -0,0 +1,363 @@
+import json
+import os
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+
+MANIFEST = "manifest.json"
+"""Name of the manifest file of a sweep store."""
+
+DEFAULT_CHUNK_FRAMES = 64
+"""Default number of frames per chunk file."""
+
+
+def _chunk_path(directory: Path, kind: str, chunk: int) -> Path:
+    return directory / f"{kind}_{chunk:05d}.npy"
+
+
+class SweepWriter:
+    """
+    Append-only store of the frames of a sweep.
+
+    Every frame's edge mask, optional energy snapshot and scalar observables
+    are written into memory-mapped .npy chunk files of `chunk_frames` frames
+    as they are produced, so a sweep never holds more than one chunk of
+    frames in memory. A JSON manifest records the layout and the number of
+    complete frames and is rewritten atomically whenever the store is
+    flushed, so a `SweepReader` sees a consistent sweep at any time.
+
+    Attributes:
+        directory (Path): Directory of the store.
+        shape (tuple[int, int]): Shape of a frame.
+        chunk_frames (int): Number of frames per chunk file.
+        energy_dtype (np.dtype | None): Type of the energy snapshots, or None
+            if they are not stored.
+        n_frames (int): Number of frames written.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        shape: tuple[int, int],
+        chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+        energy_dtype: np.dtype | None = None,
+        params: Mapping[str, Any] | None = None,
+        resume: bool = False,
+    ) -> None:
+        """
+        Args:
+            directory (str | os.PathLike): Directory of the store, created
+                if it does not exist.
+            shape (tuple[int, int]): Shape of a frame.
+            chunk_frames (int, optional): Number of frames per chunk file.
+                Defaults to `DEFAULT_CHUNK_FRAMES`.
+            energy_dtype (np.dtype | None, optional): Type of the energy
+                snapshots, or None to store no energy. Defaults to None.
+            params (Mapping[str, Any] | None, optional): JSON serializable
+                parameters of the sweep to record in the manifest. Defaults
+                to None.
+            resume (bool, optional): Whether to append to the frames of an
+                existing store instead of starting a new one. Defaults to
+                False.
+        """
+        if chunk_frames < 1:
+            raise ValueError("Chunk size must be at least one frame.")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.chunk_frames = int(chunk_frames)
+        self.energy_dtype = (
+            None if energy_dtype is None else np.dtype(energy_dtype)
+        )
+        self.params = dict(params or {})
+        self.n_frames = 0
+        self._scalar_names = None
+        self._chunk = None
+        self._memmaps = {}
+
+        manifest_path = self.directory / MANIFEST
+        if resume and manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text())
+            if tuple(manifest["shape"]) != self.shape:
+                raise ValueError(
+                    f"Store has frames of shape {tuple(manifest['shape'])}, "
+                    f"not {self.shape}."
+                )
+            self.chunk_frames = manifest["chunk_frames"]
+            self.energy_dtype = (
+                None if manifest["energy_dtype"] is None
+                else np.dtype(manifest["energy_dtype"])
+            )
+            self.params = manifest["params"]
+            self.n_frames = manifest["n_frames"]
+            self._scalar_names = manifest["scalars"]
+        else:
+            for kind in ("edges", "energy", "scalars"):
+                for path in self.directory.glob(f"{kind}_*.npy"):
+                    path.unlink()
+            self.flush()
+
+    def _open_chunk(self, chunk: int) -> None:
+        """
+        Map the files of a chunk, creating them if they do not exist.
+        """
+        self._close_chunk()
+        files = {"edges": (np.uint8, self.shape)}
+        if self.energy_dtype is not None:
+            files["energy"] = (self.energy_dtype, self.shape)
+        if self._scalar_names:
+            files["scalars"] = (
+                [(name, np.float64) for name in self._scalar_names],
+                (),
+            )
+        for kind, (dtype, shape) in files.items():
+            path = _chunk_path(self.directory, kind, chunk)
+            if path.exists():
+                self._memmaps[kind] = open_memmap(path, mode="r+")
+            else:
+                self._memmaps[kind] = open_memmap(
+                    path,
+                    mode="w+",
+                    dtype=dtype,
+                    shape=(self.chunk_frames, *shape),
+                )
+        self._chunk = chunk
+
+    def _close_chunk(self) -> None:
+        for memmap in self._memmaps.values():
+            memmap.flush()
+        self._memmaps = {}
+        self._chunk = None
+
+    def write_frames(
+        self,
+        edges: np.ndarray,
+        energy: np.ndarray | None = None,
+        **scalars: np.ndarray,
+    ) -> None:
+        """
+        Append a batch of frames.
+
+        Args:
+            edges (np.ndarray): 3D array of shape (n, nx, ny) with the edge
+                mask of each frame.
+            energy (np.ndarray | None, optional): 3D array of shape
+                (n, nx, ny) with the energy of each frame. Required if the
+                store keeps energy snapshots. Defaults to None.
+            **scalars (np.ndarray): 1D array of length n per scalar
+                observable. Every batch must have the same observables.
+        """
+        edges = np.asarray(edges)
+        n = len(edges)
+        if edges.shape[1:] != self.shape:
+            raise ValueError(
+                f"Frames of shape {edges.shape[1:]} do not match the store "
+                f"shape {self.shape}."
+            )
+        if (energy is None) != (self.energy_dtype is None):
+            raise ValueError(
+                "Energy snapshots must be given if and only if the store "
+                "keeps them."
+            )
+        names = list(scalars)
+        if self._scalar_names is None:
+            self._scalar_names = names
+            self._close_chunk()
+        elif names != self._scalar_names:
+            raise ValueError(
+                f"Scalars {names} do not match the scalars of the store "
+                f"{self._scalar_names}."
+            )
+
+        written = 0
+        while written < n:
+            chunk, offset = divmod(self.n_frames, self.chunk_frames)
+            if chunk != self._chunk:
+                self._open_chunk(chunk)
+            count = min(n - written, self.chunk_frames - offset)
+            frames = slice(written, written + count)
+            stored = slice(offset, offset + count)
+            self._memmaps["edges"][stored] = edges[frames]
+            if energy is not None:
+                self._memmaps["energy"][stored] = energy[frames]
+            for name, values in scalars.items():
+                self._memmaps["scalars"][name][stored] = np.broadcast_to(
+                    values,
+                    (n,),
+                )[frames]
+            written += count
+            self.n_frames += count
+            if offset + count == self.chunk_frames:
+                self.flush()
+
+    def write(
+        self,
+        edge: np.ndarray,
+        energy: np.ndarray | None = None,
+        **scalars: float,
+    ) -> None:
+        """
+        Append a single frame.
+
+        Args:
+            edge (np.ndarray): 2D edge mask of the frame.
+            energy (np.ndarray | None, optional): 2D energy of the frame.
+                Defaults to None.
+            **scalars (float): Value of each scalar observable.
+        """
+        self.write_frames(
+            np.asarray(edge)[None],
+            None if energy is None else np.asarray(energy)[None],
+            **{name: np.array([value]) for name, value in scalars.items()},
+        )
+
+    def truncate(self, n_frames: int) -> None:
+        """
+        Drop the frames from `n_frames` on, e.g. to resume a sweep from a
+        checkpoint. The dropped frames are overwritten by the next writes.
+
+        Args:
+            n_frames (int): Number of frames to keep.
+        """
+        if not 0 <= n_frames <= self.n_frames:
+            raise ValueError(
+                f"Cannot truncate {self.n_frames} frames to {n_frames}."
+            )
+        self.n_frames = n_frames
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the mapped chunk to disk and update the manifest.
+        """
+        for memmap in self._memmaps.values():
+            memmap.flush()
+        manifest = {
+            "version": 1,
+            "shape": list(self.shape),
+            "chunk_frames": self.chunk_frames,
+            "n_frames": self.n_frames,
+            "energy_dtype": (
+                None if self.energy_dtype is None else self.energy_dtype.str
+            ),
+            "scalars": self._scalar_names,
+            "params": self.params,
+        }
+        tmp = self.directory / f"{MANIFEST}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, self.directory / MANIFEST)
+
+    def close(self) -> None:
+        """
+        Flush the store and release the mapped chunk.
+        """
+        self.flush()
+        self._close_chunk()
+
+    def __enter__(self) -> "SweepWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SweepReader:
+    """
+    Lazy reader of a sweep store written by `SweepWriter`.
+
+    Chunk files are memory-mapped when a frame of them is first accessed, so
+    opening a frame only reads that frame from disk.
+
+    Attributes:
+        directory (Path): Directory of the store.
+        shape (tuple[int, int]): Shape of a frame.
+        chunk_frames (int): Number of frames per chunk file.
+        scalar_names (list[str]): Names of the scalar observables.
+        params (dict[str, Any]): Parameters recorded by the writer.
+        has_energy (bool): Whether the store keeps energy snapshots.
+    """
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        """
+        Args:
+            directory (str | os.PathLike): Directory of the store.
+        """
+        self.directory = Path(directory)
+        manifest = json.loads((self.directory / MANIFEST).read_text())
+        self.shape = tuple(manifest["shape"])
+        self.chunk_frames = manifest["chunk_frames"]
+        self.scalar_names = manifest["scalars"] or []
+        self.params = manifest["params"]
+        self.has_energy = manifest["energy_dtype"] is not None
+        self._n_frames = manifest["n_frames"]
+        self._chunks = {}
+
+    def __len__(self) -> int:
+        return self._n_frames
+
+    def _frame(self, kind: str, index: int) -> np.ndarray:
+        if not -self._n_frames <= index < self._n_frames:
+            raise IndexError(
+                f"Frame {index} is out of range for {self._n_frames} frames."
+            )
+        chunk, offset = divmod(index % self._n_frames, self.chunk_frames)
+        if (kind, chunk) not in self._chunks:
+            self._chunks[kind, chunk] = np.load(
+                _chunk_path(self.directory, kind, chunk),
+                mmap_mode="r",
+            )
+        return self._chunks[kind, chunk][offset]
+
+    def edge(self, index: int) -> np.ndarray:
+        """
+        Return the edge mask of a frame.
+
+        Args:
+            index (int): Index of the frame.
+
+        Returns:
+            np.ndarray: 2D read-only uint8 array mapped from disk.
+        """
+        return self._frame("edges", index)
+
+    def energy(self, index: int) -> np.ndarray:
+        """
+        Return the energy snapshot of a frame.
+
+        Args:
+            index (int): Index of the frame.
+
+        Returns:
+            np.ndarray: 2D read-only array mapped from disk.
+        """
+        if not self.has_energy:
+            raise ValueError("The store keeps no energy snapshots.")
+        return self._frame("energy", index)
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.edge(index)
+
+    def scalar(self, name: str) -> np.ndarray:
+        """
+        Return a scalar observable of all frames.
+
+        Args:
+            name (str): Name of the observable.
+
+        Returns:
+            np.ndarray: 1D array with the value of each frame.
+        """
+        if name not in self.scalar_names:
+            raise KeyError(f"Unknown scalar {name!r}.")
+        n_chunks = -(-self._n_frames // self.chunk_frames)
+        values = [
+            np.load(_chunk_path(self.directory, "scalars", chunk))[name]
+            for chunk in range(n_chunks)
+        ]
+        if not values:
+            return np.zeros(0)
+        return np.concatenate(values)[:self._n_frames]
@@ -0,0 +1,554 @@
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .basic import (
+    _calc_centroid_path_length,
+    _calc_edge_lengths,
+    _check_edge_rows,
+    find_edge,
+)
+from .confinement import DEFAULT_MAX_BYTES
+from .indexset import IndexSet
+from .instrument import ProgressCallback, _ProgressMeter, stage
+from .precision import _array_dtype, resolve_dtype
+from .store import SweepReader, SweepWriter
+
+
+def calc_gate_shift(
+    gate: np.ndarray,
+    voltages: np.ndarray,
+    dtype: np.dtype = np.float64,
+) -> np.ndarray:
+    """
+    Calculate the energy shift of each frame of a gate sweep.
+
+    Args:
+        gate (np.ndarray): 2D gate mask, or 3D stack of gate masks with the
+            gate along the first axis.
+        voltages (np.ndarray): 1D array of gate voltages for a single gate
+            mask, or 2D array of shape (n_frames, n_gates) for a stack of
+            gate masks.
+        dtype (np.dtype, optional): Floating point type of the shifts.
+            Defaults to np.float64.
+
+    Returns:
+        np.ndarray: 3D array of shape (n_frames, nx, ny) with the shift of
+            each frame.
+    """
+    gate = np.asarray(gate, dtype=dtype)
+    voltages = np.asarray(voltages, dtype=dtype)
+    if gate.ndim == 2:
+        return voltages.reshape(-1, 1, 1) * gate
+    if gate.ndim != 3 or voltages.ndim != 2:
+        raise ValueError(
+            "Gate stack must be 3D with 2D voltages of shape "
+            "(n_frames, n_gates)."
+        )
+    if voltages.shape[1] != gate.shape[0]:
+        raise ValueError(
+            f"Voltages have {voltages.shape[1]} gates, but the gate stack "
+            f"has {gate.shape[0]}."
+        )
+    return np.tensordot(voltages, gate, axes=1)
+
+
+class IncrementalGateSweep:
+    """
+    Edge evaluation of a gate sweep restricted to the pixels under the gate.
+
+    Only the pixels with a non-zero gate value change their energy during a
+    sweep, and `find_edge` decides the edge of every row on its own. The
+    window membership, the first lower bulk column and the centroid sums of
+    all other pixels are therefore computed once, and every frame only
+    re-evaluates the gate pixels and the rows containing them. The gate
+    pixels are evaluated in the floating point type of the energy.
+
+    Attributes:
+        rows (np.ndarray): Rows containing at least one gate pixel.
+    """
+
+    def __init__(
+        self,
+        energy: np.ndarray,
+        gate: np.ndarray,
+        E_F: float,
+        U_fluc: float,
+        bulk: np.ndarray | IndexSet,
+    ) -> None:
+        """
+        Args:
+            energy (np.ndarray): 2D array of base energy values.
+            gate (np.ndarray): 2D gate mask, or 3D stack of gate masks with
+                the gate along the first axis.
+            E_F (float): Fermi energy.
+            U_fluc (float): Energy fluctuation parameter.
+            bulk (np.ndarray | IndexSet): 2D array indicating bulk regions,
+                or index set of the bulk points.
+        """
+        if isinstance(bulk, IndexSet):
+            bulk = bulk.to_mask()
+        gate = np.asarray(gate, dtype=_array_dtype(energy))
+        if gate.ndim == 2:
+            changed = gate != 0
+        elif gate.ndim == 3:
+            changed = np.any(gate != 0, axis=0)
+        else:
+            raise ValueError("Gate must be a 2D mask or a 3D stack of masks.")
+        self._E_F = E_F
+        self._U_fluc = U_fluc
+        self._shape = energy.shape
+
+        pixels = np.nonzero(changed)
+        self._pixels = pixels
+        self._gate = gate[..., pixels[0], pixels[1]]
+        self._energy = energy[pixels]
+        self._bulk = (bulk == 1)[pixels]
+        self._cols = pixels[1]
+        self.rows, self._row_starts = np.unique(
+            pixels[0],
+            return_index=True,
+        )
+
+        # the part of every row which does not depend on the gate voltages
+        nx, ny = energy.shape
+        lower = (energy <= E_F + U_fluc) & ~changed
+        window = (E_F - U_fluc <= energy) & lower
+        counts = window.sum(axis=1)
+        sums = window @ np.arange(ny)
+        candidates = lower & (bulk == 1)
+        first = np.where(
+            candidates.any(axis=1),
+            candidates.argmax(axis=1),
+            ny,
+        )
+        self._static_counts = counts[self.rows]
+        self._static_sums = sums[self.rows]
+        self._static_first = first[self.rows]
+
+        fallback = (counts == 0) & (first < ny)
+        self._centroids = np.full(nx, np.nan)
+        self._centroids[counts > 0] = sums[counts > 0] / counts[counts > 0]
+        self._centroids[fallback] = first[fallback]
+
+        fallback[self.rows] = False
+        window[np.flatnonzero(fallback), first[fallback]] = True
+        self._static_edge = window
+
+    def _evaluate(
+        self,
+        voltages: np.ndarray,
+    ) -> tuple[np.ndarray, ...]:
+        """
+        Return the window membership of the gate pixels and the counts, the
+        column sums and the first lower bulk columns of the gate rows.
+        """
+        voltages = np.asarray(voltages, dtype=self._gate.dtype)
+        if self._gate.ndim == 1:
+            energy = voltages.reshape(-1, 1) * self._gate
+        else:
+            energy = voltages @ self._gate
+        energy += self._energy
+
+        lower = energy <= self._E_F + self._U_fluc
+        window = (self._E_F - self._U_fluc <= energy) & lower
+        shape = (len(energy), len(self.rows))
+        counts = np.broadcast_to(self._static_counts, shape)
+        sums = np.broadcast_to(self._static_sums, shape)
+        first = np.broadcast_to(self._static_first, shape)
+        if len(self.rows) > 0:
+            starts = self._row_starts
+            counts = counts + np.add.reduceat(
+                window,
+                starts,
+                axis=1,
+                dtype=np.int64,
+            )
+            sums = sums + np.add.reduceat(
+                window * self._cols,
+                starts,
+                axis=1,
+            )
+            first = np.minimum(
+                first,
+                np.minimum.reduceat(
+                    np.where(lower & self._bulk, self._cols, self._shape[1]),
+                    starts,
+                    axis=1,
+                ),
+            )
+        return window, counts, sums, first
+
+    def _evaluate_rows(
+        self,
+        voltages: np.ndarray,
+    ) -> tuple[np.ndarray, ...]:
+        """
+        Return the counts, the column sums and the first lower bulk columns
+        of the gate rows.
+        """
+        return self._evaluate(voltages)[1:]
+
+    def calc_edge_lengths(
+        self,
+        voltages: np.ndarray,
+        pixel_x: int = 1,
+        pixel_y: int = 1,
+        first_frame: int = 0,
+    ) -> np.ndarray:
+        """
+        Calculate the edge length at each gate voltage.
+
+        Args:
+            voltages (np.ndarray): 1D array of gate voltages for a single
+                gate mask, or 2D array of shape (n_frames, n_gates) for a
+                stack of gate masks.
+            pixel_x (int, optional): Size of a pixel in the x-direction.
+                Defaults to 1.
+            pixel_y (int, optional): Size of a pixel in the y-direction.
+                Defaults to 1.
+            first_frame (int, optional): Index of the first frame in error
+                messages. Defaults to 0.
+
+        Returns:
+            np.ndarray: 1D array with the edge length of each frame.
+        """
+        with stage("edge_length", len(voltages) * len(self._energy)):
+            counts, sums, first = self._evaluate_rows(voltages)
+            centroids = np.tile(self._centroids, (len(counts), 1))
+            centroids[:, self.rows] = np.where(
+                counts > 0,
+                sums / np.maximum(counts, 1),
+                np.where(first < self._shape[1], first, np.nan),
+            )
+            _check_edge_rows(np.isnan(centroids), first_frame)
+            return _calc_centroid_path_length(centroids, pixel_x, pixel_y)
+
+    def find_edges(
+        self,
+        voltages: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Identify the edge at each gate voltage, as `find_edge` does.
+
+        Args:
+            voltages (np.ndarray): 1D array of gate voltages for a single
+                gate mask, or 2D array of shape (n_frames, n_gates) for a
+                stack of gate masks.
+
+        Returns:
+            np.ndarray: 3D uint8 array with the edge of each frame.
+        """
+        with stage("find_edge", len(voltages) * len(self._energy)):
+            window, counts, _, first = self._evaluate(voltages)
+            edges = np.empty((len(window), *self._shape), dtype=np.uint8)
+            edges[:] = self._static_edge
+            edges[:, self._pixels[0], self._pixels[1]] = window
+
+            frames, rows = np.nonzero((counts == 0) & (first < self._shape[1]))
+            edges[frames, self.rows[rows], first[frames, rows]] = 1
+            return edges
+
+
+DEFAULT_CHECKPOINT_FRAMES = 1000
+"""Default number of frames between two checkpoints of `sweep_gate`."""
+
+
+def _make_sweep_hash(*params) -> str:
+    """
+    Return the SHA-256 digest of the arrays and values defining a sweep.
+    """
+    digest = hashlib.sha256()
+    for param in params:
+        if isinstance(param, np.ndarray):
+            digest.update(repr((param.dtype.str, param.shape)).encode())
+            digest.update(np.ascontiguousarray(param).tobytes())
+        else:
+            digest.update(repr(param).encode())
+    return digest.hexdigest()
+
+
+def _save_checkpoint(
+    path: Path,
+    param_hash: str,
+    frame: int,
+    edge_lengths: np.ndarray | None,
+    edges: np.ndarray | None,
+) -> None:
+    """
+    Atomically replace the checkpoint with the results of the first `frame`
+    frames. Results given as None are not saved.
+    """
+    arrays = {
+        "param_hash": np.array(param_hash),
+        "frame": np.array(frame),
+    }
+    if edge_lengths is not None:
+        arrays["edge_lengths"] = edge_lengths[:frame]
+    if edges is not None:
+        arrays["edges"] = edges[:frame]
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+def _load_checkpoint(
+    path: Path,
+    param_hash: str,
+    edge_lengths: np.ndarray | None,
+    edges: np.ndarray | None,
+) -> int:
+    """
+    Restore the results of a checkpoint, if it exists, and return the frame
+    to resume from. Results given as None are not restored.
+    """
+    if not path.exists():
+        return 0
+    with np.load(path) as checkpoint:
+        if str(checkpoint["param_hash"]) != param_hash:
+            raise ValueError(
+                f"Checkpoint {path} belongs to a sweep with different "
+                "parameters. Remove it to start over."
+            )
+        frame = int(checkpoint["frame"])
+        if edge_lengths is not None:
+            edge_lengths[:frame] = checkpoint["edge_lengths"]
+        if edges is not None:
+            edges[:frame] = checkpoint["edges"]
+    return frame
+
+
+def sweep_gate(
+    energy: np.ndarray,
+    gate: np.ndarray,
+    voltages: np.ndarray,
+    E_F: float,
+    U_fluc: float,
+    bulk: np.ndarray | IndexSet,
+    pixel_x: int = 1,
+    pixel_y: int = 1,
+    return_edges: bool = False,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    incremental: bool = False,
+    dtype: np.dtype | str | None = None,
+    writer: SweepWriter | None = None,
+    checkpoint: str | os.PathLike | None = None,
+    checkpoint_every: int = DEFAULT_CHECKPOINT_FRAMES,
+    progress: ProgressCallback | None = None,
+) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate the edge length at each voltage of a gate sweep.
+
+    The energy is linear in the gate voltages, E(V) = energy + V * gate, so
+    every frame is evaluated from the base energy instead of accumulating
+    voltage steps. The frames are built in batches whose size keeps the
+    temporary energy stack within `max_bytes`. In the incremental mode, only
+    the pixels under the gate and their rows are re-evaluated for every
+    frame, see `IncrementalGateSweep`. The base energy is not modified.
+
+    A float32 `dtype` runs the frames, the centroids and the edge lengths in
+    single precision, which halves the memory traffic of large sweeps. Use
+    `edgecraft.precision.compare_precision` to check the deviation from a
+    float64 run.
+
+    With a `writer`, the edge of every frame, its energy if the writer keeps
+    energy snapshots, and the scalars "edge_length" and "voltage" (or
+    "voltage_0", "voltage_1", ... for a stack of gates) are streamed to the
+    store batch by batch.
+
+    With a `checkpoint` path, the frame index, the results so far and a hash
+    of all parameters are saved to an .npz file after the batch completing
+    every `checkpoint_every` frames and at the end. A call with the same
+    parameters resumes after the last saved frame and returns bit-identical
+    results. The energy of a frame is a function of the base energy and its
+    voltage, so the hash of the base energy stands for the energy state.
+    With a writer, the store already holds the results, so the checkpoint
+    only saves the frame index and the hash. The writer is flushed before
+    every checkpoint, and truncated to the checkpoint and read back when
+    resuming, so it should be opened with `resume=True`.
+
+    The `progress` callback receives the completed frames, the frame rate
+    and the estimated remaining time after every batch. Within
+    `edgecraft.instrument.instrument`, the gate shifts, edge finding, edge
+    lengths, store writes and checkpoints are recorded as stages.
+
+    Args:
+        energy (np.ndarray): 2D array of base energy values.
+        gate (np.ndarray): 2D gate mask, or 3D stack of gate masks with the
+            gate along the first axis.
+        voltages (np.ndarray): 1D array of gate voltages for a single gate
+            mask, or 2D array of shape (n_frames, n_gates) for a stack of
+            gate masks.
+        E_F (float): Fermi energy.
+        U_fluc (float): Energy fluctuation parameter.
+        bulk (np.ndarray | IndexSet): 2D array indicating bulk regions, or
+            index set of the bulk points.
+        pixel_x (int, optional): Size of a pixel in the x-direction.
+            Defaults to 1.
+        pixel_y (int, optional): Size of a pixel in the y-direction.
+            Defaults to 1.
+        return_edges (bool, optional): Whether to return the edge of every
+            frame as well. Defaults to False.
+        max_bytes (int, optional): Memory budget of the energy batches
+            (bytes). Defaults to `DEFAULT_MAX_BYTES`.
+        incremental (bool, optional): Whether to re-evaluate only the pixels
+            under the gate. Defaults to False.
+        dtype (np.dtype | str | None, optional): Floating point type of the
+            sweep, one of `edgecraft.precision.PRECISIONS`. None uses the
+            type of `energy`. Defaults to None.
+        writer (SweepWriter | None, optional): Store to append the frames
+            to. Defaults to None.
+        checkpoint (str | os.PathLike | None, optional): Path of the
+            checkpoint file. Defaults to None.
+        checkpoint_every (int, optional): Number of frames between two
+            checkpoints. Defaults to `DEFAULT_CHECKPOINT_FRAMES`.
+        progress (ProgressCallback | None, optional): Function receiving
+            the progress after every batch. Defaults to None.
+
+    Returns:
+        np.ndarray | tuple[np.ndarray, np.ndarray]: 1D array with the edge
+            length of each frame and, if `return_edges` is True, 3D uint8
+            array with the edge of each frame.
+
+    Raises:
+        ValueError: If the checkpoint belongs to a sweep with different
+            parameters, or the writer holds fewer frames than the checkpoint.
+    """
+    if isinstance(bulk, IndexSet):
+        bulk = bulk.to_mask()
+    dtype = _array_dtype(energy) if dtype is None else resolve_dtype(dtype)
+    energy = np.asarray(energy, dtype=dtype)
+    voltages = np.asarray(voltages, dtype=float)
+    n_frames = len(voltages)
+    batch = max(1, max_bytes // max(energy.nbytes, 1))
+
+    edge_lengths = np.empty(n_frames, dtype=dtype)
+    edges = (
+        np.empty((n_frames, *energy.shape), dtype=np.uint8)
+        if return_edges else None
+    )
+    if incremental:
+        with stage("sweep_setup", energy.size):
+            tracker = IncrementalGateSweep(energy, gate, E_F, U_fluc, bulk)
+        if not return_edges and writer is None:
+            # a frame only holds the gate pixels and a centroid per row
+            n = tracker._energy.size + energy.shape[0]
+            batch = max(1, max_bytes // (32 * n))
+
+    resume = 0
+    if checkpoint is not None:
+        if checkpoint_every < 1:
+            raise ValueError("Checkpoint interval must be at least one frame.")
+        checkpoint = Path(checkpoint)
+        param_hash = _make_sweep_hash(
+            energy,
+            np.asarray(gate),
+            voltages,
+            E_F,
+            U_fluc,
+            np.asarray(bulk),
+            pixel_x,
+            pixel_y,
+            return_edges,
+            incremental,
+            dtype.str,
+            writer is not None,
+        )
+        # the store already holds the results of a sweep with a writer
+        checkpointed = (None, None) if writer is not None else (
+            edge_lengths,
+            edges,
+        )
+        resume = _load_checkpoint(checkpoint, param_hash, *checkpointed)
+        if writer is not None:
+            if writer.n_frames < resume:
+                raise ValueError(
+                    f"Writer holds {writer.n_frames} frames, but the "
+                    f"checkpoint is at frame {resume}."
+                )
+            writer.truncate(resume)
+            if resume > 0:
+                reader = SweepReader(writer.directory)
+                edge_lengths[:resume] = reader.scalar("edge_length")[:resume]
+                if edges is not None:
+                    for i in range(resume):
+                        edges[i] = reader.edge(i)
+        saved = resume
+
+    meter = _ProgressMeter(progress, n_frames, resume)
+    for start in range(resume, n_frames, batch):
+        stop = min(start + batch, n_frames)
+        frames = None
+        batch_edges = None
+        if incremental:
+            edge_lengths[start:stop] = tracker.calc_edge_lengths(
+                voltages[start:stop],
+                pixel_x,
+                pixel_y,
+                first_frame=start,
+            )
+            if edges is not None or writer is not None:
+                batch_edges = tracker.find_edges(voltages[start:stop])
+        else:
+            with stage("gate_shift", (stop - start) * energy.size):
+                frames = calc_gate_shift(
+                    gate,
+                    voltages[start:stop],
+                    dtype=dtype,
+                )
+                frames += energy
+            batch_edges = find_edge(frames, E_F, U_fluc, bulk)
+            edge_lengths[start:stop] = _calc_edge_lengths(
+                batch_edges,
+                pixel_x,
+                pixel_y,
+                first_frame=start,
+                dtype=dtype,
+            )
+
+        if edges is not None:
+            edges[start:stop] = batch_edges
+        if writer is not None:
+            if writer.energy_dtype is None:
+                frames = None
+            elif frames is None:
+                with stage("gate_shift", (stop - start) * energy.size):
+                    frames = calc_gate_shift(
+                        gate,
+                        voltages[start:stop],
+                        dtype=dtype,
+                    )
+                    frames += energy
+            if voltages.ndim == 1:
+                scalars = {"voltage": voltages[start:stop]}
+            else:
+                scalars = {
+                    f"voltage_{i}": voltages[start:stop, i]
+                    for i in range(voltages.shape[1])
+                }
+            with stage("write", batch_edges.size):
+                writer.write_frames(
+                    batch_edges,
+                    frames,
+                    edge_length=edge_lengths[start:stop],
+                    **scalars,
+                )
+
+        if checkpoint is not None and (
+            stop - saved >= checkpoint_every or stop == n_frames
+        ):
+            with stage("checkpoint"):
+                if writer is not None:
+                    writer.flush()
+                _save_checkpoint(checkpoint, param_hash, stop, *checkpointed)
+            saved = stop
+        meter.update(stop)
+
+    if writer is not None:
+        writer.flush()
+    if edges is not None:
+        return edge_lengths, edges
+    return edge_lengths
@@ -1,335 +1,58 @@
-import matplotlib.animation as animation
 import matplotlib.pyplot as plt
 import numpy as np
 
-from edgecraft import (
-    apply_confinement_potential,
-    apply_local_constant_potential,
-    apply_QH_energy,
-    calc_Landau_level_gap,
-    calc_edge_length,
-    calc_magneticfield_for_nu,
-    calc_thermal_energy,
-    calc_unit_length_energy,
-    find_edge,
-    true_circle_in,
-    e,
-)
+from edgecraft import MultipleEtchedSample, sweep_gate
+from edgecraft.plotting import SweepAnimator, calc_energy_cuts
 
 
-# Physical constants
-n = 1e15                                # m^-2
-B_0 = calc_magneticfield_for_nu(n, 1)   # T
-T = 40e-3                               # K
-
-# Calculate unit length and energy
-M = 20
-l_0, E_0 = calc_unit_length_energy(B_0, M)
-E_LL_gap = calc_Landau_level_gap(B_0, E_0)
-E_F = E_LL_gap / 2
-E_QH = E_F / 2
-U_thermal = calc_thermal_energy(T, E_0)
-U_disorder = (60e-6 * e) / E_0
-U_fluc = U_disorder + U_thermal
-
-# Etching potentials
-U_etching9 = 0.3
-U_etching8 = U_etching9 + 0.3
-U_etching7 = U_etching8 + 0.3
-U_etching6 = U_etching7 + 0.3
-U_etching5 = U_etching6 + 0.3
-U_etching4 = U_etching5 + 0.3
-U_etching3 = U_etching4 + 0.3
-U_etching2 = U_etching3 + 0.3
-U_etching1 = U_etching2 + 0.3
-
-# Space matices
-radius_gate = int(50e-6 / l_0)
-x = np.arange(0, int(200e-6 / l_0), 1)
-y = np.arange(0, int(150e-6 / l_0), 1)
-Y, X = np.meshgrid(y, x)
-
-space_matrix = (
-    true_circle_in(Y, X, y[len(y) // 2], x[len(x) // 2], radius_gate) |
-    (Y >= y[len(y) // 2])
-).astype(int)
-diff_y = np.gradient(space_matrix, 1, axis=0)
-diff_x = np.gradient(space_matrix, 1, axis=1)
-
-# sample edge
-boundary = ((diff_x != 0) | (diff_y != 0)).astype(int)
-boundary_y = y[np.where(boundary == 1)[1]]
-boundary_x = x[np.where(boundary == 1)[0]]
-boundary_indices = np.array(np.where(boundary == 1)).T
-
-# bulk (space \ sample edge)
-bulk = np.copy(space_matrix)
-bulk[boundary == 1] = 0
-bulk_indices = np.array(np.where(bulk == 1)).T
-
-# vacuum
-vacuum = np.copy((~space_matrix.astype(bool)).astype(int))
-
-# shallow etching region 1
-etched1 = np.logical_xor(
-    true_circle_in(Y, X, y[len(y) // 2], x[len(x) // 2], radius_gate),
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(5e-6 / l_0),
-    ),
-).astype(int)
-etched1[Y >= y[len(y) // 2]] = 0
-etched1[boundary == 1] = 0
-etched1_indices = np.array(np.where(etched1 == 1)).T
-
-# shallow etching region 2
-etched2 = np.logical_xor(
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(5e-6 / l_0),
-    ),
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(9e-6 / l_0),
-    ),
-).astype(int)
-etched2[Y >= y[len(y) // 2]] = 0
-etched2[boundary == 1] = 0
-etched2[etched1 == 1] = 0
-etched2_indices = np.array(np.where(etched2 == 1)).T
-
-# shallow etching region 3
-etched3 = np.logical_xor(
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(9e-6 / l_0),
-    ),
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(11e-6 / l_0),
-    ),
-).astype(int)
-etched3[Y >= y[len(y) // 2]] = 0
-etched3[boundary == 1] = 0
-etched3[etched1 == 1] = 0
-etched3[etched2 == 1] = 0
-etched3_indices = np.array(np.where(etched3 == 1)).T
-
-# shallow etching region 4
-etched4 = np.logical_xor(
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(11e-6 / l_0),
-    ),
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(13e-6 / l_0),
-    ),
-).astype(int)
-etched4[Y >= y[len(y) // 2]] = 0
-etched4[boundary == 1] = 0
-etched4[etched1 == 1] = 0
-etched4[etched2 == 1] = 0
-etched4[etched3 == 1] = 0
-etched4_indices = np.array(np.where(etched4 == 1)).T
-
-# shallow etching region 5
-etched5 = np.logical_xor(
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(13e-6 / l_0),
-    ),
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(15e-6 / l_0),
-    ),
-).astype(int)
-etched5[Y >= y[len(y) // 2]] = 0
-etched5[boundary == 1] = 0
-etched5[etched1 == 1] = 0
-etched5[etched2 == 1] = 0
-etched5[etched3 == 1] = 0
-etched5[etched4 == 1] = 0
-etched5_indices = np.array(np.where(etched5 == 1)).T
-
-# shallow etching region 6
-etched6 = np.logical_xor(
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(15e-6 / l_0),
-    ),
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(17e-6 / l_0),
-    ),
-).astype(int)
-etched6[Y >= y[len(y) // 2]] = 0
-etched6[boundary == 1] = 0
-etched6[etched1 == 1] = 0
-etched6[etched2 == 1] = 0
-etched6[etched3 == 1] = 0
-etched6[etched4 == 1] = 0
-etched6[etched5 == 1] = 0
-etched6_indices = np.array(np.where(etched6 == 1)).T
-
-# shallow etching region 7
-etched7 = np.logical_xor(
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(17e-6 / l_0),
-    ),
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(19e-6 / l_0),
-    ),
-).astype(int)
-etched7[Y >= y[len(y) // 2]] = 0
-etched7[boundary == 1] = 0
-etched7[etched1 == 1] = 0
-etched7[etched2 == 1] = 0
-etched7[etched3 == 1] = 0
-etched7[etched4 == 1] = 0
-etched7[etched5 == 1] = 0
-etched7[etched6 == 1] = 0
-etched7_indices = np.array(np.where(etched7 == 1)).T
-
-# shallow etching region 8
-etched8 = np.logical_xor(
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(19e-6 / l_0),
-    ),
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(21e-6 / l_0),
-    ),
-).astype(int)
-etched8[Y >= y[len(y) // 2]] = 0
-etched8[boundary == 1] = 0
-etched8[etched1 == 1] = 0
-etched8[etched2 == 1] = 0
-etched8[etched3 == 1] = 0
-etched8[etched4 == 1] = 0
-etched8[etched5 == 1] = 0
-etched8[etched6 == 1] = 0
-etched8[etched7 == 1] = 0
-etched8_indices = np.array(np.where(etched8 == 1)).T
-
-# shallow etching region 9
-etched9 = np.logical_xor(
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(21e-6 / l_0),
-    ),
-    true_circle_in(
-        Y, X, y[len(y) // 2], x[len(x) // 2],
-        radius_gate - int(23e-6 / l_0),
-    ),
-).astype(int)
-etched9[Y >= y[len(y) // 2]] = 0
-etched9[boundary == 1] = 0
-etched9[etched1 == 1] = 0
-etched9[etched2 == 1] = 0
-etched9[etched3 == 1] = 0
-etched9[etched4 == 1] = 0
-etched9[etched5 == 1] = 0
-etched9[etched6 == 1] = 0
-etched9[etched7 == 1] = 0
-etched9[etched8 == 1] = 0
-etched9_indices = np.array(np.where(etched9 == 1)).T
-
-# expansion gate
-gate = np.logical_xor(
-    true_circle_in(Y, X, y[len(y) // 2], x[len(x) // 2], radius_gate),
-    true_circle_in(
-        Y,
-        X,
-        y[len(y) // 2],
-        x[len(x) // 2],
-        radius_gate - int(25e-6 / l_0),
-    ),
-).astype(int)
-gate[Y >= y[len(y) // 2]] = 0
-gate[boundary == 1] = 0
-gate_indices = np.array(np.where(gate == 1)).T
-
-# Initial energy calculations
-alpha = 1e3
-energy = np.zeros_like(space_matrix, dtype=float)
-energy = apply_QH_energy(energy, E_QH, bulk_indices)
-energy = apply_confinement_potential(
-    energy,
-    bulk_indices,
-    boundary_indices,
-    alpha,
-)
-energy = apply_local_constant_potential(energy, U_etching1, etched1_indices)
-energy = apply_local_constant_potential(energy, U_etching2, etched2_indices)
-energy = apply_local_constant_potential(energy, U_etching3, etched3_indices)
-energy = apply_local_constant_potential(energy, U_etching4, etched4_indices)
-energy = apply_local_constant_potential(energy, U_etching5, etched5_indices)
-energy = apply_local_constant_potential(energy, U_etching6, etched6_indices)
-energy = apply_local_constant_potential(energy, U_etching7, etched7_indices)
-energy = apply_local_constant_potential(energy, U_etching8, etched8_indices)
-energy = apply_local_constant_potential(energy, U_etching9, etched9_indices)
-
-
-fig, axes = plt.subplots(1, 2)
-fig.set_size_inches(9, 4)
-cbar = None
+# The geometry, the potentials and the energy are computed on first use
+sample = MultipleEtchedSample(M=20)
 frames = 101
-E_gate_min = 0
-E_gate_max = E_F
-E_gate_step = (E_gate_max - E_gate_min) / (frames - 1)
-edge_lengths = []
 
 
-def plot_anim(index: int) -> None:
-    global cbar
-    global energy
-
-    if cbar is not None:
-        cbar.remove()
-    axes[0].cla()
-    axes[1].cla()
+if __name__ == "__main__":
+    M = sample.physics["M"]
+    l_0 = sample.l_0
+    E_F = sample.E_F
+    U_fluc = sample.U_fluc
+    x = sample.x
+    y = sample.y
+    energy = sample.energy
+    gate = sample.gate
+    gate_potential = np.linspace(0, E_F, frames)
+
+    edge_lengths, edges = sweep_gate(
+        energy,
+        gate,
+        gate_potential,
+        E_F,
+        U_fluc,
+        sample.layout.bulk,
+        return_edges=True,
+    )
 
-    if index > 0:
-        energy = apply_local_constant_potential(
+    fig = plt.figure(figsize=(9, 4), layout="constrained")
+    animator = SweepAnimator(
+        edges,
+        energy_cuts=calc_energy_cuts(
             energy,
-            E_gate_step,
-            gate_indices,
-        )
-
-    edge = find_edge(energy, E_F, U_fluc, bulk)
-    if len(edge_lengths) == index:
-        edge_lengths.append(calc_edge_length(edge))
+            gate,
+            gate_potential,
+            len(x) // 2,
+        ),
+        E_F=E_F,
+        U_fluc=U_fluc,
+        x=x,
+        y=y,
+        figure=fig,
+    )
+    axes = animator.axes
 
     # edge 2D plot
-    cplot = axes[0].pcolor(
-        y,
-        x,
-        edge,
-        shading="nearest",
-    )
-    axes[0].set_aspect("equal")
     axes[0].set_xlabel("$Y$  ($" + f"{M:d}" + " l_B$)")
     axes[0].set_ylabel("$X$  ($" + f"{M:d}" + " l_B$)")
-    axes[0].set_title(f"step: {index}")
-    cbar = fig.colorbar(cplot, orientation="vertical")
 
     # energy 1D plot
-    axes[1].plot(
-        y,
-        energy[len(x) // 2, :],
-        label="single electron energy",
-    )
-    axes[1].axhline(
-        E_F,
-        color="black",
-        linestyle="dashed",
-        label="$E_\mathrm{F}$",
-    )
-    axes[1].axhspan(E_F - U_fluc, E_F + U_fluc, color="red", alpha=0.3)
     axes[1].hlines(1.5, 130, 130 + 10e-6 / l_0, color="black", linewidth=3)
     axes[1].text(120, 2.5, "10 $\mathrm{\mu m}$")
     axes[1].set_xlim(101)
@@ -338,7 +61,5 @@ def plot_anim(index: int) -> None:
     axes[1].set_ylabel("Energy  ($e^2 / 4 \pi \epsilon l_0$)")
     axes[1].legend(fontsize=12)
 
-
-if __name__ == "__main__":
-    anim = animation.FuncAnimation(fig, plot_anim, interval=100, frames=frames)
+    anim = animator.animate(interval=100)
     anim.save("multiple_etched_sample.gif")
@@ -0,0 +1,11 @@
+import pytest
+
+from edgecraft import SimpleSample
+
+
+@pytest.fixture(scope="session")
+def sample() -> SimpleSample:
+    """
+    Simple example sample at a coarse resolution, with an 11 frame sweep.
+    """
+    return SimpleSample(M=60, engine="fft", sweep={"frames": 11})
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from edgecraft import (
+    SimpleSample,
+    apply_confinement_potential,
+    apply_QH_energy,
+    calc_edge_length,
+    find_edge,
+    find_edge_adaptive,
+    make_energy_function,
+)
+
+
+@pytest.mark.parametrize("tile", [4, 16])
+@pytest.mark.parametrize("fraction", [0.0, 0.4, 1.0])
+def test_adaptive_edge_matches_full_grid(
+    sample: SimpleSample,
+    tile: int,
+    fraction: float,
+) -> None:
+    layout = sample.layout
+    base_energy = apply_QH_energy(
+        np.zeros(layout.shape),
+        sample.E_QH,
+        layout.bulk,
+    )
+    base_energy += fraction * sample.E_F * sample.gate
+    alpha = sample.physics["alpha"]
+    energy = apply_confinement_potential(
+        base_energy.copy(),
+        sample.bulk_indices,
+        sample.boundary_indices,
+        alpha,
+        engine="tiled",
+    )
+    edge = find_edge(energy, sample.E_F, sample.U_fluc, layout.bulk)
+
+    result = find_edge_adaptive(
+        make_energy_function(
+            base_energy,
+            layout.bulk,
+            sample.boundary_indices,
+            alpha,
+        ),
+        layout.shape,
+        sample.E_F,
+        sample.U_fluc,
+        layout.bulk,
+        tile=tile,
+    )
+    np.testing.assert_array_equal(result.edge, edge)
+    np.testing.assert_array_equal(
+        result.energy[result.exact],
+        energy[result.exact],
+    )
+    assert result.n_evaluations == np.count_nonzero(result.exact)
+    assert result.calc_length() == calc_edge_length(edge)
+    assert result.n_evaluations < energy.size
+
+
+@pytest.mark.parametrize("tile", [0, 3, 12])
+def test_adaptive_edge_rejects_tile_size(tile: int) -> None:
+    with pytest.raises(ValueError):
+        find_edge_adaptive(np.zeros, (8, 8), 1.0, 0.1, np.ones((8, 8)), tile)
@@ -0,0 +1,232 @@
+import numpy as np
+import pytest
+
+from edgecraft import (
+    IndexSet,
+    MultipleEtchedSample,
+    apply_label_potential,
+    apply_local_constant_potential,
+    apply_QH_energy,
+    calc_edge_length,
+    calc_edge_lengths,
+    find_edge,
+)
+
+
+def make_mask() -> np.ndarray:
+    mask = np.zeros((4, 5), dtype=bool)
+    mask[1, 2] = mask[3, 0] = True
+    return mask
+
+
+@pytest.mark.parametrize(
+    "space",
+    [
+        make_mask(),
+        make_mask().astype(int),
+        make_mask().astype(float),
+        np.argwhere(make_mask()),
+        IndexSet.from_mask(make_mask()),
+    ],
+    ids=["bool", "int", "float", "indices", "indexset"],
+)
+def test_constant_potential_layouts(space) -> None:
+    expected = np.where(make_mask(), 2.5, 0.0)
+    energy = apply_local_constant_potential(np.zeros((4, 5)), 2.5, space)
+    np.testing.assert_array_equal(energy, expected)
+
+    frames = apply_QH_energy(np.zeros((4, 5)), np.array([1.0, 2.0]), space)
+    np.testing.assert_array_equal(frames, [expected / 2.5, 2 * expected / 2.5])
+
+
+def test_constant_potential_accumulates_repeated_indices() -> None:
+    energy = apply_local_constant_potential(
+        np.zeros((4, 5)),
+        1.0,
+        np.array([[1, 2], [1, 2]]),
+    )
+    assert energy[1, 2] == 2.0
+
+
+@pytest.mark.parametrize(
+    "space",
+    [
+        np.zeros((3, 5), dtype=bool),
+        np.zeros((4, 3), dtype=int),
+        np.zeros((2, 3, 2), dtype=int),
+    ],
+)
+def test_constant_potential_rejects_bad_layouts(space) -> None:
+    with pytest.raises(ValueError):
+        apply_local_constant_potential(np.zeros((4, 5)), 1.0, space)
+
+
+def test_constant_potential_rejects_ambiguous_array() -> None:
+    # an (N, 2) index array of the shape of the energy array
+    with pytest.raises(ValueError):
+        apply_local_constant_potential(
+            np.zeros((2, 2)),
+            1.0,
+            np.array([[0, 1], [1, 0]]),
+        )
+
+
+def find_edge_by_row(
+    energy: np.ndarray,
+    E_F: float,
+    U_fluc: float,
+    bulk: np.ndarray,
+) -> np.ndarray:
+    """
+    Reference `find_edge`, searching the fallback point row by row.
+    """
+    edge = np.zeros_like(energy)
+    upper = E_F - U_fluc <= energy
+    lower = energy <= E_F + U_fluc
+    edge[np.where(upper & lower)] = 1
+    for index_x in range(len(edge)):
+        if np.sum(edge[index_x, :]) != 0:
+            continue
+        for index_y, is_lower in enumerate(lower[index_x, :]):
+            if is_lower and (bulk[index_x, index_y] == 1):
+                edge[index_x, index_y] = 1
+                break
+    return edge
+
+
+def random_energy(seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return an energy array whose rows cover every case of `find_edge`, and a
+    bulk mask.
+    """
+    rng = np.random.default_rng(seed)
+    energy = rng.normal(1.0, 1.0, (30, 12))
+    energy[::3] += 5.0
+    energy[1::6] -= 5.0
+    bulk = (rng.random(energy.shape) < 0.7).astype(int)
+    bulk[2] = 0
+    return energy, bulk
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_find_edge_matches_row_loop(seed: int) -> None:
+    energy, bulk = random_energy(seed)
+    expected = find_edge_by_row(energy, 1.0, 0.2, bulk)
+    np.testing.assert_array_equal(find_edge(energy, 1.0, 0.2, bulk), expected)
+    np.testing.assert_array_equal(
+        find_edge(energy, 1.0, 0.2, IndexSet.from_mask(bulk)),
+        expected,
+    )
+
+
+def test_find_edge_of_stack() -> None:
+    energy, bulk = random_energy(0)
+    stack = np.stack([energy + shift for shift in (-1.0, 0.0, 0.5, 2.0)])
+    np.testing.assert_array_equal(
+        find_edge(stack, 1.0, 0.2, bulk),
+        [find_edge_by_row(frame, 1.0, 0.2, bulk) for frame in stack],
+    )
+
+
+def calc_edge_length_by_row(
+    edge: np.ndarray,
+    pixel_x: int = 1,
+    pixel_y: int = 1,
+) -> float:
+    """
+    Reference `calc_edge_length`, averaging the edge points row by row.
+    """
+    centeredge = np.zeros(len(edge))
+    for y in range(len(edge)):
+        for x in range(len(edge[y])):
+            centeredge[y] += x * edge[y, x]
+        centeredge[y] /= np.sum(edge[y])
+    dx = (centeredge[:-1] - centeredge[1:]) * pixel_x
+    return np.sqrt(dx**2 + pixel_y**2).sum() + pixel_y
+
+
+def random_edges(seed: int, n_frames: int = 4) -> np.ndarray:
+    edges = np.random.default_rng(seed).random((n_frames, 30, 12)) < 0.2
+    edges[..., 0] = True
+    return edges.astype(np.uint8)
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize(("pixel_x", "pixel_y"), [(1, 1), (3, 2)])
+def test_edge_length_matches_row_loop(
+    seed: int,
+    pixel_x: int,
+    pixel_y: int,
+) -> None:
+    edges = random_edges(seed)
+    expected = [
+        calc_edge_length_by_row(edge, pixel_x, pixel_y) for edge in edges
+    ]
+    assert [
+        calc_edge_length(edge, pixel_x, pixel_y) for edge in edges
+    ] == expected
+    np.testing.assert_array_equal(
+        calc_edge_lengths(edges, pixel_x, pixel_y),
+        expected,
+    )
+
+
+def test_edge_length_lists_empty_rows() -> None:
+    edges = random_edges(0)
+    edges[1, 4] = 0
+    with pytest.raises(ValueError, match=r"^Row 4 has no edge points\."):
+        calc_edge_length(edges[1])
+
+    edges[1, 7] = 0
+    edges[3, 0] = 0
+    with pytest.raises(ValueError, match=r"^Rows \[4, 7\] have no edge"):
+        calc_edge_length(edges[1])
+    with pytest.raises(
+        ValueError,
+        match=r"frame 1: rows \[4, 7\]; frame 3: rows \[0\]\.",
+    ):
+        calc_edge_lengths(edges)
+
+
+def test_edge_lengths_rejects_single_edge() -> None:
+    with pytest.raises(ValueError):
+        calc_edge_lengths(random_edges(0)[0])
+
+
+@pytest.mark.parametrize(("boundary", "vacuum"), [(0.0, 0.0), (-2.0, 7.5)])
+def test_label_potential_matches_region_potentials(
+    boundary: float,
+    vacuum: float,
+) -> None:
+    sample = MultipleEtchedSample(M=20)
+    layout = sample.layout
+    potentials = sample.config["sample"]["potentials"]
+    expected = np.zeros(layout.shape)
+    expected = apply_QH_energy(expected, sample.E_QH, layout.bulk)
+    for name, value in potentials.items():
+        expected = apply_local_constant_potential(
+            expected,
+            value,
+            layout.indices(layout.region(name)),
+        )
+    expected = apply_local_constant_potential(
+        expected,
+        boundary,
+        layout.boundary,
+    )
+    expected = apply_local_constant_potential(
+        expected,
+        vacuum,
+        layout.vacuum & ~layout.boundary,
+    )
+
+    table = layout.potential_table(
+        bulk=sample.E_QH,
+        regions=potentials,
+        boundary=boundary,
+        vacuum=vacuum,
+    )
+    np.testing.assert_array_equal(
+        apply_label_potential(np.zeros(layout.shape), layout.labels, table),
+        expected,
+    )
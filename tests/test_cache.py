@@ -0,0 +1,103 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from edgecraft import ConfinementCache, apply_confinement_potential
+
+
+def make_disk() -> tuple[np.ndarray, np.ndarray]:
+    X, Y = np.mgrid[:30, :24]
+    r2 = (X - 15)**2 + (Y - 12)**2
+    return np.argwhere(r2 < 9**2), np.argwhere((9**2 <= r2) & (r2 <= 10**2))
+
+
+def apply(cache: ConfinementCache, alpha: float = 1e3) -> np.ndarray:
+    bulk, boundary = make_disk()
+    return apply_confinement_potential(
+        np.zeros((30, 24)),
+        bulk,
+        boundary,
+        alpha,
+        engine="tiled",
+        cache=cache,
+    )
+
+
+def test_miss_then_hit(tmp_path: Path) -> None:
+    cache = ConfinementCache(tmp_path)
+    expected = apply(None)
+    np.testing.assert_array_equal(apply(cache), expected)
+    assert cache.stats() == {
+        "hits": 0,
+        "misses": 1,
+        "entries": 1,
+        "bytes": (tmp_path / os.listdir(tmp_path)[0]).stat().st_size,
+    }
+
+    # the sums do not depend on alpha
+    np.testing.assert_array_equal(apply(cache, 2e3), 2 * expected)
+    np.testing.assert_array_equal(apply(cache), expected)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+
+    # a hit reads the sums from the file
+    (path,) = tmp_path.glob("*.npy")
+    np.save(path, 3 * np.load(path))
+    np.testing.assert_allclose(apply(cache), 3 * expected, rtol=1e-15)
+
+
+def test_evicts_least_recently_used(tmp_path: Path) -> None:
+    sums = np.zeros(100)
+    cache = ConfinementCache(tmp_path)
+    cache.save("a", sums)
+    size = (tmp_path / "a.npy").stat().st_size
+    cache = ConfinementCache(tmp_path, max_bytes=2 * size)
+    cache.save("b", sums)
+    os.utime(tmp_path / "a.npy", (1000, 1000))
+    os.utime(tmp_path / "b.npy", (2000, 2000))
+
+    # loading "a" makes "b" the least recently used entry
+    assert cache.load("a") is not None
+    cache.save("c", sums)
+    assert sorted(path.stem for path in tmp_path.glob("*.npy")) == ["a", "c"]
+    assert cache.load("b") is None
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "entries": 2,
+        "bytes": 2 * size,
+    }
+
+
+def test_rejects_negative_size_cap(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        ConfinementCache(tmp_path, max_bytes=-1)
+
+
+def test_key_depends_on_every_input() -> None:
+    bulk, boundary = make_disk()
+    moved = boundary.copy()
+    moved[0, 0] += 1
+    args = {
+        "shape": (30, 24),
+        "bulk_indices": bulk,
+        "boundary_indices": boundary,
+        "dl": 1,
+        "engine": "tree",
+        "tolerance": 1e-4,
+        "dtype": None,
+    }
+    key = ConfinementCache.make_key(**args)
+    assert ConfinementCache.make_key(**args) == key
+    for name, value in [
+        ("shape", (30, 25)),
+        ("bulk_indices", bulk[1:]),
+        ("boundary_indices", moved),
+        ("dl", 0.5),
+        ("engine", "tiled"),
+        ("tolerance", 1e-5),
+        ("dtype", "float32"),
+    ]:
+        assert ConfinementCache.make_key(**{**args, name: value}) != key
@@ -0,0 +1,173 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from edgecraft import (
+    Sample,
+    SweepReader,
+    load_config,
+    set_config_value,
+    sweep_gate,
+)
+from edgecraft.cli import _changes_layout, main
+
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+@pytest.fixture
+def config_path(tmp_path: Path) -> Path:
+    config = load_config(EXAMPLES / "simple_sample" / "simple_sample.json")
+    config = set_config_value(config, "physics.M", 60)
+    config = set_config_value(config, "sweep.frames", 11)
+    config["scan"] = {"physics.alpha": [500.0, 2000.0]}
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(config))
+    return path
+
+
+def expected_edge_lengths(config_path: Path, **params) -> np.ndarray:
+    config = load_config(config_path)
+    for key, value in params.items():
+        config = set_config_value(config, key, value)
+    sample = Sample(config, engine="fft")
+    return sweep_gate(
+        sample.energy,
+        sample.gate,
+        sample.voltages,
+        sample.E_F,
+        sample.U_fluc,
+        sample.layout.bulk,
+    )
+
+
+@pytest.mark.parametrize(
+    ("key", "changes"),
+    [
+        ("physics.alpha", False),
+        ("physics.temperature", False),
+        ("sample.potentials.etched1", False),
+        ("sweep.frames", False),
+        ("physics.M", True),
+        ("physics", True),
+        ("sample.regions.etched1", True),
+        ("sample.gates.gate.regions", True),
+    ],
+)
+def test_changes_layout(key: str, changes: bool) -> None:
+    assert _changes_layout(key) == changes
+
+
+@pytest.mark.parametrize("workers", ["0", "2"])
+def test_scan(config_path: Path, tmp_path: Path, workers: str) -> None:
+    output = tmp_path / "scan.npy"
+    result = CliRunner().invoke(
+        main,
+        [
+            "--workers", workers,
+            "--engine", "fft",
+            "--report",
+            "scan", str(config_path),
+            "-o", str(output),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+    # the confinement sums are computed once, in the calling process
+    confinement = [
+        line for line in result.output.splitlines()
+        if line.startswith("confinement")
+    ]
+    assert len(confinement) == 1
+    assert confinement[0].split()[1] == "1"
+
+    table = np.load(output)
+    for row in table:
+        np.testing.assert_array_equal(
+            row["edge_lengths"],
+            expected_edge_lengths(config_path, **{
+                "physics.alpha": row["physics.alpha"],
+            }),
+        )
+
+
+def test_scan_of_geometry(config_path: Path, tmp_path: Path) -> None:
+    config = load_config(config_path)
+    config["scan"] = {"physics.M": [50, 60]}
+    config_path.write_text(json.dumps(config))
+    output = tmp_path / "scan.npy"
+    result = CliRunner().invoke(
+        main,
+        [
+            "--workers", "0",
+            "--engine", "fft",
+            "scan", str(config_path),
+            "-o", str(output),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    for row in np.load(output):
+        np.testing.assert_array_equal(
+            row["edge_lengths"],
+            expected_edge_lengths(config_path, **{
+                "physics.M": row["physics.M"],
+            }),
+        )
+
+
+def test_sweep_and_render(config_path: Path, tmp_path: Path) -> None:
+    runner = CliRunner()
+    store = tmp_path / "sweep"
+    result = runner.invoke(
+        main,
+        ["--engine", "fft", "sweep", str(config_path), "-o", str(store)],
+    )
+    assert result.exit_code == 0, result.output
+    reader = SweepReader(store)
+    np.testing.assert_array_equal(
+        reader.scalar("edge_length"),
+        expected_edge_lengths(config_path),
+    )
+
+    image = tmp_path / "edge_length.png"
+    result = runner.invoke(main, ["render", str(store), "-o", str(image)])
+    assert result.exit_code == 0, result.output
+    assert image.stat().st_size > 0
+
+
+def test_sweep_resume_of_other_config(
+    config_path: Path,
+    tmp_path: Path,
+) -> None:
+    runner = CliRunner()
+    store = tmp_path / "sweep"
+    args = ["--engine", "fft", "sweep", str(config_path), "-o", str(store)]
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0, result.output
+
+    config = set_config_value(load_config(config_path), "physics.alpha", 2e3)
+    config_path.write_text(json.dumps(config))
+    result = runner.invoke(main, args)
+    assert result.exit_code == 1
+    assert "different parameters" in result.output
+    assert "--no-resume" in result.output
+
+    result = runner.invoke(main, [*args, "--no-resume"])
+    assert result.exit_code == 0, result.output
+    np.testing.assert_array_equal(
+        SweepReader(store).scalar("edge_length"),
+        expected_edge_lengths(config_path),
+    )
+
+
+def test_sweep_rejects_workers(config_path: Path, tmp_path: Path) -> None:
+    result = CliRunner().invoke(
+        main,
+        ["--workers", "2", "sweep", str(config_path), "-o", str(tmp_path)],
+    )
+    assert result.exit_code == 2
+    assert "--workers" in result.output
+    assert not (tmp_path / "manifest.json").exists()
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from edgecraft import (
+    PRESETS,
+    Annulus,
+    Disk,
+    HalfPlane,
+    Sample,
+    load_config,
+    make_region,
+    set_config_value,
+)
+
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+def test_make_region_truncates_to_pixels() -> None:
+    assert make_region(
+        {"type": "disk", "x0": 1.9, "y0": 2.5, "radius": 0.99},
+        0.5,
+    ) == Disk(3, 5, 1)
+    assert make_region(
+        {"type": "annulus", "x0": 0, "y0": 0, "outer": 5, "inner": [5, -2.6]},
+        1,
+    ) == Annulus(0, 0, 5, 3)
+    assert make_region(
+        {"type": "half_plane", "axis": "y", "value": 3.5, "below": True},
+        1,
+    ) == HalfPlane("y", 3, True)
+
+
+def test_make_region_rejects_unknown_type() -> None:
+    with pytest.raises(ValueError):
+        make_region({"type": "hexagon"}, 1)
+
+
+@pytest.mark.parametrize("name", list(PRESETS))
+@pytest.mark.parametrize("M", [10, 20, 33, 60])
+def test_config_matches_preset(name: str, M: int) -> None:
+    config = load_config(EXAMPLES / name / f"{name}.json")
+    sample = Sample(set_config_value(config, "physics.M", M), engine="fft")
+    preset = PRESETS[name](M=M, engine="fft")
+
+    layout = sample.layout
+    expected = preset.layout
+    np.testing.assert_array_equal(layout.labels, expected.labels)
+    assert layout.names == expected.names
+    assert layout.gates.keys() == expected.gates.keys()
+    for gate in layout.gates:
+        np.testing.assert_array_equal(
+            layout.gates[gate],
+            expected.gates[gate],
+        )
+    np.testing.assert_allclose(
+        sample.energy,
+        preset.energy,
+        rtol=1e-12,
+        atol=1e-12,
+    )
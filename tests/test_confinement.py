@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from edgecraft import (
+    TREE_MIN_PAIRS,
+    calc_confinement_potentials,
+    calc_confinement_potentials_tree,
+    calc_confinement_sums,
+    find_boundary,
+)
+from edgecraft import confinement
+from edgecraft.confinement import FFT_RTOL
+
+
+def make_disk(nx: int, ny: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the bulk and boundary indices of a disk centered on the grid.
+    """
+    X, Y = np.mgrid[:nx, :ny]
+    space = (X - nx / 2)**2 + (Y - ny / 2)**2 <= (min(nx, ny) / 2.5)**2
+    boundary = find_boundary(space)
+    return np.argwhere(space & ~boundary), np.argwhere(boundary)
+
+
+@pytest.mark.parametrize("shape", [(7, 5), (40, 40), (31, 47)])
+@pytest.mark.parametrize("weighted", [False, True])
+def test_fft_matches_loop(shape: tuple[int, int], weighted: bool) -> None:
+    bulk, boundary = make_disk(*shape)
+    dl = np.random.default_rng(0).random(len(boundary)) if weighted else 1
+    loop = calc_confinement_sums(shape, bulk, boundary, dl, engine="loop")
+    fft = calc_confinement_sums(shape, bulk, boundary, dl, engine="fft")
+    np.testing.assert_allclose(fft, loop, rtol=0, atol=FFT_RTOL * loop.max())
+
+
+@pytest.mark.parametrize("max_bytes", [1, 2**10, 2**26])
+@pytest.mark.parametrize("weighted", [False, True])
+def test_tiled_matches_loop(max_bytes: int, weighted: bool) -> None:
+    shape = (31, 47)
+    bulk, boundary = make_disk(*shape)
+    dl = np.random.default_rng(0).random(len(boundary)) if weighted else 1
+    loop = calc_confinement_sums(shape, bulk, boundary, dl, engine="loop")
+    tiled = calc_confinement_sums(
+        shape,
+        bulk,
+        boundary,
+        dl,
+        engine="tiled",
+        max_bytes=max_bytes,
+    )
+    np.testing.assert_array_equal(tiled, loop)
+
+
+@pytest.mark.parametrize(
+    ("nx", "ny", "tolerance"),
+    [
+        (3, 3, 1e-4),
+        (5, 5, 1e-4),
+        (20, 20, 1e-6),
+        (60, 60, 1e-6),
+        (31, 47, 1e-4),
+        (101, 77, 1e-5),
+        (40, 40, 1e-8),
+        (40, 40, 1e-12),
+    ],
+)
+def test_tree_matches_tiled(nx: int, ny: int, tolerance: float) -> None:
+    bulk, boundary = make_disk(nx, ny)
+    sums, error = calc_confinement_potentials_tree(
+        bulk,
+        boundary,
+        tolerance=tolerance,
+    )
+    exact = calc_confinement_potentials(bulk, boundary)
+    assert error <= tolerance
+    np.testing.assert_allclose(sums, exact, rtol=tolerance)
+
+
+def test_tree_engine_matches_tiled_engine(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    bulk, boundary = make_disk(64, 48)
+    shape = (64, 48)
+    tiled = calc_confinement_sums(shape, bulk, boundary, engine="tiled")
+
+    # small grids fall back to the tiled engine
+    assert len(bulk) * len(boundary) < TREE_MIN_PAIRS
+    tree = calc_confinement_sums(shape, bulk, boundary, engine="tree")
+    np.testing.assert_array_equal(tree, tiled)
+
+    monkeypatch.setattr(confinement, "TREE_MIN_PAIRS", 0)
+    tree = calc_confinement_sums(shape, bulk, boundary, engine="tree")
+    assert not np.array_equal(tree, tiled)
+    np.testing.assert_allclose(tree, tiled, rtol=1e-4)
+
+
+def test_tree_excludes_own_pixel() -> None:
+    bulk, boundary = make_disk(40, 40)
+    sources = np.concatenate([boundary, bulk[:1]])
+    sums, _ = calc_confinement_potentials_tree(bulk[:1], sources)
+    exact = calc_confinement_potentials(bulk[:1], boundary)
+    np.testing.assert_allclose(sums, exact, rtol=1e-4)
+
+
+@pytest.mark.parametrize("tolerance", [0, -1e-4])
+def test_tree_rejects_non_positive_tolerance(tolerance: float) -> None:
+    bulk, boundary = make_disk(20, 20)
+    with pytest.raises(ValueError):
+        calc_confinement_potentials_tree(
+            bulk,
+            boundary,
+            tolerance=tolerance,
+        )
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from edgecraft import (
+    IndexSet,
+    calc_contour_length,
+    calc_contour_lengths,
+    find_contour,
+)
+
+
+def make_cone(n: int) -> np.ndarray:
+    """
+    Return the distance of every point from an off-grid center.
+    """
+    X, Y = np.mgrid[:n, :n]
+    return np.hypot(X - n / 2 + 0.3, Y - n / 2 - 0.2)
+
+
+@pytest.mark.parametrize("radius", [8, 20, 40])
+def test_disk_length(radius: int) -> None:
+    # the unit circle on a grid of spacing h = 1 / radius
+    h = 1 / radius
+    energy = make_cone(3 * radius) * h
+    length = calc_contour_length(energy, 1.0, pixel_x=h, pixel_y=h)
+    assert abs(length - 2 * np.pi) < 2 * np.pi * h**2
+
+
+@pytest.mark.parametrize(
+    ("energy", "level"),
+    [
+        ([[1.0, 0.0], [0.0, 1.0]], 0.6),
+        ([[1.0, 0.0], [0.0, 1.0]], 0.4),
+        ([[0.0, 1.0], [1.0, 0.0]], 0.6),
+        ([[0.0, 1.0], [1.0, 0.0]], 0.4),
+    ],
+    ids=["5-low", "5-high", "10-low", "10-high"],
+)
+def test_saddle_has_two_segments(energy: list, level: float) -> None:
+    segments = find_contour(np.array(energy), level)
+    assert segments.shape == (2, 2, 2)
+    # every segment joins two different cell edges, and no end is shared
+    ends = segments.reshape(4, 2)
+    assert len(np.unique(ends, axis=0)) == 4
+    assert np.all(np.isin(ends, [0.0, 1.0]).sum(axis=1) == 1)
+
+
+def test_mask_excludes_outer_pixels() -> None:
+    energy = make_cone(40)
+    mask = np.zeros(energy.shape, dtype=bool)
+    mask[:, :25] = True
+    np.testing.assert_allclose(
+        calc_contour_length(energy, 12.0, mask),
+        calc_contour_length(energy[:, :25], 12.0),
+        rtol=1e-12,
+    )
+    assert calc_contour_length(
+        energy,
+        12.0,
+        IndexSet.from_mask(mask),
+    ) == calc_contour_length(energy, 12.0, mask)
+    assert calc_contour_length(energy, 12.0, np.zeros_like(mask)) == 0
+    assert len(find_contour(energy, 12.0, np.zeros_like(mask))) == 0
+
+
+def test_lengths_of_stack() -> None:
+    cone = make_cone(40)
+    stack = np.stack([cone + shift for shift in (-6.0, 0.0, 2.5, 30.0)])
+    mask = cone < 18
+    for frame_mask in (None, mask):
+        np.testing.assert_allclose(
+            calc_contour_lengths(stack, 12.0, frame_mask, 2, 3),
+            [
+                calc_contour_length(frame, 12.0, frame_mask, 2, 3)
+                for frame in stack
+            ],
+            rtol=1e-12,
+        )
+
+
+def test_rejects_wrong_dimensions() -> None:
+    with pytest.raises(ValueError):
+        calc_contour_length(np.zeros((2, 3, 3)), 0.5)
+    with pytest.raises(ValueError):
+        calc_contour_lengths(np.zeros((3, 3)), 0.5)
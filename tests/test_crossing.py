@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from edgecraft import CrossingIndex, SimpleSample, sweep_gate
+
+
+def make_gates(sample: SimpleSample) -> list[np.ndarray]:
+    """
+    Return the gate mask of the sample and gate weights of both signs.
+    """
+    rng = np.random.default_rng(0)
+    weights = sample.gate * rng.uniform(-1.0, 1.0, sample.gate.shape)
+    return [sample.gate, weights]
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_crossing_index_matches_sweep(
+    sample: SimpleSample,
+    weighted: bool,
+) -> None:
+    gate = make_gates(sample)[weighted]
+    voltages = np.random.default_rng(1).uniform(
+        -1.5 * sample.E_F,
+        1.5 * sample.E_F,
+        101,
+    )
+    lengths, edges = sweep_gate(
+        sample.energy,
+        gate,
+        voltages,
+        sample.E_F,
+        sample.U_fluc,
+        sample.layout.bulk,
+        return_edges=True,
+    )
+    index = CrossingIndex(
+        sample.energy,
+        gate,
+        sample.E_F,
+        sample.U_fluc,
+        sample.layout.bulk,
+    )
+    np.testing.assert_array_equal(index.calc_edge_lengths(voltages), lengths)
+    np.testing.assert_array_equal(index.find_edges(voltages), edges)
+    assert index.calc_edge_length(voltages[7]) == lengths[7]
+    np.testing.assert_array_equal(index.find_edge(voltages[7]), edges[7])
+
+
+def test_crossing_index_rejects_gate_stack(sample: SimpleSample) -> None:
+    with pytest.raises(ValueError):
+        CrossingIndex(
+            sample.energy,
+            np.stack(make_gates(sample)),
+            sample.E_F,
+            sample.U_fluc,
+            sample.layout.bulk,
+        )
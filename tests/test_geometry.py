@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+from edgecraft import (
+    Annulus,
+    Disk,
+    HalfPlane,
+    Rectangle,
+    Region,
+    SampleGeometry,
+    find_boundary,
+    true_circle_in,
+)
+from edgecraft.geometry import BOUNDARY, BULK, VACUUM, VACUUM_BOUNDARY
+
+
+SHAPE = (61, 47)
+
+
+def make_geometry() -> SampleGeometry:
+    """
+    Return a disk bulging out of a half-plane, with a hole, two overlapping
+    regions and two gates.
+    """
+    return SampleGeometry(
+        shape=SHAPE,
+        space=(
+            Disk(30, 23, 17) | HalfPlane("y", 23)
+        ) - Rectangle(28, 33, 10, 14),
+        regions=[
+            ("outer", Annulus(30, 23, 17, 12) & HalfPlane("y", 23, True)),
+            ("inner", Disk(30, 23, 14)),
+        ],
+        gates=[
+            ("ring", Annulus(30, 23, 17, 9) & HalfPlane("y", 23, True)),
+            ("strip", Rectangle(0, 61, 30, 35)),
+        ],
+    )
+
+
+def make_script_layout() -> dict[str, np.ndarray]:
+    """
+    Return the masks of `make_geometry` as the example scripts built them,
+    with np.gradient and np.logical_xor.
+    """
+    y = np.arange(SHAPE[1])
+    x = np.arange(SHAPE[0])
+    Y, X = np.meshgrid(y, x)
+    space = (true_circle_in(Y, X, 23, 30, 17) | (Y >= 23)).astype(int)
+    space[28:33, 10:14] = 0
+    diff_y = np.gradient(space, 1, axis=0)
+    diff_x = np.gradient(space, 1, axis=1)
+    boundary = ((diff_x != 0) | (diff_y != 0)).astype(int)
+    bulk = np.copy(space)
+    bulk[boundary == 1] = 0
+
+    outer = np.logical_xor(
+        true_circle_in(Y, X, 23, 30, 17),
+        true_circle_in(Y, X, 23, 30, 12),
+    ).astype(int)
+    outer[Y >= 23] = 0
+    outer[bulk == 0] = 0
+    inner = true_circle_in(Y, X, 23, 30, 14).astype(int)
+    inner[bulk == 0] = 0
+    inner[outer == 1] = 0
+
+    ring = np.logical_xor(
+        true_circle_in(Y, X, 23, 30, 17),
+        true_circle_in(Y, X, 23, 30, 9),
+    ).astype(int)
+    ring[Y >= 23] = 0
+    ring[bulk == 0] = 0
+    strip = ((Y >= 30) & (Y < 35)).astype(int)
+    strip[bulk == 0] = 0
+    return {
+        "space": space,
+        "boundary": boundary,
+        "bulk": bulk,
+        "outer": outer,
+        "inner": inner,
+        "ring": ring,
+        "strip": strip,
+    }
+
+
+def test_compile_matches_script_construction() -> None:
+    layout = make_geometry().compile()
+    expected = make_script_layout()
+
+    np.testing.assert_array_equal(layout.space, expected["space"])
+    np.testing.assert_array_equal(layout.boundary, expected["boundary"])
+    np.testing.assert_array_equal(layout.bulk, expected["bulk"])
+    np.testing.assert_array_equal(layout.vacuum, expected["space"] == 0)
+    for name in ("outer", "inner"):
+        np.testing.assert_array_equal(layout.region(name), expected[name])
+        assert expected[name].any()
+    assert layout.gates.keys() == {"ring", "strip"}
+    for name, gate in layout.gates.items():
+        np.testing.assert_array_equal(gate, expected[name])
+
+    space = expected["space"] == 1
+    boundary = expected["boundary"] == 1
+    labels = np.full(SHAPE, BULK)
+    labels[~space] = VACUUM
+    labels[boundary & ~space] = VACUUM_BOUNDARY
+    labels[boundary & space] = BOUNDARY
+    labels[expected["outer"] == 1] = layout.label("outer")
+    labels[expected["inner"] == 1] = layout.label("inner")
+    np.testing.assert_array_equal(layout.labels, labels)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_find_boundary_matches_gradient(seed: int) -> None:
+    space = np.random.default_rng(seed).random((23, 17)) < 0.5
+    expected = (
+        (np.gradient(space.astype(int), axis=0) != 0) |
+        (np.gradient(space.astype(int), axis=1) != 0)
+    )
+    np.testing.assert_array_equal(find_boundary(space), expected)
+
+
+def test_compile_rejects_duplicate_names() -> None:
+    geometry = SampleGeometry(
+        shape=SHAPE,
+        space=Disk(30, 23, 17),
+        regions=[("ring", Disk(30, 23, 5)), ("ring", Disk(30, 23, 9))],
+    )
+    with pytest.raises(ValueError):
+        geometry.compile()
+
+
+def test_region_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        Region()
+
+    class Everywhere(Region):
+        def mask(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+            return np.ones(np.broadcast_shapes(X.shape, Y.shape), bool)
+
+    layout = SampleGeometry(SHAPE, Everywhere() - Disk(30, 23, 5)).compile()
+    X, Y = np.mgrid[:SHAPE[0], :SHAPE[1]]
+    np.testing.assert_array_equal(
+        layout.space,
+        (X - 30)**2 + (Y - 23)**2 > 5**2,
+    )
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from edgecraft import (
+    CONFINEMENT_ENGINES,
+    ConfinementCache,
+    IndexSet,
+    apply_confinement_potential,
+    calc_confinement_potential_at,
+    find_boundary,
+)
+
+
+def random_mask(seed: int, shape: tuple[int, int] = (37, 23)) -> np.ndarray:
+    return np.random.default_rng(seed).random(shape) < 0.6
+
+
+def test_round_trip() -> None:
+    mask = random_mask(0)
+    indices = np.argwhere(mask)
+    index_set = IndexSet.from_mask(mask)
+    assert len(index_set) == len(indices)
+    np.testing.assert_array_equal(index_set.to_mask(), mask)
+    np.testing.assert_array_equal(index_set.to_indices(), indices)
+    np.testing.assert_array_equal(np.asarray(index_set), indices)
+    assert list(index_set) == [tuple(point) for point in indices.tolist()]
+
+    shuffled = np.random.default_rng(1).permutation(indices)
+    from_indices = IndexSet.from_indices(shuffled, mask.shape)
+    np.testing.assert_array_equal(from_indices.to_mask(), mask)
+
+
+def test_empty() -> None:
+    index_set = IndexSet.from_mask(np.zeros((3, 4)))
+    assert len(index_set) == 0
+    assert index_set.to_indices().shape == (0, 2)
+    assert list(index_set.chunks(5)) == []
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 23, 24, 10000])
+def test_chunks(size: int) -> None:
+    mask = random_mask(2)
+    chunks = list(IndexSet.from_mask(mask).chunks(size))
+    assert all(len(chunk) <= size for chunk in chunks)
+    np.testing.assert_array_equal(
+        np.concatenate(chunks),
+        np.argwhere(mask),
+    )
+
+
+def test_set_algebra() -> None:
+    first = random_mask(3)
+    second = random_mask(4)
+    union = IndexSet.from_mask(first) | IndexSet.from_mask(second)
+    intersection = IndexSet.from_mask(first) & IndexSet.from_mask(second)
+    np.testing.assert_array_equal(union.to_mask(), first | second)
+    np.testing.assert_array_equal(
+        intersection.to_mask(),
+        first & second,
+    )
+
+    # the runs stay merged and sorted
+    for result in (union, intersection):
+        reference = IndexSet.from_mask(result.to_mask())
+        np.testing.assert_array_equal(result.rows, reference.rows)
+        np.testing.assert_array_equal(result.starts, reference.starts)
+        np.testing.assert_array_equal(result.stops, reference.stops)
+
+
+def test_set_algebra_rejects_other_shapes() -> None:
+    first = IndexSet.from_mask(np.ones((2, 3)))
+    second = IndexSet.from_mask(np.ones((3, 2)))
+    with pytest.raises(ValueError):
+        first | second
+
+
+def make_disk() -> tuple[np.ndarray, np.ndarray]:
+    X, Y = np.mgrid[:45, :35]
+    space = (X - 22)**2 + (Y - 17)**2 <= 15**2
+    boundary = find_boundary(space)
+    return space & ~boundary, boundary
+
+
+@pytest.mark.parametrize("engine", CONFINEMENT_ENGINES)
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_confinement_accepts_index_sets(engine: str, dtype: type) -> None:
+    bulk, boundary = make_disk()
+    expected = apply_confinement_potential(
+        np.zeros(bulk.shape, dtype=dtype),
+        np.argwhere(bulk),
+        np.argwhere(boundary),
+        1e3,
+        engine=engine,
+        max_bytes=2**14,
+    )
+    energy = apply_confinement_potential(
+        np.zeros(bulk.shape, dtype=dtype),
+        IndexSet.from_mask(bulk),
+        IndexSet.from_mask(boundary),
+        1e3,
+        engine=engine,
+        max_bytes=2**14,
+    )
+    np.testing.assert_array_equal(energy, expected)
+
+
+def test_confinement_potential_at_accepts_index_set() -> None:
+    bulk, boundary = make_disk()
+    point = np.argwhere(bulk)[0]
+    assert calc_confinement_potential_at(
+        point,
+        IndexSet.from_mask(boundary),
+    ) == calc_confinement_potential_at(point, np.argwhere(boundary))
+
+
+def test_cache_key_ignores_representation() -> None:
+    bulk, boundary = make_disk()
+    assert ConfinementCache.make_key(
+        bulk.shape,
+        IndexSet.from_mask(bulk),
+        IndexSet.from_mask(boundary),
+        1,
+        "fft",
+    ) == ConfinementCache.make_key(
+        bulk.shape,
+        np.argwhere(bulk),
+        np.argwhere(boundary),
+        1,
+        "fft",
+    )
@@ -0,0 +1,150 @@
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from edgecraft import (
+    Progress,
+    Recorder,
+    StageStats,
+    get_recorder,
+    instrument,
+    load_config,
+    scan,
+    set_config_value,
+    stage,
+)
+from edgecraft.cli import main
+from edgecraft.instrument import _ProgressMeter
+
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+def test_nested_stages() -> None:
+    assert get_recorder() is None
+    with instrument() as recorder:
+        assert get_recorder() is recorder
+        for _ in range(3):
+            with stage("outer", 10):
+                with stage("inner", 4):
+                    time.sleep(0.01)
+                with stage("inner", 1):
+                    pass
+    assert get_recorder() is None
+
+    # stages outside of the block are not recorded
+    with stage("outer", 10):
+        pass
+
+    assert list(recorder.stages) == ["outer", "inner"]
+    outer = recorder.stages["outer"]
+    inner = recorder.stages["inner"]
+    assert (outer.calls, outer.pixels) == (3, 30)
+    assert (inner.calls, inner.pixels) == (6, 15)
+    assert inner.seconds >= 0.03
+    assert outer.seconds >= inner.seconds
+    assert outer.peak_bytes == inner.peak_bytes == 0
+    assert [record["name"] for record in recorder.report()] == [
+        "outer",
+        "inner",
+    ]
+
+
+def test_merge_worker_stages() -> None:
+    recorder = Recorder()
+    recorder.merge({"render": StageStats("render", 2, 0.5, 100, 10)})
+    recorder.merge({
+        "render": StageStats("render", 1, 0.25, 50, 30),
+        "encode": StageStats("encode", 3, 1.0, 60, 5),
+    })
+    assert recorder.stages == {
+        "render": StageStats("render", 3, 0.75, 150, 30),
+        "encode": StageStats("encode", 3, 1.0, 60, 5),
+    }
+
+
+def scan_point(
+    params: dict[str, Any],
+    shared: dict[str, np.ndarray],
+) -> dict[str, float]:
+    with stage("square", params["n"]):
+        return {"square": params["n"]**2}
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_worker_stages_are_merged(workers: int) -> None:
+    points = [{"n": n} for n in range(1, 6)]
+    with instrument() as recorder:
+        table = scan(scan_point, points, workers=workers)
+    np.testing.assert_array_equal(table["square"], [1, 4, 9, 16, 25])
+    assert recorder.stages["scan_point"].calls == 5
+    square = recorder.stages["square"]
+    assert (square.calls, square.pixels) == (5, 15)
+
+
+def test_peak_bytes() -> None:
+    with instrument(trace_memory=True) as recorder:
+        with stage("outer"):
+            large = np.ones(2**20)
+            with stage("inner"):
+                small = np.ones(2**16)
+            del large, small
+    assert recorder.stages["inner"].peak_bytes >= 2**19
+    assert recorder.stages["inner"].peak_bytes < 2**22
+    assert recorder.stages["outer"].peak_bytes >= 2**23
+
+
+def test_trace_memory_option(tmp_path: Path) -> None:
+    config = load_config(EXAMPLES / "simple_sample" / "simple_sample.json")
+    config = set_config_value(config, "physics.M", 100)
+    config = set_config_value(config, "sweep.frames", 5)
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config))
+
+    peaks = {}
+    for option in ("--report", "--trace-memory"):
+        result = CliRunner().invoke(
+            main,
+            [
+                "--engine", "fft",
+                option,
+                "sweep", str(config_path),
+                "-o", str(tmp_path / option),
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        lines = [
+            line.split() for line in result.output.splitlines()
+            if line.startswith("confinement")
+        ]
+        assert len(lines) == 1
+        peaks[option] = float(lines[0][-1])
+    # the peak is only traced on request
+    assert peaks["--report"] == 0
+    assert peaks["--trace-memory"] > 0
+
+
+def test_progress_rate_counts_this_run_only(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    clock = [100.0]
+    monkeypatch.setattr(time, "perf_counter", lambda: clock[0])
+    reports = []
+    meter = _ProgressMeter(reports.append, 100, done=60)
+
+    clock[0] = 101.0
+    meter.update(60)
+    clock[0] = 102.0
+    meter.update(70)
+    clock[0] = 110.0
+    meter.update(100)
+    assert reports == [
+        Progress(60, 100, 1.0, 0.0, float("inf")),
+        Progress(70, 100, 2.0, 5.0, 6.0),
+        Progress(100, 100, 10.0, 4.0, 0.0),
+    ]
@@ -0,0 +1,142 @@
+import io
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+import pytest
+
+from edgecraft import SweepReader, SweepWriter, sweep_gate
+from edgecraft.plotting import SweepAnimator, calc_energy_cuts
+
+
+matplotlib.use("Agg")
+
+
+E_F = 0.5
+U_FLUC = 0.05
+
+
+def make_sweep() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return the energy, gate, bulk and voltages of a sweep of a valley along
+    the rows of a 24 x 20 grid.
+    """
+    X, Y = np.mgrid[:24, :20]
+    energy = ((Y - 10.0) / 10)**2 + X / 240
+    gate = (X >= 12).astype(float)
+    bulk = np.ones(energy.shape, dtype=bool)
+    return energy, gate, bulk, np.linspace(0, 0.3, 7)
+
+
+def run_sweep(writer: SweepWriter | None = None) -> tuple[np.ndarray, ...]:
+    energy, gate, bulk, voltages = make_sweep()
+    return sweep_gate(
+        energy,
+        gate,
+        voltages,
+        E_F,
+        U_FLUC,
+        bulk,
+        return_edges=True,
+        writer=writer,
+    )
+
+
+def make_animator() -> SweepAnimator:
+    energy, gate, _, voltages = make_sweep()
+    lengths, edges = run_sweep()
+    return SweepAnimator(
+        edges,
+        energy_cuts=calc_energy_cuts(energy, gate, voltages, 12),
+        E_F=E_F,
+        U_fluc=U_FLUC,
+        edge_lengths=lengths,
+        voltages=voltages,
+    )
+
+
+def shown(animator: SweepAnimator) -> list[np.ndarray]:
+    """
+    Return the data of the artists updated by every frame.
+    """
+    data = [np.asarray(animator.image.get_array())]
+    if animator.energy_line is not None:
+        data.append(np.asarray(animator.energy_line.get_ydata()))
+    if animator.marker is not None:
+        data.append(np.asarray(animator.marker.get_data()))
+    return data
+
+
+def test_update_only_changes_artist_data() -> None:
+    animator = make_animator()
+    animator.figure.savefig(io.BytesIO(), format="png")
+    artists = [id(artist) for artist in animator.figure.findobj()]
+    updated = [id(artist) for artist in animator.artists]
+
+    energy, gate, _, voltages = make_sweep()
+    lengths, edges = run_sweep()
+    for index in (3, 0, 6):
+        assert [id(artist) for artist in animator.update(index)] == updated
+        animator.figure.savefig(io.BytesIO(), format="png")
+        assert [id(artist) for artist in animator.figure.findobj()] == artists
+
+        image, cut, marker = shown(animator)
+        np.testing.assert_array_equal(image, edges[index])
+        np.testing.assert_array_equal(
+            cut,
+            (energy + voltages[index] * gate)[12],
+        )
+        np.testing.assert_array_equal(
+            marker,
+            [[voltages[index]], [lengths[index]]],
+        )
+        assert animator.label.get_text() == f"step: {index}"
+
+
+@pytest.mark.parametrize("snapshots", [True, False])
+def test_from_store_matches_arrays(tmp_path: Path, snapshots: bool) -> None:
+    energy, gate, _, voltages = make_sweep()
+    with SweepWriter(
+        tmp_path,
+        energy.shape,
+        chunk_frames=3,
+        energy_dtype=energy.dtype if snapshots else None,
+        params={"E_F": E_F, "U_fluc": U_FLUC},
+    ) as writer:
+        run_sweep(writer)
+
+    reader = SweepReader(tmp_path)
+    from_store = SweepAnimator.from_store(
+        reader,
+        row=12,
+        energy=None if snapshots else energy,
+        gate=None if snapshots else gate,
+    )
+    expected = make_animator()
+    assert len(from_store) == len(expected)
+    assert len(from_store.artists) == len(expected.artists)
+    for index in range(len(expected)):
+        from_store.update(index)
+        expected.update(index)
+        for data, expected_data in zip(shown(from_store), shown(expected)):
+            np.testing.assert_array_equal(data, expected_data)
+
+
+def test_energy_cuts_match_frames() -> None:
+    energy, gate, _, voltages = make_sweep()
+    cuts = calc_energy_cuts(energy, gate, voltages, 5)
+    assert cuts.shape == (len(voltages), energy.shape[1])
+    for voltage, cut in zip(voltages, cuts):
+        np.testing.assert_array_equal(cut, (energy + voltage * gate)[5])
+
+    # two gates, the lower and the upper rows
+    gates = np.stack([gate, 1 - gate])
+    stacked = np.stack([voltages, voltages[::-1]], axis=1)
+    for row in (5, 15):
+        cuts = calc_energy_cuts(energy, gates, stacked, row)
+        for (first, second), cut in zip(stacked, cuts):
+            np.testing.assert_allclose(
+                cut,
+                (energy + first * gates[0] + second * gates[1])[row],
+                rtol=1e-15,
+            )
@@ -0,0 +1,94 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from edgecraft import (
+    CONFINEMENT_ENGINES,
+    SimpleSample,
+    apply_confinement_potential,
+    compare_precision,
+    resolve_dtype,
+    sweep_gate,
+)
+
+
+@pytest.mark.parametrize("precision", [None, "float64", np.float64])
+def test_resolve_float64(precision) -> None:
+    assert resolve_dtype(precision) == np.float64
+
+
+@pytest.mark.parametrize("precision", ["float16", "int32", "double64"])
+def test_resolve_rejects_unknown(precision: str) -> None:
+    with pytest.raises(ValueError):
+        resolve_dtype(precision)
+
+
+@pytest.mark.parametrize("engine", CONFINEMENT_ENGINES)
+def test_float32_sums_match_float64(
+    sample: SimpleSample,
+    engine: str,
+) -> None:
+    bulk = sample.bulk_indices
+    boundary = sample.boundary_indices
+    energies = [
+        apply_confinement_potential(
+            np.zeros(sample.layout.shape, dtype=dtype),
+            bulk,
+            boundary,
+            1e3,
+            engine=engine,
+        )
+        for dtype in (np.float64, np.float32)
+    ]
+    assert energies[1].dtype == np.float32
+    # relative to the largest sum, as for `FFT_RTOL`
+    np.testing.assert_allclose(
+        energies[1],
+        energies[0],
+        rtol=1e-5,
+        atol=1e-5 * np.max(energies[0]),
+    )
+
+
+@pytest.mark.parametrize("engine", ["loop", "tiled"])
+def test_float32_overflow_warns(engine: str) -> None:
+    bulk = np.array([[5, 5], [6, 6]])
+    boundary = np.array([[5, 5], [9, 9]])
+    with pytest.warns(RuntimeWarning, match="overflow float32"):
+        apply_confinement_potential(
+            np.zeros((12, 12), dtype=np.float32),
+            bulk,
+            boundary,
+            1e3,
+            engine=engine,
+        )
+
+
+def test_disjoint_points_do_not_warn() -> None:
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        apply_confinement_potential(
+            np.zeros((12, 12), dtype=np.float32),
+            np.array([[5, 5], [6, 6]]),
+            np.array([[4, 4], [9, 9]]),
+            1e3,
+            engine="tiled",
+        )
+
+
+def test_compare_precision(sample: SimpleSample) -> None:
+    def run(dtype: np.dtype) -> np.ndarray:
+        return sweep_gate(
+            sample.energy,
+            sample.gate,
+            sample.voltages,
+            sample.E_F,
+            sample.U_fluc,
+            sample.layout.bulk,
+            dtype=dtype,
+        )
+
+    report = compare_precision(run)
+    assert report.single_lengths.dtype == np.float32
+    assert report.is_within(1e-3)
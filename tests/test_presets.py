@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from edgecraft import (
+    MultipleEtchedSample,
+    SimpleSample,
+    apply_confinement_potential,
+    apply_local_constant_potential,
+    apply_QH_energy,
+    true_circle_in,
+)
+from edgecraft.presets import ETCHING_STEPS
+
+
+def make_script_sample(sample: SimpleSample) -> dict[str, np.ndarray]:
+    """
+    Return the masks and the energy of the sample as the example scripts
+    built them, with np.gradient and np.logical_xor.
+    """
+    l_0 = sample.l_0
+    radius_gate = int(50e-6 / l_0)
+    x = np.arange(0, int(200e-6 / l_0), 1)
+    y = np.arange(0, int(150e-6 / l_0), 1)
+    Y, X = np.meshgrid(y, x)
+    y0 = y[len(y) // 2]
+    x0 = x[len(x) // 2]
+
+    space = (
+        true_circle_in(Y, X, y0, x0, radius_gate) | (Y >= y0)
+    ).astype(int)
+    diff_y = np.gradient(space, 1, axis=0)
+    diff_x = np.gradient(space, 1, axis=1)
+    boundary = ((diff_x != 0) | (diff_y != 0)).astype(int)
+    bulk = np.copy(space)
+    bulk[boundary == 1] = 0
+
+    def ring(outer: float, inner: float) -> np.ndarray:
+        mask = np.logical_xor(
+            true_circle_in(Y, X, y0, x0, radius_gate - int(outer / l_0)),
+            true_circle_in(Y, X, y0, x0, radius_gate - int(inner / l_0)),
+        ).astype(int)
+        mask[Y >= y0] = 0
+        mask[boundary == 1] = 0
+        return mask
+
+    masks = {
+        "space": space,
+        "boundary": boundary,
+        "bulk": bulk,
+        "gate": ring(0, 25e-6),
+    }
+    energy = np.zeros_like(space, dtype=float)
+    energy = apply_QH_energy(energy, sample.E_QH, np.argwhere(bulk == 1))
+    energy = apply_confinement_potential(
+        energy,
+        np.argwhere(bulk == 1),
+        np.argwhere(boundary == 1),
+        sample.physics["alpha"],
+        engine="tiled",
+    )
+    if isinstance(sample, MultipleEtchedSample):
+        etched = np.zeros_like(space)
+        for i, (outer, inner) in enumerate(
+            zip(ETCHING_STEPS[:-1], ETCHING_STEPS[1:]),
+            1,
+        ):
+            mask = ring(outer, inner)
+            mask[etched == 1] = 0
+            etched |= mask
+            masks[f"etched{i}"] = mask
+            energy = apply_local_constant_potential(
+                energy,
+                sample.config["sample"]["potentials"][f"etched{i}"],
+                np.argwhere(mask == 1),
+            )
+    masks["energy"] = energy
+    return masks
+
+
+@pytest.mark.parametrize("preset", [SimpleSample, MultipleEtchedSample])
+@pytest.mark.parametrize("M", [60, 100, 200])
+def test_preset_matches_example_script(preset: type, M: int) -> None:
+    sample = preset(M=M, engine="tiled")
+    expected = make_script_sample(sample)
+    layout = sample.layout
+
+    np.testing.assert_array_equal(layout.space, expected["space"])
+    np.testing.assert_array_equal(layout.boundary, expected["boundary"])
+    np.testing.assert_array_equal(layout.bulk, expected["bulk"])
+    np.testing.assert_array_equal(sample.gate, expected["gate"])
+    for name in layout.names:
+        np.testing.assert_array_equal(layout.region(name), expected[name])
+    assert len(expected) == 5 + len(layout.names)
+
+    # the potentials are added in a different order
+    np.testing.assert_allclose(
+        sample.energy,
+        expected["energy"],
+        rtol=1e-14,
+        atol=0,
+    )
@@ -0,0 +1,169 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from edgecraft import (
+    FrameRenderer,
+    GifWriter,
+    PngSequenceWriter,
+    StoreFrames,
+    SweepFrames,
+    SweepWriter,
+    render_sweep,
+    sweep_gate,
+)
+
+
+def make_frames(n_frames: int = 5) -> SweepFrames:
+    """
+    Return a gate sweep of a valley along the rows of a 24 x 20 grid.
+    """
+    X, Y = np.mgrid[:24, :20]
+    energy = ((Y - 10.0) / 10)**2 + X / 240
+    bulk = np.ones(energy.shape, dtype=bool)
+    gate = X >= 12
+    return SweepFrames(
+        energy,
+        gate,
+        np.linspace(0, 0.3, n_frames),
+        0.5,
+        0.05,
+        bulk,
+    )
+
+
+def make_renderer() -> FrameRenderer:
+    return FrameRenderer(
+        energy_range=(0.0, 1.25),
+        E_F=0.5,
+        U_fluc=0.05,
+        cut_row=12,
+        scale=2,
+    )
+
+
+def test_gif_reopens_with_frames_and_duration(tmp_path: Path) -> None:
+    path = tmp_path / "sweep.gif"
+    with GifWriter(path, duration=70) as writer:
+        n_frames = render_sweep(
+            make_frames(),
+            writer,
+            make_renderer(),
+            workers=0,
+        )
+    assert n_frames == writer.n_frames == 5
+
+    with Image.open(path) as image:
+        assert image.n_frames == 5
+        assert image.size == make_renderer().render(
+            *make_frames().frame(0)
+        ).shape[1::-1]
+        for index in range(image.n_frames):
+            image.seek(index)
+            assert image.info["duration"] == 70
+
+
+def test_gif_is_independent_of_workers(tmp_path: Path) -> None:
+    data = []
+    for workers in (0, 2):
+        path = tmp_path / f"sweep_{workers}.gif"
+        with GifWriter(path) as writer:
+            render_sweep(
+                make_frames(),
+                writer,
+                make_renderer(),
+                workers=workers,
+                ahead=2,
+            )
+        data.append(path.read_bytes())
+    assert data[0] == data[1]
+
+
+def test_png_sequence_has_a_file_per_frame(tmp_path: Path) -> None:
+    frames = make_frames()
+    with PngSequenceWriter(tmp_path / "frames") as writer:
+        render_sweep(frames, writer, make_renderer(), workers=0)
+
+    paths = sorted((tmp_path / "frames").glob("*.png"))
+    assert [path.name for path in paths] == [
+        f"frame_{index:05d}.png" for index in range(len(frames))
+    ]
+    for index, path in enumerate(paths):
+        with Image.open(path) as image:
+            np.testing.assert_array_equal(
+                np.asarray(image),
+                make_renderer().render(*frames.frame(index)),
+            )
+
+
+def test_store_frames_match_sweep_frames(tmp_path: Path) -> None:
+    frames = make_frames()
+    with SweepWriter(
+        tmp_path / "store",
+        frames.energy.shape,
+        energy_dtype=frames.energy.dtype,
+    ) as writer:
+        sweep_gate(
+            frames.energy,
+            frames.gate,
+            frames.voltages,
+            frames.E_F,
+            frames.U_fluc,
+            frames.bulk,
+            writer=writer,
+        )
+    store = StoreFrames(tmp_path / "store")
+    assert len(store) == len(frames)
+    for index in range(len(frames)):
+        for stored, computed in zip(store.frame(index), frames.frame(index)):
+            np.testing.assert_array_equal(stored, computed)
+
+
+def test_gif_rejects_other_frame_size(tmp_path: Path) -> None:
+    with GifWriter(tmp_path / "sweep.gif") as writer:
+        writer.write(np.zeros((4, 6, 3), dtype=np.uint8))
+        with pytest.raises(ValueError):
+            writer.write(np.zeros((6, 4, 3), dtype=np.uint8))
+
+
+class FailingFrames(SweepFrames):
+    def __init__(self, fail: int) -> None:
+        frames = make_frames()
+        super().__init__(
+            frames.energy,
+            frames.gate,
+            frames.voltages,
+            frames.E_F,
+            frames.U_fluc,
+            frames.bulk,
+        )
+        self.fail = fail
+
+    def frame(self, index: int) -> tuple[np.ndarray, np.ndarray]:
+        if index == self.fail:
+            raise RuntimeError(f"Frame {index} failed.")
+        return super().frame(index)
+
+
+@pytest.mark.parametrize("fail", [0, 2])
+def test_failed_render_keeps_its_error(tmp_path: Path, fail: int) -> None:
+    path = tmp_path / "sweep.gif"
+    with pytest.raises(RuntimeError, match=f"Frame {fail} failed"):
+        with GifWriter(path) as writer:
+            render_sweep(
+                FailingFrames(fail),
+                writer,
+                make_renderer(),
+                workers=0,
+            )
+    assert not path.exists()
+
+
+def test_gif_without_frames_is_removed(tmp_path: Path) -> None:
+    path = tmp_path / "sweep.gif"
+    with pytest.raises(ValueError, match="no frames"):
+        with GifWriter(path):
+            pass
+    assert not path.exists()
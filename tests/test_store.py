@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from edgecraft import SweepReader, SweepWriter
+
+
+def make_frames(n_frames: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return random edges, energies and edge lengths of a sweep.
+    """
+    rng = np.random.default_rng(0)
+    edges = (rng.random((n_frames, 6, 5)) < 0.3).astype(np.uint8)
+    energy = rng.normal(size=(n_frames, 6, 5)).astype(np.float32)
+    return edges, energy, rng.random(n_frames)
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    edges, energy, lengths = make_frames(11)
+    with SweepWriter(
+        tmp_path,
+        (6, 5),
+        chunk_frames=4,
+        energy_dtype=np.float32,
+        params={"M": 20},
+    ) as writer:
+        # batches which start and end within and across chunks
+        for start, stop in [(0, 3), (3, 9), (9, 10)]:
+            writer.write_frames(
+                edges[start:stop],
+                energy[start:stop],
+                edge_length=lengths[start:stop],
+            )
+        writer.write(edges[10], energy[10], edge_length=lengths[10])
+
+    reader = SweepReader(tmp_path)
+    assert len(reader) == 11
+    assert reader.params == {"M": 20}
+    assert reader.scalar_names == ["edge_length"]
+    for i in range(-11, 11):
+        np.testing.assert_array_equal(reader.edge(i), edges[i])
+        np.testing.assert_array_equal(reader[i], edges[i])
+        np.testing.assert_array_equal(reader.energy(i), energy[i])
+    np.testing.assert_array_equal(reader.scalar("edge_length"), lengths)
+
+    with pytest.raises(IndexError):
+        reader.edge(11)
+    with pytest.raises(KeyError):
+        reader.scalar("voltage")
+
+
+def test_reader_sees_flushed_frames(tmp_path: Path) -> None:
+    edges, _, lengths = make_frames(6)
+    writer = SweepWriter(tmp_path, (6, 5), chunk_frames=4)
+    writer.write_frames(edges, edge_length=lengths)
+    assert len(SweepReader(tmp_path)) == 4
+    writer.flush()
+    reader = SweepReader(tmp_path)
+    assert len(reader) == 6
+    assert not reader.has_energy
+    with pytest.raises(ValueError):
+        reader.energy(0)
+    writer.close()
+
+
+def test_resume_after_truncate(tmp_path: Path) -> None:
+    edges, _, lengths = make_frames(10)
+    with SweepWriter(tmp_path, (6, 5), chunk_frames=4) as writer:
+        writer.write_frames(edges[:7], edge_length=lengths[:7])
+        writer.write_frames(edges[:2], edge_length=lengths[:2])
+
+    with SweepWriter(tmp_path, (6, 5), resume=True) as writer:
+        assert writer.n_frames == 9
+        writer.truncate(7)
+        writer.write_frames(edges[7:], edge_length=lengths[7:])
+
+    reader = SweepReader(tmp_path)
+    assert len(reader) == 10
+    for i in range(10):
+        np.testing.assert_array_equal(reader.edge(i), edges[i])
+    np.testing.assert_array_equal(reader.scalar("edge_length"), lengths)
+
+    # a new store drops the frames of the previous one
+    SweepWriter(tmp_path, (6, 5)).close()
+    assert len(SweepReader(tmp_path)) == 0
+    assert not list(tmp_path.glob("edges_*.npy"))
+
+
+def test_writer_rejects_mismatched_frames(tmp_path: Path) -> None:
+    edges, energy, lengths = make_frames(2)
+    with SweepWriter(tmp_path, (6, 5)) as writer:
+        with pytest.raises(ValueError):
+            writer.write_frames(edges[:, :5], edge_length=lengths)
+        with pytest.raises(ValueError):
+            writer.write_frames(edges, energy, edge_length=lengths)
+        writer.write_frames(edges, edge_length=lengths)
+        with pytest.raises(ValueError):
+            writer.write_frames(edges, voltage=lengths)
+    with pytest.raises(ValueError):
+        SweepWriter(tmp_path, (5, 6), resume=True)
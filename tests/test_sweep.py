@@ -0,0 +1,276 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from edgecraft import (
+    Progress,
+    SimpleSample,
+    SweepReader,
+    SweepWriter,
+    calc_edge_length,
+    calc_gate_shift,
+    find_edge,
+    sweep_gate,
+)
+from edgecraft.instrument import ProgressCallback
+
+
+def sweep_frame_by_frame(
+    energy: np.ndarray,
+    shifts: np.ndarray,
+    sample: SimpleSample,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the edge lengths and edges of a sweep, one frame at a time.
+    """
+    bulk = sample.layout.bulk
+    edges = [
+        find_edge(energy + shift, sample.E_F, sample.U_fluc, bulk)
+        for shift in shifts
+    ]
+    lengths = [calc_edge_length(edge) for edge in edges]
+    return np.array(lengths), np.array(edges, dtype=np.uint8)
+
+
+def split_gate(sample: SimpleSample) -> np.ndarray:
+    """
+    Return two disjoint gates, the lower and the upper rows of the gate.
+    """
+    rows = np.flatnonzero(sample.gate.any(axis=1))
+    lower = sample.gate.copy()
+    lower[rows[len(rows) // 2]:] = False
+    return np.stack([lower, sample.gate & ~lower])
+
+
+@pytest.mark.parametrize("frames_per_batch", [1, 3, 11])
+def test_sweep_matches_frame_by_frame(
+    sample: SimpleSample,
+    frames_per_batch: int,
+) -> None:
+    energy = sample.energy
+    lengths, edges = sweep_gate(
+        energy,
+        sample.gate,
+        sample.voltages,
+        sample.E_F,
+        sample.U_fluc,
+        sample.layout.bulk,
+        return_edges=True,
+        max_bytes=frames_per_batch * energy.nbytes,
+    )
+    expected = sweep_frame_by_frame(
+        energy,
+        [voltage * sample.gate for voltage in sample.voltages],
+        sample,
+    )
+    np.testing.assert_array_equal(lengths, expected[0])
+    np.testing.assert_array_equal(edges, expected[1])
+
+
+def test_sweep_of_gate_stack(sample: SimpleSample) -> None:
+    gates = split_gate(sample)
+    voltages = np.stack(
+        [sample.voltages, sample.voltages[::-1]],
+        axis=1,
+    )
+    lengths = sweep_gate(
+        sample.energy,
+        gates,
+        voltages,
+        sample.E_F,
+        sample.U_fluc,
+        sample.layout.bulk,
+        max_bytes=4 * sample.energy.nbytes,
+    )
+    expected, _ = sweep_frame_by_frame(
+        sample.energy,
+        [v[0] * gates[0] + v[1] * gates[1] for v in voltages],
+        sample,
+    )
+    np.testing.assert_array_equal(lengths, expected)
+
+
+def test_sweep_keeps_base_energy(sample: SimpleSample) -> None:
+    energy = sample.energy.copy()
+    sweep_gate(
+        energy,
+        sample.gate,
+        sample.voltages,
+        sample.E_F,
+        sample.U_fluc,
+        sample.layout.bulk,
+    )
+    np.testing.assert_array_equal(energy, sample.energy)
+
+
+@pytest.mark.parametrize("stacked", [False, True])
+def test_incremental_sweep_matches_full_sweep(
+    sample: SimpleSample,
+    stacked: bool,
+) -> None:
+    voltages = np.linspace(-0.5, 1.5, 21) * sample.E_F
+    if stacked:
+        gate = split_gate(sample)
+        voltages = np.stack([voltages, voltages[::-1]], axis=1)
+    else:
+        gate = sample.gate
+
+    # gate rows without any point in the window take the first lower bulk
+    # point instead
+    frames = sample.energy + calc_gate_shift(gate, voltages)
+    window = (
+        (sample.E_F - sample.U_fluc <= frames) &
+        (frames <= sample.E_F + sample.U_fluc)
+    )
+    fallback = ~window.any(axis=-1) & np.any(
+        (frames <= sample.E_F + sample.U_fluc) & sample.layout.bulk,
+        axis=-1,
+    )
+    assert np.any(fallback & sample.gate.any(axis=1))
+
+    results = [
+        sweep_gate(
+            sample.energy,
+            gate,
+            voltages,
+            sample.E_F,
+            sample.U_fluc,
+            sample.layout.bulk,
+            return_edges=True,
+            max_bytes=4 * sample.energy.nbytes,
+            incremental=incremental,
+        )
+        for incremental in (False, True)
+    ]
+    np.testing.assert_array_equal(results[1][0], results[0][0])
+    np.testing.assert_array_equal(results[1][1], results[0][1])
+
+
+class Interrupt(Exception):
+    pass
+
+
+def interrupt_at(frame: int) -> ProgressCallback:
+    """
+    Return a progress callback interrupting a sweep once `frame` frames are
+    done.
+    """
+    def progress(report: Progress) -> None:
+        if report.done >= frame:
+            raise Interrupt
+    return progress
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_resumed_sweep_is_bit_identical(
+    sample: SimpleSample,
+    tmp_path: Path,
+    incremental: bool,
+) -> None:
+    energy = sample.energy
+    voltages = np.linspace(0, sample.E_F, 23)
+
+    def run(name: str, progress=None, resume: bool = False):
+        with SweepWriter(
+            tmp_path / name,
+            energy.shape,
+            chunk_frames=5,
+            energy_dtype=energy.dtype,
+            resume=resume,
+        ) as writer:
+            return sweep_gate(
+                energy,
+                sample.gate,
+                voltages,
+                sample.E_F,
+                sample.U_fluc,
+                sample.layout.bulk,
+                return_edges=True,
+                max_bytes=2 * energy.nbytes,
+                incremental=incremental,
+                writer=writer,
+                checkpoint=tmp_path / f"{name}.npz",
+                checkpoint_every=3,
+                progress=progress,
+            )
+
+    lengths, edges = run("uninterrupted")
+    # the last checkpoint is at frame 8, the store holds 10 frames
+    with pytest.raises(Interrupt):
+        run("resumed", progress=interrupt_at(10))
+    # the store holds the results, the checkpoint only the frame
+    with np.load(tmp_path / "resumed.npz") as checkpoint:
+        assert sorted(checkpoint.files) == ["frame", "param_hash"]
+        assert checkpoint["frame"] == 8
+    assert len(SweepReader(tmp_path / "resumed")) == 10
+    resumed_lengths, resumed_edges = run("resumed", resume=True)
+
+    np.testing.assert_array_equal(resumed_lengths, lengths)
+    np.testing.assert_array_equal(resumed_edges, edges)
+    expected = SweepReader(tmp_path / "uninterrupted")
+    reader = SweepReader(tmp_path / "resumed")
+    assert len(reader) == len(voltages)
+    for name in ("edge_length", "voltage"):
+        np.testing.assert_array_equal(
+            reader.scalar(name),
+            expected.scalar(name),
+        )
+    for i in range(len(voltages)):
+        np.testing.assert_array_equal(reader.edge(i), expected.edge(i))
+        np.testing.assert_array_equal(reader.energy(i), expected.energy(i))
+
+
+def test_resumed_sweep_without_writer(
+    sample: SimpleSample,
+    tmp_path: Path,
+) -> None:
+    def run(progress=None):
+        return sweep_gate(
+            sample.energy,
+            sample.gate,
+            sample.voltages,
+            sample.E_F,
+            sample.U_fluc,
+            sample.layout.bulk,
+            return_edges=True,
+            max_bytes=2 * sample.energy.nbytes,
+            checkpoint=tmp_path / "sweep.npz",
+            checkpoint_every=2,
+            progress=progress,
+        )
+
+    with pytest.raises(Interrupt):
+        run(progress=interrupt_at(6))
+    with np.load(tmp_path / "sweep.npz") as checkpoint:
+        assert checkpoint["frame"] == 6
+        assert len(checkpoint["edge_lengths"]) == 6
+        assert len(checkpoint["edges"]) == 6
+    lengths, edges = run()
+    expected = sweep_frame_by_frame(
+        sample.energy,
+        [voltage * sample.gate for voltage in sample.voltages],
+        sample,
+    )
+    np.testing.assert_array_equal(lengths, expected[0])
+    np.testing.assert_array_equal(edges, expected[1])
+
+
+def test_checkpoint_of_other_sweep_is_rejected(
+    sample: SimpleSample,
+    tmp_path: Path,
+) -> None:
+    def run(U_fluc: float) -> np.ndarray:
+        return sweep_gate(
+            sample.energy,
+            sample.gate,
+            sample.voltages,
+            sample.E_F,
+            U_fluc,
+            sample.layout.bulk,
+            checkpoint=tmp_path / "sweep.npz",
+        )
+
+    run(sample.U_fluc)
+    with pytest.raises(ValueError, match="different parameters"):
+        run(2 * sample.U_fluc)